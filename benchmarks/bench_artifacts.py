@@ -0,0 +1,78 @@
+"""
+Artifact upload against the stub S3: plain upload_file vs compressed, multipart, skip-if-unchanged shipping
+
+    python -m benchmarks.bench_artifacts --papers 20000 --bandwidth-mb 20 --part-size-mb 8 --concurrency 8
+"""
+import argparse
+import gzip
+import os
+import tempfile
+
+import boto3
+
+import config
+from benchmarks.common import Timer, make_papers
+from benchmarks.stub_s3 import StubS3
+from src.artifact_shipper import ArtifactShipper, file_sha256
+from src.processor import DataProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark artifact shipping to S3')
+    parser.add_argument('--papers', type=int, default=20000)
+    parser.add_argument('--bandwidth-mb', type=float, default=20.0, help='Simulated S3 bandwidth per connection (MB/s)')
+    parser.add_argument('--part-size-mb', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    df = DataProcessor().process_batch(make_papers(args.papers))
+
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'stub')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'stub')
+    with tempfile.TemporaryDirectory() as tmp, StubS3(bandwidth=args.bandwidth_mb * 1024 * 1024) as s3:
+        path = os.path.join(tmp, 'processed.ndjson')
+        df.to_json(path, orient='records', lines=True, date_format='iso')
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        with open(path, 'rb') as f:
+            original = f.read()
+        client = boto3.client('s3', region_name=config.AWS_REGION, endpoint_url=s3.endpoint_url)
+        print(f"{args.papers:,} papers, {size_mb:.1f} MB NDJSON, S3 at {args.bandwidth_mb:g} MB/s per connection\n")
+
+        with Timer() as legacy:
+            client.upload_file(path, config.S3_BUCKET, 'legacy/processed.ndjson')
+        print(f"{'upload_file (uncompressed)':<34} {legacy.elapsed:6.2f}s")
+
+        for compression in (None, 'gzip', 'zstd'):
+            shipper = ArtifactShipper(client, compression=compression, part_size_mb=args.part_size_mb,
+                                      max_concurrency=args.concurrency)
+            key = f"{compression or 'plain'}/processed.ndjson"
+            requests = s3.state.requests
+            with Timer() as first:
+                result = shipper.ship(path, key)
+            uploaded = s3.state.objects[(config.S3_BUCKET, result['key'])]
+            data = uploaded['data']
+            if compression == 'gzip':
+                data = gzip.decompress(data)
+            elif compression == 'zstd':
+                import zstandard
+                data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+            assert data == original
+            assert uploaded['metadata']['x-amz-meta-sha256'] == file_sha256(path)
+            first_requests = s3.state.requests - requests
+
+            with Timer() as again:
+                assert shipper.ship(path, key)['status'] == 'unchanged'
+            shipper.shutdown()
+            print(f"{'ship ' + (compression or 'uncompressed'):<34} {first.elapsed:6.2f}s  "
+                  f"{result['bytes'] / 1024 / 1024:6.1f} MB in {first_requests} requests  "
+                  f"{legacy.elapsed / first.elapsed:4.1f}x  re-ship unchanged {again.elapsed:5.2f}s")
+
+        shipper = ArtifactShipper(client, part_size_mb=args.part_size_mb, max_concurrency=args.concurrency)
+        with Timer() as parquet:
+            result = shipper.ship_frame(df, 'parquet/processed.parquet')
+        shipper.shutdown()
+        print(f"{'ship DataFrame as Parquet':<34} {parquet.elapsed:6.2f}s  {result['bytes'] / 1024 / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
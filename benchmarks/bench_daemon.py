@@ -0,0 +1,86 @@
+"""
+Recurring ingestion on stub S3 and OpenSearch: a fresh `python main.py` per run (cron) vs jobs in one --daemon process
+
+    python -m benchmarks.bench_daemon --papers 200000 --limit 2000 --runs 5 [--workers 4]
+
+Cold runs pay the imports, the OpenSearch connection and index check, the
+S3 client and the process pools (processing and --workers scans) every time; daemon runs reuse WarmClients,
+whose one-off warm-up is reported separately. Both index the same papers.
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+
+import config
+from benchmarks.common import Timer
+from benchmarks.run_benchmarks import prepare_workspace
+from benchmarks.stub_opensearch import StubOpenSearch
+from benchmarks.stub_s3 import StubS3
+from src.daemon import Daemon, Job
+from src.storage import get_s3_client, get_shipper
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold pipeline runs against warm daemon jobs')
+    parser.add_argument('--papers', type=int, default=200000, help='Papers in the generated snapshot')
+    parser.add_argument('--limit', type=int, default=2000, help='Papers collected per run')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=1, help='Processes for the dataset scan')
+    args = parser.parse_args()
+
+    # main.py has to be imported from the repository root
+    import main as pipeline
+
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'stub')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'stub')
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace, StubS3() as s3, StubOpenSearch() as stub:
+        prepare_workspace(workspace, args.papers, seed=42)
+        # Every data/ path in config is relative, so the runs stay inside the workspace
+        os.chdir(workspace)
+        try:
+            env = dict(os.environ, OPENSEARCH_PORT=str(stub.port), S3_ENDPOINT_URL=s3.endpoint_url)
+            command = [sys.executable, MAIN, '--category', 'cs', '--limit', str(args.limit), '--workers', str(args.workers), '--search-backend', 'opensearch']
+            cold = []
+            for _ in range(args.runs):
+                with Timer() as run:
+                    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+                cold.append(run.elapsed)
+            cold_docs = len(stub.state.get(config.OPENSEARCH_INDEX)['docs'])
+
+            config.OPENSEARCH_PORT = stub.port
+            config.S3_ENDPOINT_URL = s3.endpoint_url
+            get_s3_client.cache_clear()
+            get_shipper.cache_clear()
+            job = Job(category='cs', limit=args.limit, workers=args.workers, search_backend='opensearch')
+            daemon = Daemon([job], pipeline.PIPELINES)
+            warm = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                with Timer() as warm_up:
+                    daemon.clients.warm_up([job])
+                for _ in range(args.runs):
+                    with Timer() as run:
+                        assert daemon.run_job(job)
+                    warm.append(run.elapsed)
+                daemon.clients.close()
+            assert len(daemon.clients.async_storages) == 1
+            assert len(stub.state.get(config.OPENSEARCH_INDEX)['docs']) == cold_docs == args.limit
+        finally:
+            os.chdir(cwd)
+
+    cold_mean = sum(cold) / len(cold)
+    warm_mean = sum(warm) / len(warm)
+    print(f"{args.runs} runs of {args.limit:,} cs papers from a {args.papers:,}-paper snapshot")
+    print(f"cold (process per run)  {cold_mean:6.2f}s per run  (first {cold[0]:.2f}s)")
+    print(f"daemon (warm clients)   {warm_mean:6.2f}s per run  (first {warm[0]:.2f}s, one-off warm-up {warm_up.elapsed:.2f}s)")
+    print(f"saved per run           {cold_mean - warm_mean:6.2f}s ({cold_mean / warm_mean:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
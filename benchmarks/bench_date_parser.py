@@ -0,0 +1,66 @@
+"""
+arXiv date parsing: legacy fromisoformat/strptime chain vs the memoized parser
+
+    python -m benchmarks.bench_date_parser --papers 100000
+"""
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.common import Timer, make_papers
+from src.date_parser import parse_date, parse_date_series
+
+
+def legacy_parse_date(date_str: str) -> datetime:
+    """The parser DataProcessor used before src.date_parser"""
+    if not date_str:
+        return datetime.now()
+    try:
+        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+    except:
+        try:
+            return datetime.strptime(date_str, '%a, %d %b %Y %H:%M:%S %Z')
+        except:
+            try:
+                if date_str.isdigit() and len(date_str) == 4:
+                    return datetime(int(date_str), 1, 1)
+            except:
+                pass
+            return datetime.now()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark arXiv date parsing')
+    parser.add_argument('--papers', type=int, default=100000)
+    args = parser.parse_args()
+
+    papers = make_papers(args.papers)
+    # Three lookups per paper, as in _process_single_paper before the rewrite
+    values = [p.published for p in papers] * 2 + [p.updated for p in papers]
+
+    with Timer() as legacy:
+        expected = [legacy_parse_date(v) for v in values]
+
+    parse_date.cache_clear()
+    with Timer() as cold:
+        actual = [parse_date(v) for v in values]
+    with Timer() as warm:
+        [parse_date(v) for v in values]
+    assert actual == expected
+
+    # Bulk parsing works per column, each with a single format
+    published = pd.Series([p.published for p in papers])
+    updated = pd.Series([p.updated for p in papers])
+    with Timer() as column:
+        parsed = [parse_date_series(published), parse_date_series(published), parse_date_series(updated)]
+    assert [value for series in parsed for value in series.tolist()] == expected
+
+    print(f"{len(values):,} dates, cache: {parse_date.cache_info()}")
+    for name, timer in [('legacy', legacy), ('parse_date (cold)', cold), ('parse_date (warm)', warm), ('parse_date_series', column)]:
+        print(f"{name:<20} {timer.elapsed:6.3f}s  {len(values) / timer.elapsed:>12,.0f} dates/s  "
+              f"{legacy.elapsed / timer.elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
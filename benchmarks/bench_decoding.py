@@ -0,0 +1,60 @@
+"""
+Snapshot decoding per JSON backend, and memory per paper as dict vs schema.Paper
+
+    python -m benchmarks.bench_decoding --papers 100000
+"""
+import argparse
+import json
+import random
+import tracemalloc
+
+from benchmarks.common import Timer, make_raw_paper
+from src import codec
+from src.schema import Paper
+
+
+def retained_bytes(build):
+    """Bytes still allocated after build() returns (the objects it produced)"""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON backends and paper representations')
+    parser.add_argument('--papers', type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    lines = [json.dumps(make_raw_paper(rng, i)).encode('utf-8') for i in range(args.papers)]
+    megabytes = sum(map(len, lines)) / 1024 / 1024
+
+    expected = [json.loads(line) for line in lines[:100]]
+    for backend in codec.BACKENDS:
+        if codec.use_backend(backend) != backend:
+            print(f"{backend:<8} not installed")
+            continue
+        assert [codec.loads(line) for line in lines[:100]] == expected
+
+        with Timer() as decode:
+            for line in lines:
+                codec.loads(line)
+        with Timer() as transform:
+            for line in lines:
+                Paper.from_raw(codec.loads(line))
+        print(f"{backend:<8} decode {len(lines) / decode.elapsed:>9,.0f} papers/s ({megabytes / decode.elapsed:5.1f} MB/s)  "
+              f"decode+Paper {len(lines) / transform.elapsed:>9,.0f} papers/s")
+
+    codec.use_backend('auto')
+    raw = [codec.loads(line) for line in lines]
+    dict_bytes, _ = retained_bytes(lambda: [Paper.from_raw(paper).to_dict() for paper in raw])
+    slot_bytes, _ = retained_bytes(lambda: [Paper.from_raw(paper) for paper in raw])
+    # Both hold the same new title/abstract/author strings; the difference is the container
+    print(f"\nRetained per transformed paper: dict {dict_bytes / len(raw):,.0f} B, "
+          f"Paper {slot_bytes / len(raw):,.0f} B ({(dict_bytes - slot_bytes) / len(raw):,.0f} B saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Memory held by the processed DataFrame: object columns (the old layout) vs the compact PROCESSED_DTYPES
+
+    python -m benchmarks.bench_frame_memory --papers 200000
+"""
+import argparse
+import gc
+import tracemalloc
+
+import pyarrow as pa
+
+from benchmarks.common import SnapshotGenerator, Timer
+from src.codec import loads
+from src.processor import DataProcessor
+from src.schema import Paper, ProcessedPaper, compact_frame, frame_memory
+
+
+def build(lines, compact: bool):
+    """Decode and process `lines`; returns the frame and the bytes it alone keeps alive"""
+    gc.collect()
+    arrow_start = pa.total_allocated_bytes()
+    tracemalloc.start()
+
+    processor = DataProcessor()
+    papers = [Paper.from_raw(loads(line)) for line in lines]
+    rows = [processor._process_single_paper(paper) for paper in papers]
+    df = processor._add_metrics(ProcessedPaper.to_frame(rows))
+    if compact:
+        df = compact_frame(df)
+    else:
+        df['author_affiliations'] = [str(parsed) if parsed else "" for parsed in df['author_affiliations']]
+    del processor, papers, rows
+    gc.collect()
+
+    retained = tracemalloc.get_traced_memory()[0] + pa.total_allocated_bytes() - arrow_start
+    tracemalloc.stop()
+    return df, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark processed DataFrame memory')
+    parser.add_argument('--papers', type=int, default=200000)
+    args = parser.parse_args()
+
+    lines = list(SnapshotGenerator(seed=11).lines(args.papers))
+
+    with Timer() as legacy_time:
+        legacy, legacy_bytes = build(lines, compact=False)
+    legacy_reported = frame_memory(legacy)['bytes']
+    del legacy
+    with Timer() as compact_time:
+        compact, compact_bytes = build(lines, compact=True)
+    report = frame_memory(compact)
+
+    mb = 1024 * 1024
+    print(f"{args.papers:,} papers")
+    print(f"object columns  retained {legacy_bytes / mb:8.1f} MB  memory_usage(deep) {legacy_reported / mb:8.1f} MB  "
+          f"({legacy_bytes / args.papers:,.0f} bytes/paper, built in {legacy_time.elapsed:.1f}s)")
+    print(f"compact dtypes  retained {compact_bytes / mb:8.1f} MB  memory_usage(deep) {report['bytes'] / mb:8.1f} MB  "
+          f"({compact_bytes / args.papers:,.0f} bytes/paper, built in {compact_time.elapsed:.1f}s)")
+    print(f"reduction       {legacy_bytes / compact_bytes:.1f}x")
+    print("largest compact columns: " + ', '.join(
+        f"{name} {size / mb:.1f} MB" for name, size in sorted(report['columns'].items(), key=lambda item: -item[1])[:5]
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Index mapping before/after on the stub OpenSearch: the old 7-field mapping with dynamic mapping vs the current profile
+
+    python -m benchmarks.bench_index_profile --papers 20000 --analysis-mb 20
+
+Both runs bulk index the same processed papers through BulkIndexer and report
+docs/s, mapped fields and the stub's estimated store size. --analysis-mb makes
+the stub spend time per byte of index structures built, as a real node would.
+The old index is then migrated with IndexProfiles.reindex, checking that search
+through the alias keeps answering and every paper arrives.
+"""
+import argparse
+
+from opensearchpy import OpenSearch
+
+import config
+from benchmarks.common import SnapshotGenerator, Timer
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.bulk_indexer import BulkIndexer, iter_documents
+from src.codec import loads
+from src.dataset_collector import DatasetCollector
+from src.index_profiles import CURRENT_VERSION, PROFILES, IndexProfiles, index_body, index_name
+from src.processor import DataProcessor
+from src.storage import search_body
+
+# A document with a field no profile declares
+PROBE = {'arxiv_id': 'probe', 'unexpected': 1}
+
+
+def mapped_fields(properties: dict) -> int:
+    """Leaf fields in a mapping, counting multi-field subfields"""
+    count = 0
+    for field in properties.values():
+        if 'properties' in field:
+            count += mapped_fields(field['properties'])
+        else:
+            count += 1 + len(field.get('fields', {}))
+    return count
+
+
+def load(stub, df, threads: int, body: dict) -> dict:
+    client = OpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}], pool_maxsize=threads)
+    client.indices.create(index=index_name() if 'aliases' in body else config.OPENSEARCH_INDEX, body=body)
+    result = BulkIndexer(client, thread_count=threads).index_documents(iter_documents(df))
+    assert result['success'] == len(df), result['errors'][:3]
+
+    concrete = stub.state.resolve(config.OPENSEARCH_INDEX)
+    stats = client.indices.stats(index=config.OPENSEARCH_INDEX)['indices'][concrete]['total']
+    mappings = client.indices.get_mapping(index=config.OPENSEARCH_INDEX)[concrete]['mappings']
+    return {
+        'client': client,
+        'docs_per_sec': result['docs_per_sec'],
+        'fields': mapped_fields(mappings.get('properties', {})),
+        'bytes': stats['store']['size_in_bytes']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the index profile against the old dynamic mapping')
+    parser.add_argument('--papers', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=config.BULK_THREADS)
+    parser.add_argument('--analysis-mb', type=float, default=20.0, help='Stub indexing cost: MB of index structures built per second (0: free)')
+    args = parser.parse_args()
+
+    collector = DatasetCollector()
+    papers = [collector._transform_paper(loads(line)) for line in SnapshotGenerator(seed=7).lines(args.papers)]
+    df = DataProcessor().process_batch(papers)
+
+    with StubOpenSearch(analysis_mb_per_sec=args.analysis_mb) as stub:
+        before = load(stub, df, args.threads, {"mappings": PROFILES[1]})
+
+        # The old mapping grows a field for anything sent; the strict profile refuses it on reindex
+        probe = BulkIndexer(before['client']).index_documents([PROBE])
+        assert probe['success'] == 1
+
+        query = str(df['title'].iloc[0]).split()[0]
+        hits = before['client'].search(index=config.OPENSEARCH_INDEX, body=search_body(query, 5))['hits']['hits']
+        with Timer() as migrate:
+            migrated = IndexProfiles(before['client']).reindex()
+        after_hits = before['client'].search(index=config.OPENSEARCH_INDEX, body=search_body(query, 5))['hits']['hits']
+        assert [hit['_id'] for hit in after_hits] == [hit['_id'] for hit in hits]
+        assert stub.state.resolve(config.OPENSEARCH_INDEX) == index_name()
+        assert len(stub.state.get(config.OPENSEARCH_INDEX)['docs']) == len(df)
+        assert [failure['id'] for failure in migrated['failures']] == ['probe']
+
+    with StubOpenSearch(analysis_mb_per_sec=args.analysis_mb) as stub:
+        after = load(stub, df, args.threads, index_body())
+        probe = BulkIndexer(after['client']).index_documents([PROBE])
+        assert probe['failed'] == 1 and probe['errors'][0]['error']['type'] == 'strict_dynamic_mapping_exception'
+
+    mb = 1024 * 1024
+    print(f"{args.papers:,} papers, stub analysis at {args.analysis_mb:g} MB/s")
+    print(f"dynamic mapping (v1)  {before['docs_per_sec']:>9,.0f} docs/s  {before['fields']:>3} fields  {before['bytes'] / mb:7.1f} MB")
+    print(f"profile v{CURRENT_VERSION} ({config.OPENSEARCH_CODEC})  {after['docs_per_sec']:>9,.0f} docs/s  "
+          f"{after['fields']:>3} fields  {after['bytes'] / mb:7.1f} MB")
+    print(f"index size {before['bytes'] / after['bytes']:.1f}x smaller, bulk {after['docs_per_sec'] / before['docs_per_sec']:.1f}x faster")
+    print(f"alias reindex v1 -> v{CURRENT_VERSION}: {migrated['copied']:,} papers in {migrate.elapsed:.1f}s, search served throughout")
+
+
+if __name__ == "__main__":
+    main()
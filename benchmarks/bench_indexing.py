@@ -0,0 +1,58 @@
+"""
+Bulk indexing throughput against the stub OpenSearch: legacy helpers.bulk vs BulkIndexer
+
+    python -m benchmarks.bench_indexing --papers 20000 --threads 4 --throttle 0.05
+"""
+import argparse
+
+from opensearchpy import OpenSearch, helpers
+
+import config
+from benchmarks.common import Timer, make_papers
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.bulk_indexer import BulkIndexer, iter_documents
+from src.processor import DataProcessor
+
+
+def legacy_bulk(client, df):
+    actions = []
+    for _, row in df.iterrows():
+        doc = row.to_dict()
+        actions.append({"_index": config.OPENSEARCH_INDEX, "_id": doc['arxiv_id'], "_source": doc})
+    success, _ = helpers.bulk(client, actions, chunk_size=100, request_timeout=30, raise_on_error=False)
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark bulk indexing against a stub OpenSearch')
+    parser.add_argument('--papers', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=config.BULK_THREADS)
+    parser.add_argument('--throttle', type=float, default=0.0, help='Fraction of documents answered with 429')
+    args = parser.parse_args()
+
+    df = DataProcessor().process_batch(make_papers(args.papers))
+
+    with StubOpenSearch() as stub:
+        client = OpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}], pool_maxsize=args.threads)
+        with Timer() as t:
+            success = legacy_bulk(client, df)
+        assert success == len(df), success
+        print(f"legacy helpers.bulk:  {success / t.elapsed:>10,.0f} docs/sec ({t.elapsed:.1f}s)")
+
+    with StubOpenSearch(throttle_ratio=args.throttle) as stub:
+        client = OpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}], pool_maxsize=args.threads)
+        client.indices.create(index=config.OPENSEARCH_INDEX, body={})
+        indexer = BulkIndexer(client, thread_count=args.threads, initial_backoff=0.01)
+        with indexer.bulk_settings():
+            assert stub.state.get(config.OPENSEARCH_INDEX)['settings']['index']['refresh_interval'] == '-1'
+            result = indexer.index_documents(iter_documents(df))
+        restored = stub.state.get(config.OPENSEARCH_INDEX)['settings']['index']
+        assert restored['refresh_interval'] == '1s', restored
+        assert result['success'] == len(df), result['failed']
+        assert len(stub.state.get(config.OPENSEARCH_INDEX)['docs']) == len(df)
+        print(f"BulkIndexer ({args.threads} threads): {result['docs_per_sec']:>10,.0f} docs/sec "
+              f"({result['seconds']:.1f}s, {stub.state.bulk_requests} requests, {stub.state.throttled} throttled docs retried)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Size and throughput of the raw intermediate: legacy indented JSON array vs NDJSON (+gzip/zstd)
+
+    python -m benchmarks.bench_intermediate_formats --papers 50000
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from benchmarks.common import Timer, make_papers
+from src.ndjson_io import iter_records, output_path, write_records
+
+
+def bench_legacy(papers, path):
+    with Timer() as write:
+        with open(path, 'w') as f:
+            json.dump(papers, f, indent=2)
+    with Timer() as read:
+        with open(path, 'r') as f:
+            count = len(json.load(f))
+    return write.elapsed, read.elapsed, count
+
+
+def bench_ndjson(papers, path):
+    with Timer() as write:
+        write_records(path, papers)
+    with Timer() as read:
+        count = sum(1 for _ in iter_records(path))
+    return write.elapsed, read.elapsed, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark raw intermediate formats')
+    parser.add_argument('--papers', type=int, default=50000)
+    args = parser.parse_args()
+
+    papers = make_papers(args.papers)
+    variants = [('json (indent=2)', None), ('ndjson', None), ('ndjson+gzip', 'gzip')]
+    try:
+        import zstandard  # noqa: F401
+        variants.append(('ndjson+zstd', 'zstd'))
+    except ImportError:
+        print("zstandard not installed, skipping zstd")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'format':<18}{'size MB':>10}{'write papers/s':>16}{'read papers/s':>15}")
+        for name, compression in variants:
+            if name.startswith('json'):
+                path = os.path.join(tmp, 'raw.json')
+                write_time, read_time, count = bench_legacy(papers, path)
+            else:
+                path = output_path(os.path.join(tmp, 'raw'), 'ndjson', compression)
+                write_time, read_time, count = bench_ndjson(papers, path)
+
+            assert count == len(papers)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"{name:<18}{size_mb:>10.1f}{count / write_time:>16,.0f}{count / read_time:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Keyword extraction: legacy per-call function vs KeywordExtractor (throughput and peak memory)
+
+    python -m benchmarks.bench_keywords --papers 100000
+"""
+import argparse
+import os
+import re
+import tempfile
+import tracemalloc
+
+from benchmarks.common import Timer, make_papers
+from src.keywords import KeywordExtractor
+
+
+def legacy_extract_keywords(title: str, abstract: str, max_keywords: int = 5):
+    """The extractor DataProcessor used before src.keywords"""
+    try:
+        text = f"{title} {title} {abstract}"
+        text = text.lower()
+        text = re.sub(r'[^\w\s]', ' ', text)
+        stopwords = {
+            'the', 'a', 'an', 'and', 'or', 'in', 'on', 'to', 'for', 'of', 'with',
+            'is', 'are', 'was', 'were', 'be', 'we', 'our', 'this', 'that', 'these'
+        }
+        words = text.split()
+        word_freq = {}
+        for word in words:
+            if len(word) >= 2 and word not in stopwords:
+                word_freq[word] = word_freq.get(word, 0) + 1
+        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
+        return [word for word, freq in sorted_words[:max_keywords]]
+    except Exception:
+        return []
+
+
+def measure(name, func, count, baseline=None):
+    """Time one run, then repeat it under tracemalloc for the peak allocation"""
+    with Timer() as timer:
+        result = func()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    speedup = f"{baseline / timer.elapsed:5.1f}x" if baseline else ''
+    print(f"{name:<26} {timer.elapsed:6.2f}s  {count / timer.elapsed:>10,.0f} papers/s  "
+          f"peak {peak / 1024 / 1024:7.1f} MB  {speedup}")
+    return timer.elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark keyword extraction')
+    parser.add_argument('--papers', type=int, default=100000)
+    args = parser.parse_args()
+
+    papers = make_papers(args.papers)
+    titles = [p.title for p in papers]
+    abstracts = [p.abstract for p in papers]
+    # Punctuation and mixed case, which the synthetic abstracts otherwise lack
+    abstracts[::7] = [f"We (re-)examine {a.title()}: O(n^2), 3D-CNNs, etc." for a in abstracts[::7]]
+
+    baseline, expected = measure(
+        'legacy', lambda: [legacy_extract_keywords(t, a) for t, a in zip(titles, abstracts)], len(papers)
+    )
+
+    extractor = KeywordExtractor(mode='frequency')
+    _, actual = measure('extract (frequency)', lambda: [extractor.extract(t, a) for t, a in zip(titles, abstracts)], len(papers), baseline)
+    assert actual == expected
+    _, actual = measure('extract_many (frequency)', lambda: extractor.extract_many(titles, abstracts), len(papers), baseline)
+    assert actual == expected
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df_file = os.path.join(tmp, 'keyword_df.json')
+        _, ranked = measure(
+            'extract_many (tfidf)',
+            lambda: KeywordExtractor(mode='tfidf', df_file=df_file).extract_many(titles, abstracts),
+            len(papers), baseline
+        )
+        tfidf = KeywordExtractor(mode='tfidf', df_file=df_file)
+        tfidf.extract_many(titles, abstracts)
+        tfidf.save()
+        print(f"tfidf statistics: {tfidf.stats()}, {os.path.getsize(df_file) / 1024:.0f} KB on disk")
+
+    top = lambda keyword_lists: sorted(
+        {k: sum(k in kws[:1] for kws in keyword_lists) for kws in keyword_lists for k in kws[:1]}.items(),
+        key=lambda item: -item[1]
+    )[:3]
+    print(f"Most common first keyword, frequency: {top(expected)}")
+    print(f"Most common first keyword, tfidf:     {top(ranked)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Local search index: indexing throughput, query latency, and a check against brute-force BM25
+
+    python -m benchmarks.bench_local_search --papers 200000 --batch-size 5000
+"""
+import argparse
+import math
+import random
+import statistics
+import tempfile
+from collections import Counter
+
+import pandas as pd
+
+from benchmarks.common import Timer, make_raw_paper
+from src.local_search import B, K1, LocalSearchIndex, tokenize
+
+QUERIES = ['quantum gauge', 'sparse bayesian inference', 'topic0042', 'lattice topic1234 entropy', 'transformer']
+
+
+def make_frame(rng: random.Random, start: int, count: int) -> pd.DataFrame:
+    rows = []
+    for i in range(start, start + count):
+        raw = make_raw_paper(rng, i)
+        rows.append({
+            'arxiv_id': raw['id'],
+            'title': raw['title'],
+            # A rarer term per paper, so idf actually varies
+            'abstract': f"{raw['abstract']} topic{rng.randint(0, 9999):04d}",
+            'authors': ['A. One', 'B. Two'],
+            'primary_category': raw['categories'].split()[0],
+            'year': int(raw['update_date'][:4]),
+            'keywords': []
+        })
+    return pd.DataFrame(rows)
+
+
+def brute_force(df: pd.DataFrame, query: str, size: int):
+    """Reference BM25 straight from the definition"""
+    docs = [Counter(tokenize(f"{title} {title} {abstract}")) for title, abstract in zip(df['title'], df['abstract'])]
+    avg_length = sum(sum(doc.values()) for doc in docs) / len(docs)
+    terms = list(dict.fromkeys(tokenize(query)))
+    idf = {}
+    for term in terms:
+        doc_freq = sum(1 for doc in docs if term in doc)
+        idf[term] = math.log(1 + (len(docs) - doc_freq + 0.5) / (doc_freq + 0.5))
+    scores = []
+    for arxiv_id, doc in zip(df['arxiv_id'], docs):
+        length = sum(doc.values())
+        score = sum(
+            idf[term] * doc[term] * (K1 + 1) / (doc[term] + K1 * (1 - B + B * length / avg_length))
+            for term in terms if term in doc
+        )
+        if score:
+            scores.append((score, arxiv_id))
+    scores.sort(reverse=True)
+    return scores[:size]
+
+
+def check(index: LocalSearchIndex, df: pd.DataFrame):
+    for query in QUERIES:
+        expected = brute_force(df, query, 10)
+        actual = [paper['arxiv_id'] for paper in index.search(query, 10)]
+        # Ties at the cut-off may come back in either order; compare scores by rank
+        assert len(actual) == len(expected), query
+        by_id = dict((arxiv_id, score) for score, arxiv_id in brute_force(df, query, len(df)))
+        for rank, (score, _) in enumerate(expected):
+            assert math.isclose(by_id[actual[rank]], score, rel_tol=1e-9), (query, rank)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the local BM25 search index')
+    parser.add_argument('--papers', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--check-papers', type=int, default=3000, help='Corpus size for the brute-force comparison')
+    args = parser.parse_args()
+
+    # Correctness: several segments, one batch re-indexed, then merged
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(5)
+        df = make_frame(rng, 0, args.check_papers)
+        index = LocalSearchIndex(tmp, max_segments=100)
+        step = args.check_papers // 3
+        for start in range(0, args.check_papers, step):
+            index.add(df.iloc[start:start + step])
+        index.add(df.iloc[:step // 2])
+        assert index.count() == len(df)
+        check(index, df)
+        index.merge()
+        assert len(index.segments) == 1 and index.count() == len(df)
+        check(LocalSearchIndex(tmp), df)
+    print(f"BM25 matches brute force on {args.check_papers:,} papers (segmented, re-indexed and merged)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = random.Random(9)
+        index = LocalSearchIndex(tmp)
+        indexing = 0.0
+        for start in range(0, args.papers, args.batch_size):
+            batch = make_frame(rng, start, min(args.batch_size, args.papers - start))
+            with Timer() as timer:
+                index.add(batch)
+            indexing += timer.elapsed
+        print(f"Indexed {args.papers:,} papers in {indexing:.1f}s ({args.papers / indexing:,.0f} papers/s), "
+              f"{len(index.segments)} segments")
+
+        index = LocalSearchIndex(tmp)
+        for query in QUERIES:
+            latencies = []
+            for _ in range(20):
+                with Timer() as timer:
+                    index.search(query, 10)
+                latencies.append(timer.elapsed * 1000)
+            print(f"{query:<28} p50 {statistics.median(latencies):7.2f} ms  max {max(latencies):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
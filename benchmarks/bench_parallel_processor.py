@@ -0,0 +1,73 @@
+"""
+Serial vs parallel processing of a raw NDJSON file; measures the worker count and cutover
+
+    python -m benchmarks.bench_parallel_processor --sizes 1000,10000,50000 --save
+"""
+import argparse
+import os
+import tempfile
+from multiprocessing import cpu_count
+
+import pandas as pd
+
+from benchmarks.common import Timer, make_papers
+from src.ndjson_io import iter_records, write_records
+from src.processor import DataProcessor
+from src.parallel_scan import get_pool, shutdown_pool
+from src.processor_parallel import DataProcessor as ParallelDataProcessor, save_tuning
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parallel processor and pick its tuning')
+    parser.add_argument('--sizes', default='1000,10000,50000', help='Comma-separated paper counts')
+    parser.add_argument('--workers', default=None, help='Comma-separated worker counts (default: 2..cpu_count)')
+    parser.add_argument('--save', action='store_true', help='Write the result to config.PROCESSOR_TUNING_FILE')
+    args = parser.parse_args()
+
+    sizes = sorted(int(n) for n in args.sizes.split(','))
+    if args.workers:
+        worker_counts = [int(n) for n in args.workers.split(',')]
+    else:
+        worker_counts = list(range(2, cpu_count() + 1)) or [2]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"raw_{size}.ndjson")
+            write_records(path, make_papers(size))
+
+            with Timer() as serial:
+                expected = DataProcessor().process_batch(iter_records(path))
+            results[size] = {'serial': serial.elapsed}
+            print(f"{size:>8,} papers  serial       {serial.elapsed:6.2f}s  {size / serial.elapsed:>9,.0f} papers/s")
+
+            for workers in worker_counts:
+                # Pool start-up is paid once per process, not per call, so time it warm
+                get_pool(workers)
+                processor = ParallelDataProcessor(workers=workers)
+                # Measure the pool itself, whatever cutover an earlier --save recorded
+                processor.tuning['min_parallel_papers'] = 0
+                with Timer() as parallel:
+                    actual = processor.process_file(path)
+                pd.testing.assert_frame_equal(
+                    actual.drop(columns='days_since_published'),
+                    expected.drop(columns='days_since_published')
+                )
+                results[size][workers] = parallel.elapsed
+                print(f"{size:>8,} papers  {workers:>2} workers   {parallel.elapsed:6.2f}s  "
+                      f"{size / parallel.elapsed:>9,.0f} papers/s  {serial.elapsed / parallel.elapsed:4.1f}x")
+    shutdown_pool()
+
+    largest = results[sizes[-1]]
+    best_workers = min(worker_counts, key=lambda w: largest[w])
+    cutover = next((size for size in sizes if results[size][best_workers] < results[size]['serial']), None)
+    print(f"\nBest worker count: {best_workers}")
+    print(f"Parallel wins from: {f'{cutover:,} papers' if cutover else 'never (keep the standard processor)'}")
+
+    if args.save:
+        save_tuning(best_workers, cutover, sizes=sizes)
+        print("Saved processor tuning")
+
+
+if __name__ == "__main__":
+    main()
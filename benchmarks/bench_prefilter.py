@@ -0,0 +1,58 @@
+"""
+Snapshot scan with and without the raw-bytes prefilter, for a rare keyword and a category
+
+    python -m benchmarks.bench_prefilter --papers 200000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from benchmarks.common import Timer, make_raw_paper
+from src.paper_filter import PaperFilter
+
+
+def scan(path, paper_filter, prefilter):
+    matched = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if prefilter and not paper_filter.prefilter(line):
+                continue
+            if paper_filter.matches(json.loads(line)):
+                matched += 1
+    return matched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the raw-line prefilter')
+    parser.add_argument('--papers', type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot.json')
+        with open(path, 'w') as f:
+            for i in range(args.papers):
+                paper = make_raw_paper(rng, i)
+                if i % 1000 == 0:
+                    paper['abstract'] += ' Topological Superconductivity'
+                f.write(json.dumps(paper) + '\n')
+
+        filters = [
+            ('rare keyword', PaperFilter(keyword='topological superconductivity')),
+            ('category cs', PaperFilter(category='cs')),
+            ('category + year', PaperFilter(category='math.GT', year=2001)),
+        ]
+        for name, paper_filter in filters:
+            with Timer() as full:
+                expected = scan(path, paper_filter, prefilter=False)
+            with Timer() as fast:
+                actual = scan(path, paper_filter, prefilter=True)
+            assert actual == expected
+            print(f"{name:<16} {expected:>8,} matches  decode all {full.elapsed:6.2f}s  "
+                  f"prefilter {fast.elapsed:6.2f}s  {full.elapsed / fast.elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Repeated dashboard queries against the stub OpenSearch: one request per query vs _msearch vs the result cache
+
+    python -m benchmarks.bench_query_cache --papers 5000 --queries 300 --rounds 5
+"""
+import argparse
+import random
+
+import config
+from benchmarks.common import WORDS, Timer, make_papers
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.processor import DataProcessor
+from src.query_cache import QueryCache
+from src.storage import StorageManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the search result cache and batched multi-search')
+    parser.add_argument('--papers', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=300, help='Distinct queries on the dashboard')
+    parser.add_argument('--rounds', type=int, default=5, help='Times the dashboard is refreshed')
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    queries = [' '.join(rng.sample(WORDS, 2)) for _ in range(args.queries)]
+    df = DataProcessor().process_batch(make_papers(args.papers))
+
+    with StubOpenSearch() as stub:
+        config.OPENSEARCH_PORT = stub.port
+        storage = StorageManager(search_backend='opensearch')
+        storage.index_papers(df)
+
+        storage.query_cache = QueryCache(max_entries=0)
+        start = stub.state.search_requests
+        with Timer() as single:
+            for _ in range(args.rounds):
+                expected = [storage.search_papers(query) for query in queries]
+        single_requests = stub.state.search_requests - start
+
+        storage.query_cache = QueryCache(max_entries=0)
+        start = stub.state.search_requests
+        with Timer() as batched:
+            for _ in range(args.rounds):
+                assert storage.search_many(queries) == expected
+        batched_requests = stub.state.search_requests - start
+
+        storage.query_cache = QueryCache()
+        start = stub.state.search_requests
+        with Timer() as cached:
+            for _ in range(args.rounds):
+                assert storage.search_many(queries) == expected
+        cached_requests = stub.state.search_requests - start
+        stats = storage.cache_stats()
+
+        # A write drops every cached result
+        storage.index_papers(df.head(10))
+        assert storage.cache_stats()['entries'] == 0
+
+    total = args.queries * args.rounds
+    print(f"{total:,} searches ({args.queries} distinct x {args.rounds} rounds)")
+    print(f"one request per query  {single.elapsed:7.2f}s  {single_requests:>6,} requests")
+    print(f"_msearch per round     {batched.elapsed:7.2f}s  {batched_requests:>6,} requests  {single.elapsed / batched.elapsed:5.1f}x")
+    print(f"_msearch + cache       {cached.elapsed:7.2f}s  {cached_requests:>6,} requests  {single.elapsed / cached.elapsed:5.1f}x  "
+          f"(hit rate {stats['hit_rate']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
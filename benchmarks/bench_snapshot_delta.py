@@ -0,0 +1,110 @@
+"""
+Ingesting a new snapshot release on the stub OpenSearch: full reload vs --delta
+
+    python -m benchmarks.bench_snapshot_delta --papers 100000 --changed 0.01
+
+The second release updates, removes and adds `--changed` of the papers each.
+The full reload decodes, processes and indexes every paper of the new release
+into an empty index; the delta run starts from the old release already indexed
+and only sends what SnapshotDelta reports. Both indexes must end up identical.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+
+from opensearchpy import OpenSearch
+
+import config
+from benchmarks.common import SnapshotGenerator, Timer, write_snapshot
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.bulk_indexer import BulkIndexer, iter_documents
+from src.dataset_collector import DatasetCollector
+from src.index_profiles import IndexProfiles
+from src.processor import DataProcessor
+
+
+def next_release(path: str, changed: float, seed: int = 3) -> int:
+    """Rewrite the snapshot as the next release: `changed` of the papers each updated, removed and added"""
+    with open(path, encoding='utf-8') as f:
+        papers = [json.loads(line) for line in f]
+    rng = random.Random(seed)
+    count = max(1, int(len(papers) * changed))
+    picked = rng.sample(range(len(papers)), 2 * count)
+    removed = set(picked[:count])
+    for i in picked[count:]:
+        papers[i]['update_date'] = '2026-10-01'
+        papers[i]['title'] = 'Revised: ' + papers[i]['title']
+    papers = [paper for i, paper in enumerate(papers) if i not in removed]
+    for i, line in enumerate(SnapshotGenerator(seed=seed).lines(count)):
+        paper = json.loads(line)
+        paper['id'] = f"2610.{i:05d}"
+        papers.append(paper)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(paper) + '\n' for paper in papers)
+    return len(papers)
+
+
+def connect(stub) -> OpenSearch:
+    client = OpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}], pool_maxsize=config.BULK_THREADS)
+    IndexProfiles(client).ensure()
+    return client
+
+
+def full_load(collector: DatasetCollector, client, papers: int) -> dict:
+    df = DataProcessor().process_batch(collector.collect_from_dataset(limit=papers))
+    return BulkIndexer(client).index_documents(iter_documents(df))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark a full snapshot reload against a delta run')
+    parser.add_argument('--papers', type=int, default=100000)
+    parser.add_argument('--changed', type=float, default=0.01, help='Share of papers updated, and again removed and added, in the new release')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DATA_DIR = tmp
+        os.makedirs(os.path.join(tmp, 'kaggle_arxiv'))
+        collector = DatasetCollector()
+        write_snapshot(collector.metadata_file, args.papers)
+
+        with StubOpenSearch() as before, StubOpenSearch() as after:
+            # Old release indexed and recorded as the baseline, as a previous delta run would leave it
+            delta_client = connect(before)
+            full_load(collector, delta_client, args.papers)
+            delta = collector.snapshot_delta()
+            delta.manifest_file = os.path.join(tmp, 'snapshot_manifest.tsv')
+            delta.changes()
+            delta.commit()
+
+            papers = next_release(collector.metadata_file, args.changed)
+
+            with Timer() as full:
+                reloaded = full_load(collector, connect(after), papers)
+            assert reloaded['success'] == papers
+
+            with Timer() as incremental:
+                with Timer() as diff:
+                    changes = delta.changes()
+                df = DataProcessor().process_batch(collector.collect_changes(changes))
+                indexer = BulkIndexer(delta_client)
+                upserted = indexer.index_documents(iter_documents(df))
+                deleted = indexer.delete_documents(changes.removed)
+                delta.commit()
+            assert upserted['failed'] == 0 and deleted['failed'] == 0
+
+            expected = after.state.get(config.OPENSEARCH_INDEX)['docs']
+            actual = before.state.get(config.OPENSEARCH_INDEX)['docs']
+            assert actual.keys() == expected.keys()
+            assert all(actual[arxiv_id]['title'] == doc['title'] for arxiv_id, doc in expected.items())
+
+    print(f"{papers:,} papers in the new release: {changes.summary()}")
+    print(f"full reload  {full.elapsed:6.2f}s  ({papers:,} papers indexed)")
+    print(f"delta        {incremental.elapsed:6.2f}s  ({len(df):,} upserted, {len(changes.removed):,} deleted; "
+          f"fingerprint diff {diff.elapsed:.2f}s)")
+    print(f"speedup      {full.elapsed / incremental.elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Pipeline storage step against stub S3 and OpenSearch: sequential StorageManager vs AsyncStorageManager.store
+
+    python -m benchmarks.bench_storage_stage --papers 20000 --bandwidth-mb 20
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import tempfile
+
+import config
+from benchmarks.common import Timer, make_papers
+from benchmarks.stub_opensearch import StubOpenSearch
+from benchmarks.stub_s3 import StubS3
+from src.async_storage import AsyncStorageManager
+from src.processor import DataProcessor
+from src.storage import StorageManager, get_s3_client, get_shipper
+
+
+async def store(df, path, key):
+    async with AsyncStorageManager(search_backend='opensearch') as storage:
+        return await storage.store(df, [(path, key)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sequential vs concurrent storage step')
+    parser.add_argument('--papers', type=int, default=20000)
+    parser.add_argument('--bandwidth-mb', type=float, default=20.0, help='Simulated S3 upload bandwidth (MB/s)')
+    args = parser.parse_args()
+
+    processor = DataProcessor()
+    df = processor.process_batch(make_papers(args.papers))
+
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'stub')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'stub')
+    with tempfile.TemporaryDirectory() as tmp, StubS3(bandwidth=args.bandwidth_mb * 1024 * 1024) as s3:
+        path = os.path.join(tmp, 'processed.ndjson')
+        df.to_json(path, orient='records', lines=True, date_format='iso')
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        config.S3_ENDPOINT_URL = s3.endpoint_url
+        get_s3_client.cache_clear()
+        get_shipper.cache_clear()
+
+        with StubOpenSearch() as stub:
+            config.OPENSEARCH_PORT = stub.port
+            storage = StorageManager(search_backend='opensearch')
+            with Timer() as upload:
+                assert storage.upload_to_s3(path, 'processed/sequential.ndjson')
+            with Timer() as index:
+                storage.index_papers(df)
+            with Timer() as statistics:
+                expected = storage.get_statistics()
+            sequential = upload.elapsed + index.elapsed + statistics.elapsed
+
+        with StubOpenSearch() as stub:
+            config.OPENSEARCH_PORT = stub.port
+            with Timer() as concurrent:
+                result = asyncio.run(store(df, path, 'processed/async.ndjson'))
+            assert result['artifacts'][0]['status'] == 'uploaded' and result['index']['success'] == len(df)
+            assert result['statistics'] == expected
+            assert len(stub.state.get(config.OPENSEARCH_INDEX)['docs']) == len(df)
+
+        key = result['artifacts'][0]['key']
+        uploaded = s3.state.objects[(config.S3_BUCKET, key)]['data']
+        with open(path, 'rb') as f:
+            assert (gzip.decompress(uploaded) if key.endswith('.gz') else uploaded) == f.read()
+
+    print(f"{args.papers:,} papers, {size_mb:.1f} MB file, S3 at {args.bandwidth_mb:g} MB/s")
+    print(f"sequential  upload {upload.elapsed:5.2f}s + index {index.elapsed:5.2f}s + stats {statistics.elapsed:5.2f}s "
+          f"= {sequential:5.2f}s")
+    print(f"concurrent  {concurrent.elapsed:5.2f}s ({sequential / concurrent.elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
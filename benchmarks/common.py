@@ -0,0 +1,217 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import itertools
+import math
+import random
+import time
+from datetime import date
+from typing import Dict, Iterator, List
+
+from src.codec import dumps
+from src.dataset_collector import DatasetCollector
+
+WORDS = (
+    "neural network model transformer learning graph quantum field theory data deep "
+    "analysis method results propose approach training optimization spectral manifold "
+    "robust sparse bayesian inference convergence lattice entropy gauge stochastic"
+).split()
+CATEGORIES = ['cs.LG', 'cs.CV', 'cs.AI', 'cs.CL', 'math.GT', 'math.PR', 'hep-th', 'astro-ph.CO', 'stat.ML', 'cond-mat.str-el']
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def make_raw_paper(rng: random.Random, i: int) -> Dict:
+    """One record shaped like a line of arxiv-metadata-oai-snapshot.json"""
+    year = rng.randint(1995, 2024)
+    versions = [
+        {
+            'version': f'v{v + 1}',
+            'created': f"{rng.choice(DAYS)}, {rng.randint(1, 28)} {rng.choice(MONTHS)} {year} "
+                       f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} GMT"
+        }
+        for v in range(rng.randint(1, 3))
+    ]
+    return {
+        'id': f"{year % 100:02d}{rng.randint(1, 12):02d}.{i:05d}",
+        'submitter': 'Jane Doe',
+        'authors': 'A. One, B. Two and C. Three',
+        'title': ' '.join(rng.choices(WORDS, k=9)),
+        'comments': '12 pages, 3 figures',
+        'journal-ref': None,
+        'doi': None,
+        'categories': ' '.join(rng.sample(CATEGORIES, rng.randint(1, 3))),
+        'abstract': ' '.join(rng.choices(WORDS, k=150)),
+        'versions': versions,
+        'update_date': f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        'authors_parsed': [['One', 'A.', ''], ['Two', 'B.', 'MIT'], ['Three', 'C.', '']]
+    }
+
+
+def make_papers(n: int, seed: int = 42) -> List[Dict]:
+    """Papers in the collector's transformed format"""
+    rng = random.Random(seed)
+    return [DatasetCollector._transform_paper(make_raw_paper(rng, i)) for i in range(n)]
+
+
+# Primary archive -> (share of submissions, subcategories); roughly the arXiv mix of recent years
+ARCHIVES = {
+    'cs': (0.30, ['LG', 'CV', 'CL', 'AI', 'RO', 'CR', 'DS', 'IT', 'SE', 'NI', 'DC', 'HC']),
+    'math': (0.20, ['AP', 'CO', 'PR', 'NT', 'AG', 'OC', 'DG', 'FA', 'GT', 'ST', 'NA', 'RT']),
+    'cond-mat': (0.10, ['str-el', 'mes-hall', 'mtrl-sci', 'stat-mech', 'supr-con', 'soft', 'quant-gas']),
+    'astro-ph': (0.08, ['CO', 'GA', 'SR', 'HE', 'EP', 'IM']),
+    'physics': (0.07, ['optics', 'flu-dyn', 'comp-ph', 'atom-ph', 'soc-ph', 'plasm-ph', 'ins-det']),
+    'hep-th': (0.03, []),
+    'hep-ph': (0.03, []),
+    'hep-ex': (0.01, []),
+    'hep-lat': (0.01, []),
+    'quant-ph': (0.05, []),
+    'stat': (0.04, ['ML', 'ME', 'AP', 'CO', 'TH']),
+    'eess': (0.03, ['SP', 'IV', 'SY', 'AS']),
+    'gr-qc': (0.02, []),
+    'q-bio': (0.01, ['NC', 'QM', 'PE', 'BM']),
+    'nucl-th': (0.01, []),
+    'math-ph': (0.005, []),
+    'nlin': (0.003, ['CD', 'PS', 'SI']),
+    'q-fin': (0.001, ['ST', 'MF', 'CP']),
+    'econ': (0.001, ['EM', 'GN', 'TH']),
+}
+FIRST_NAMES = ['A.', 'B.', 'C.', 'D.', 'J.', 'M.', 'S.', 'Y.', 'Wei', 'Maria', 'John', 'Hiroshi', 'Anna', 'Pierre', 'Li', 'R. K.', 'J. -P.']
+LAST_NAMES = ['Smith', 'Wang', 'Zhang', 'Li', 'Müller', 'Kim', 'Nguyen', 'García', 'Rossi', 'Tanaka', 'Ivanov',
+              'Chen', 'Dubois', 'Kowalski', 'Silva', 'Cohen', 'Gupta', 'Olsen', 'Novak', "O'Brien", 'Schrödinger']
+AFFILIATIONS = ['MIT', 'Stanford University', 'CERN', 'University of Tokyo', 'Max Planck Institute for Physics',
+                'Tsinghua University', 'ETH Zurich', 'Caltech', 'University of Oxford', 'IHES']
+LICENSES = [None, None, 'http://arxiv.org/licenses/nonexclusive-distrib/1.0/', 'http://creativecommons.org/licenses/by/4.0/']
+FIRST_YEAR, LAST_YEAR = 1991, 2024
+
+
+class SnapshotGenerator:
+    """Seeded source of lines shaped like arxiv-metadata-oai-snapshot.json
+
+    Covers every field of the real dump (including report-no and license),
+    the archive/subcategory mix with cross-lists, old-style (hep-th/9901001)
+    and new-style (YYMM.NNNNN) ids, RFC-2822 version dates in order,
+    authors_parsed entries with suffixes, affiliations and collaborations,
+    a Zipf-distributed vocabulary and submissions growing year over year.
+    The same seed always gives the same lines.
+    """
+
+    def __init__(self, seed: int = 42, vocabulary: int = 5000):
+        self.rng = random.Random(seed)
+        syllables = ['ka', 'lo', 'mi', 'ne', 'ra', 'to', 'qu', 'an', 'el', 'is', 'on', 'ur', 'ph', 'st', 'ex', 'gr']
+        words = list(WORDS)
+        for length in itertools.count(2):
+            for parts in itertools.product(syllables, repeat=length):
+                words.append(''.join(parts))
+                if len(words) >= vocabulary:
+                    break
+            if len(words) >= vocabulary:
+                break
+        self.words = words[:vocabulary]
+        self.word_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.words) + 1)))
+        self.archives = list(ARCHIVES)
+        self.archive_weights = list(itertools.accumulate(share for share, _ in ARCHIVES.values()))
+        self.years = list(range(FIRST_YEAR, LAST_YEAR + 1))
+        self.year_weights = list(itertools.accumulate(math.exp(0.12 * (year - FIRST_YEAR)) for year in self.years))
+        self.serials = {}
+
+    def _text(self, count: int) -> str:
+        return ' '.join(self.rng.choices(self.words, cum_weights=self.word_weights, k=count))
+
+    def _category(self) -> str:
+        archive = self.rng.choices(self.archives, cum_weights=self.archive_weights)[0]
+        subcategories = ARCHIVES[archive][1]
+        return f"{archive}.{self.rng.choice(subcategories)}" if subcategories else archive
+
+    def _id(self, archive: str, year: int, month: int) -> str:
+        # Old-style ids are numbered per archive, new-style ones per month across arXiv
+        key = (archive if year < 2007 else '', year, month)
+        self.serials[key] = serial = self.serials.get(key, 0) + 1
+        if year < 2007:
+            return f"{archive}/{year % 100:02d}{month:02d}{serial:03d}"
+        return f"{year % 100:02d}{month:02d}.{serial:0{4 if year < 2015 else 5}d}"
+
+    def _date(self, year: int, month: int, day: int) -> str:
+        return (f"{DAYS[date(year, month, day).weekday()]}, {day} {MONTHS[month - 1]} {year} "
+                f"{self.rng.randint(0, 23):02d}:{self.rng.randint(0, 59):02d}:{self.rng.randint(0, 59):02d} GMT")
+
+    def _author(self) -> List[str]:
+        roll = self.rng.random()
+        if roll < 0.01:
+            return [f"{self.rng.choice(['ATLAS', 'CMS', 'LIGO Scientific', 'Planck'])} Collaboration", '', '']
+        entry = [self.rng.choice(LAST_NAMES), self.rng.choice(FIRST_NAMES), 'Jr' if roll < 0.02 else '']
+        if roll > 0.85:
+            entry.append(self.rng.choice(AFFILIATIONS))
+        return entry
+
+    def paper(self) -> Dict:
+        rng = self.rng
+        year = rng.choices(self.years, cum_weights=self.year_weights)[0]
+        month = rng.randint(1, 12)
+        day = rng.randint(1, 28)
+
+        primary = self._category()
+        categories = [primary]
+        for _ in range(rng.choices([0, 1, 2, 3], weights=[50, 30, 15, 5])[0]):
+            category = self._category()
+            if category not in categories:
+                categories.append(category)
+
+        versions = []
+        created = (year, month, day)
+        for v in range(rng.choices([1, 2, 3, 4, 5], weights=[55, 28, 10, 5, 2])[0]):
+            if v:
+                # Later versions follow within a few months
+                months = min(created[0] * 12 + created[1] - 1 + rng.randint(0, 4), LAST_YEAR * 12 + 11)
+                created = max(created, (months // 12, months % 12 + 1, rng.randint(1, 28)))
+            versions.append({'version': f'v{v + 1}', 'created': self._date(*created)})
+        last = created
+
+        # Median around three authors; a few large collaborations with hundreds
+        author_count = max(1, round(rng.lognormvariate(1.0, 0.7))) if rng.random() > 0.003 else rng.randint(100, 3000)
+        authors_parsed = [self._author() for _ in range(author_count)]
+        names = [' '.join(part for part in (entry[1], entry[0]) if part) for entry in authors_parsed]
+        authors = names[0] if len(names) == 1 else ', '.join(names[:-1]) + ' and ' + names[-1]
+
+        # Real titles and abstracts carry hard line breaks and a leading indent
+        title = self._text(rng.randint(4, 18))
+        title = title.replace(' ', '\n  ', 1) if rng.random() < 0.3 else title
+        abstract = '  ' + '\n'.join(self._text(rng.randint(8, 14)) for _ in range(rng.randint(4, 20))) + '\n'
+
+        return {
+            'id': self._id(primary.split('.')[0], year, month),
+            'submitter': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'authors': authors,
+            'title': title[:1].upper() + title[1:],
+            'comments': f"{rng.randint(4, 60)} pages, {rng.randint(0, 12)} figures" if rng.random() < 0.7 else None,
+            'journal-ref': f"Phys. Rev. D {rng.randint(1, 110)}, {rng.randint(1, 99999):05d} ({year})" if rng.random() < 0.3 else None,
+            'doi': f"10.{rng.randint(1000, 9999)}/{self._text(1)}.{rng.randint(1, 999999)}" if rng.random() < 0.4 else None,
+            'report-no': f"CERN-TH-{year}-{rng.randint(1, 300):03d}" if rng.random() < 0.05 else None,
+            'categories': ' '.join(categories),
+            'license': rng.choice(LICENSES),
+            'abstract': abstract,
+            'versions': versions,
+            'update_date': f"{last[0]}-{last[1]:02d}-{last[2]:02d}",
+            'authors_parsed': authors_parsed
+        }
+
+    def lines(self, count: int) -> Iterator[str]:
+        for _ in range(count):
+            yield dumps(self.paper()) + '\n'
+
+
+def write_snapshot(path: str, papers: int, seed: int = 42) -> int:
+    """Write a synthetic snapshot of `papers` lines; streamed, so millions of lines fit in constant memory"""
+    generator = SnapshotGenerator(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(generator.lines(papers))
+    return papers
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,211 @@
+"""
+End-to-end stage benchmarks on a generated snapshot, saved as JSON and compared with a baseline run
+
+    python -m benchmarks.run_benchmarks --papers 10000
+    python -m benchmarks.run_benchmarks --papers 1000000 --repeat 3 --workspace /tmp/arxiv-bench --baseline benchmarks/results/base.json
+
+Stages: full scan and indexed collect (collect_from_dataset), save_raw_data,
+process_papers with every processor (outputs must match the standard one),
+save_processed_data, and index_papers into a stub OpenSearch and the local
+search index. Each stage is measured by PipelineMonitor.stage(). With
+--baseline, a stage whose throughput drops more than --threshold below the
+baseline exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+import config
+from benchmarks.common import Timer, write_snapshot
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.collector import ArxivCollector
+from src.monitor import PipelineMonitor
+from src.processor import DataProcessor
+from src.parallel_scan import shutdown_pool
+from src.processor_parallel import DataProcessor as ParallelDataProcessor
+from src.processor_vectorized import DataProcessor as VectorizedDataProcessor
+from src.storage import StorageManager
+
+PROCESSORS = {
+    'standard': DataProcessor,
+    'vectorized': VectorizedDataProcessor,
+    'parallel': ParallelDataProcessor
+}
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def prepare_workspace(workspace: str, papers: int, seed: int) -> float:
+    """Generate the snapshot under workspace/data unless one with the same size and seed is there"""
+    dataset_dir = os.path.join(workspace, config.DATA_DIR, 'kaggle_arxiv')
+    os.makedirs(dataset_dir, exist_ok=True)
+    snapshot = os.path.join(dataset_dir, 'arxiv-metadata-oai-snapshot.json')
+    marker = os.path.join(dataset_dir, 'synthetic.json')
+
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f) == {'papers': papers, 'seed': seed}:
+                return 0.0
+
+    print(f"Generating {papers:,} papers (seed {seed})...")
+    with Timer() as generate:
+        write_snapshot(snapshot, papers, seed)
+    with open(marker, 'w') as f:
+        json.dump({'papers': papers, 'seed': seed}, f)
+    return generate.elapsed
+
+
+def run_stages(papers: int, processors) -> dict:
+    monitor = PipelineMonitor()
+    monitor.start_monitoring('benchmark')
+    collector = ArxivCollector(use_dataset=True)
+    dataset = collector.dataset_collector
+
+    with monitor.stage('collect_scan') as stage:
+        collected = dataset.collect_from_dataset(limit=papers, use_index=False)
+        stage['items'] = len(collected)
+    with monitor.stage('index_build', items=papers):
+        dataset.index.build()
+    with monitor.stage('collect_indexed') as stage:
+        stage['items'] = len(dataset.collect_from_dataset(category='cs', limit=papers, use_index=True))
+
+    with monitor.stage('save_raw', items=len(collected)):
+        raw_file = collector.save_raw_data(collected, 'benchmark')
+
+    expected = None
+    for name in processors:
+        processor = PROCESSORS[name]()
+        with monitor.stage(f'process_{name}') as stage:
+            df = processor.process_papers(raw_file)
+            stage['items'] = len(df)
+        if expected is None:
+            expected = df
+        else:
+            # days_since_published uses now(), which may tick over a day boundary between runs
+            pd.testing.assert_frame_equal(df.drop(columns='days_since_published'), expected.drop(columns='days_since_published'))
+    shutdown_pool()
+
+    with monitor.stage('save_processed', items=len(expected)):
+        processed_file = DataProcessor().save_processed_data(expected, 'benchmark')
+    # Keep a reused workspace from filling up with outputs
+    os.remove(raw_file)
+    os.remove(processed_file)
+
+    with StubOpenSearch() as stub:
+        config.OPENSEARCH_PORT = stub.port
+        storage = StorageManager(search_backend='opensearch')
+        with monitor.stage('index_opensearch', items=len(expected)):
+            result = storage.index_papers(expected)
+        assert result['success'] == len(expected)
+        assert len(stub.state.get(config.OPENSEARCH_INDEX)['docs']) == len(expected)
+
+    storage = StorageManager(search_backend='local')
+    storage.local_index.clear()
+    with monitor.stage('index_local', items=len(expected)):
+        storage.index_papers(expected)
+    assert storage.local_index.count() == len(expected)
+
+    return monitor.stages
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print throughput against the baseline; returns the regressed stage names"""
+    if (baseline['papers'], baseline['seed']) != (results['papers'], results['seed']):
+        print(f"\nBaseline used {baseline['papers']:,} papers / seed {baseline['seed']}; not comparable")
+        return []
+
+    regressions = []
+    print(f"\nAgainst baseline {baseline.get('commit') or ''} ({baseline['created']}), threshold {threshold:.0%}:")
+    for name, stage in results['stages'].items():
+        before = baseline['stages'].get(name)
+        if not before or not before['items_per_sec']:
+            continue
+        ratio = stage['items_per_sec'] / before['items_per_sec']
+        regressed = ratio < 1 - threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<18}{before['items_per_sec']:>12,.0f} -> {stage['items_per_sec']:>12,.0f} papers/s  "
+              f"{ratio:5.2f}x{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the stage benchmarks on a synthetic snapshot')
+    parser.add_argument('--papers', type=int, default=10000, help='Snapshot lines to generate (10k to 5M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--processors', nargs='+', choices=list(PROCESSORS), default=list(PROCESSORS),
+                        help='Processors to run; the first one is the reference output')
+    parser.add_argument('--workspace', help='Directory for the snapshot and outputs, reused across runs (default: a temporary one)')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<papers>_<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed throughput drop per stage before failing')
+    parser.add_argument('--repeat', type=int, default=1, help='Run the stages this many times and keep the fastest of each')
+    args = parser.parse_args()
+
+    created = datetime.now()
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, f"{args.papers}_{created.strftime('%Y%m%d_%H%M%S')}.json"))
+    baseline_file = os.path.abspath(args.baseline) if args.baseline else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = os.path.abspath(args.workspace or tmp)
+        generated = prepare_workspace(workspace, args.papers, args.seed)
+        snapshot_mb = os.path.getsize(os.path.join(workspace, config.DATA_DIR, 'kaggle_arxiv', 'arxiv-metadata-oai-snapshot.json')) / 1024 / 1024
+
+        # Every data/ path in config is relative, so the whole run stays inside the workspace
+        cwd = os.getcwd()
+        os.chdir(workspace)
+        try:
+            stages = {}
+            for _ in range(args.repeat):
+                for name, stage in run_stages(args.papers, args.processors).items():
+                    if name not in stages or stage['wall_seconds'] < stages[name]['wall_seconds']:
+                        stages[name] = stage
+        finally:
+            os.chdir(cwd)
+
+    results = {
+        'created': created.strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'papers': args.papers,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'snapshot_mb': round(snapshot_mb, 1),
+        'generate_seconds': round(generated, 2),
+        'stages': stages
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print(f"\n{args.papers:,} papers, {snapshot_mb:.0f} MB snapshot")
+    for name, stage in stages.items():
+        print(f"  {name:<18}{stage['wall_seconds']:>8.2f}s  {stage['items_per_sec']:>12,.0f} papers/s  "
+              f"peak {stage['peak_rss_mb']:,.0f} MB")
+    print(f"Results saved to {output}")
+
+    if baseline_file:
+        with open(baseline_file) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"Slower than baseline: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+"""
+Minimal in-process OpenSearch stand-in for offline benchmarks
+
+Implements just enough of the REST API for StorageManager, BulkIndexer and
+IndexProfiles: index create/exists/delete, aliases, _mapping, _settings,
+_refresh, _bulk, _reindex, _count, _stats and _search/_msearch with a naive
+any-term multi_match (no aggregation buckets). Documents carry a version
+(external versions on _reindex) and `index.blocks.write` rejects writes.
+_bulk can throttle items at random (`throttle_ratio`) or whole requests
+(`state.reject_bulk`) with 429s.
+
+Mappings behave like the real thing where it matters for sizing: unmapped
+fields are added dynamically (strings as text plus a keyword subfield), or
+rejected when the mapping is `dynamic: strict`. _stats reports an estimated
+store size: each document's _source compressed per the index codec, plus the
+inverted index and doc values its mapped fields would build.
+"""
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+
+# Values dynamic mapping detects as dates (strict_date_optional_time)
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$')
+# Fixed-width points and doc values per numeric, date or boolean value
+NUMERIC_BYTES = 8
+
+
+def infer_mapping(value) -> Optional[dict]:
+    """Dynamic mapping for a field first seen with `value` (None when it cannot be inferred yet)"""
+    if isinstance(value, list):
+        return next((mapping for mapping in map(infer_mapping, value) if mapping is not None), None)
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return {'type': 'boolean'}
+    if isinstance(value, int):
+        return {'type': 'long'}
+    if isinstance(value, float):
+        return {'type': 'float'}
+    if isinstance(value, dict):
+        return {'properties': {
+            key: mapping for key, mapping in ((key, infer_mapping(item)) for key, item in value.items()) if mapping
+        }}
+    if DATE_PATTERN.match(str(value)):
+        return {'type': 'date'}
+    return {'type': 'text', 'fields': {'keyword': {'type': 'keyword', 'ignore_above': 256}}}
+
+
+def merge_mapping(mapping: dict, doc: dict, strict: bool) -> Optional[str]:
+    """Map the new fields of `doc` into `mapping`; under strict, returns the first unmapped field instead"""
+    strict = strict or mapping.get('dynamic') == 'strict'
+    properties = mapping.setdefault('properties', {})
+    for key, value in doc.items():
+        if key not in properties:
+            if strict:
+                return key
+            inferred = infer_mapping(value)
+            if inferred is not None:
+                properties[key] = inferred
+            continue
+        field = properties[key]
+        if field.get('type', 'object') != 'object' or not field.get('enabled', True):
+            continue
+        for item in (value if isinstance(value, list) else [value]):
+            if isinstance(item, dict):
+                missing = merge_mapping(field, item, strict)
+                if missing:
+                    return f"{key}.{missing}"
+    return None
+
+
+def field_bytes(mapping: dict, value) -> int:
+    """Bytes `value` adds to the inverted index and doc values under `mapping`"""
+    if value is None:
+        return 0
+    if isinstance(value, list):
+        return sum(field_bytes(mapping, item) for item in value)
+    kind = mapping.get('type', 'object')
+    if kind == 'object':
+        if not mapping.get('enabled', True) or not isinstance(value, dict):
+            return 0
+        properties = mapping.get('properties', {})
+        return sum(field_bytes(properties.get(key, {'enabled': False}), item) for key, item in value.items())
+
+    size = len(str(value).encode('utf-8')) if kind in ('text', 'keyword') else NUMERIC_BYTES
+    if kind == 'keyword' and size > mapping.get('ignore_above', size):
+        size = 0
+    total = 0
+    if mapping.get('index', True):
+        # Text keeps positions for phrase queries on top of the postings
+        total += size * 2 if kind == 'text' else size
+    if mapping.get('doc_values', kind != 'text'):
+        total += size
+    return total + sum(field_bytes(sub, value) for sub in mapping.get('fields', {}).values())
+
+
+class StubState:
+    def __init__(self, throttle_ratio: float = 0.0, seed: int = 0, analysis_rate: float = 0.0):
+        self.lock = threading.Lock()
+        self.indices = {}
+        self.aliases = {}
+        self.throttle_ratio = throttle_ratio
+        # Bytes of index structures built per second by _bulk (0: free)
+        self.analysis_rate = analysis_rate
+        self.rng = random.Random(seed)
+        self.bulk_requests = 0
+        self.bulk_bytes = 0
+        self.bulk_sizes = []
+        self.throttled = 0
+        # The next this many _bulk requests are rejected whole with a 429
+        self.reject_bulk = 0
+        self.search_requests = 0
+
+    def resolve(self, name: str) -> str:
+        return self.aliases.get(name, name)
+
+    def get(self, name: str) -> Optional[dict]:
+        """The index `name` refers to, directly or through an alias"""
+        return self.indices.get(self.resolve(name))
+
+    def index(self, name: str) -> dict:
+        return self.indices.setdefault(self.resolve(name), {
+            'docs': {},
+            'sizes': {},
+            'versions': {},
+            'settings': {'index': {'refresh_interval': '1s', 'number_of_replicas': '1'}},
+            'mappings': {}
+        })
+
+    def put(self, index: dict, doc_id: str, source: dict, version: Optional[int] = None) -> Optional[dict]:
+        """Store a document, growing the mapping; returns the item error when the mapping rejects it
+
+        The version goes up by one per write unless an external `version` is given.
+        """
+        missing = merge_mapping(index['mappings'], source, strict=False)
+        if missing:
+            return {'type': 'strict_dynamic_mapping_exception',
+                    'reason': f"mapping set to strict, dynamic introduction of [{missing}] within [_doc] is not allowed"}
+        level = 6 if index['settings']['index'].get('codec') == 'best_compression' else 1
+        stored = len(zlib.compress(json.dumps(source).encode('utf-8'), level))
+        index['docs'][doc_id] = source
+        index['sizes'][doc_id] = (stored, field_bytes(index['mappings'], source))
+        index['versions'][doc_id] = version if version is not None else index['versions'].get(doc_id, 0) + 1
+        return None
+
+    @staticmethod
+    def write_blocked(index: dict) -> bool:
+        return str(index['settings']['index'].get('blocks.write', False)).lower() == 'true'
+
+    def store_size(self, index: dict) -> int:
+        return sum(stored + indexed for stored, indexed in index['sizes'].values())
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _reply(self, status: int, payload=None):
+        data = json.dumps(payload if payload is not None else {}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def _parts(self):
+        return [p for p in urlparse(self.path).path.split('/') if p]
+
+    def do_HEAD(self):
+        parts = self._parts()
+        exists = len(parts) == 1 and self.state.get(parts[0]) is not None
+        self._reply(200 if exists else 404)
+
+    def do_GET(self):
+        parts = self._parts()
+        if not parts:
+            return self._reply(200, {'version': {'number': '2.11.0', 'distribution': 'opensearch'}})
+        if parts[0] == '_alias':
+            concrete = self.state.aliases.get(parts[1]) if len(parts) > 1 else None
+            if concrete is None:
+                return self._reply(404, {'error': f"alias [{parts[1:]}] missing", 'status': 404})
+            return self._reply(200, {concrete: {'aliases': {parts[1]: {}}}})
+        name = self.state.resolve(parts[0])
+        if name not in self.state.indices:
+            return self._reply(404, {'error': 'index_not_found_exception', 'status': 404})
+        index = self.state.indices[name]
+        if parts[1:] == ['_settings']:
+            return self._reply(200, {name: {'settings': index['settings']}})
+        if parts[1:] == ['_mapping']:
+            return self._reply(200, {name: {'mappings': index['mappings']}})
+        if parts[1:] == ['_count']:
+            return self._reply(200, {'count': len(index['docs'])})
+        if parts[1:] == ['_stats']:
+            with self.state.lock:
+                size = self.state.store_size(index)
+            return self._reply(200, {'indices': {name: {'total': {
+                'docs': {'count': len(index['docs'])}, 'store': {'size_in_bytes': size}
+            }}}})
+        if parts[1:] == ['_search']:
+            return self._search(name)
+        return self._reply(200, {name: {key: index[key] for key in ('settings', 'mappings')}})
+
+    def do_PUT(self):
+        parts = self._parts()
+        body = json.loads(self._body() or b'{}')
+        with self.state.lock:
+            if len(parts) == 1:
+                if self.state.get(parts[0]) is not None:
+                    return self._reply(400, {'error': 'resource_already_exists_exception', 'status': 400})
+                index = self.state.index(parts[0])
+                index['mappings'] = body.get('mappings', {})
+                index['settings']['index'].update(body.get('settings', {}).get('index', body.get('settings', {})))
+                for alias in body.get('aliases', {}):
+                    self.state.aliases[alias] = parts[0]
+                return self._reply(200, {'acknowledged': True, 'index': parts[0]})
+            if parts[1:] == ['_settings']:
+                self.state.index(parts[0])['settings']['index'].update(body.get('index', body))
+                return self._reply(200, {'acknowledged': True})
+        self._reply(400, {'error': 'unsupported'})
+
+    def do_DELETE(self):
+        parts = self._parts()
+        with self.state.lock:
+            if len(parts) != 1 or parts[0] not in self.state.indices:
+                return self._reply(404, {'error': 'index_not_found_exception', 'status': 404})
+            del self.state.indices[parts[0]]
+            self.state.aliases = {alias: name for alias, name in self.state.aliases.items() if name != parts[0]}
+        self._reply(200, {'acknowledged': True})
+
+    def do_POST(self):
+        parts = self._parts()
+        if parts and parts[-1] == '_bulk':
+            return self._bulk(parts[0] if len(parts) > 1 else None)
+        if parts == ['_aliases']:
+            return self._update_aliases()
+        if parts == ['_reindex']:
+            return self._reindex()
+        if parts[1:] == ['_refresh']:
+            return self._reply(200, {'_shards': {'total': 1, 'successful': 1, 'failed': 0}})
+        if parts[1:] == ['_search']:
+            return self._search(parts[0])
+        if parts and parts[-1] == '_msearch':
+            return self._msearch(parts[0] if len(parts) > 1 else None)
+        if parts[1:] == ['_count']:
+            return self._reply(200, {'count': len(self.state.index(parts[0])['docs'])})
+        self._reply(400, {'error': 'unsupported'})
+
+    def _update_aliases(self):
+        actions = json.loads(self._body() or b'{}').get('actions', [])
+        with self.state.lock:
+            # All actions apply together, as one cluster state update
+            aliases = dict(self.state.aliases)
+            indices = dict(self.state.indices)
+            for action in actions:
+                op, spec = next(iter(action.items()))
+                if op == 'add':
+                    aliases[spec['alias']] = spec['index']
+                elif op == 'remove':
+                    aliases.pop(spec['alias'], None)
+                elif op == 'remove_index':
+                    indices.pop(spec['index'], None)
+                    aliases = {alias: name for alias, name in aliases.items() if name != spec['index']}
+            clashes = set(aliases) & set(indices)
+            if clashes:
+                return self._reply(400, {'error': f"invalid_alias_name_exception: {sorted(clashes)}", 'status': 400})
+            self.state.aliases, self.state.indices = aliases, indices
+        self._reply(200, {'acknowledged': True})
+
+    def _reindex(self):
+        body = json.loads(self._body() or b'{}')
+        source = self.state.get(body['source']['index'])
+        if source is None:
+            return self._reply(404, {'error': 'index_not_found_exception', 'status': 404})
+        start = time.time()
+        created = updated = conflicts = 0
+        failures = []
+        with self.state.lock:
+            dest = self.state.index(body['dest']['index'])
+            create_only = body['dest'].get('op_type') == 'create'
+            external = body['dest'].get('version_type') == 'external'
+            for doc_id, doc in list(source['docs'].items()):
+                version = source['versions'][doc_id] if external else None
+                if (create_only and doc_id in dest['docs']) or (external and dest['versions'].get(doc_id, 0) >= version):
+                    conflicts += 1
+                    if body.get('conflicts') != 'proceed':
+                        failures.append({'id': doc_id, 'status': 409, 'cause': {'type': 'version_conflict_engine_exception'}})
+                        break
+                    continue
+                existed = doc_id in dest['docs']
+                error = self.state.put(dest, doc_id, doc, version)
+                if error:
+                    failures.append({'id': doc_id, 'status': 400, 'cause': error})
+                elif existed:
+                    updated += 1
+                else:
+                    created += 1
+        self._reply(200, {
+            'took': int((time.time() - start) * 1000),
+            'total': len(source['docs']),
+            'created': created,
+            'updated': updated,
+            'version_conflicts': conflicts,
+            'failures': failures
+        })
+
+    def _bulk(self, default_index):
+        raw = self._body()
+        lines = raw.splitlines()
+        items = []
+        with self.state.lock:
+            if self.state.reject_bulk:
+                self.state.reject_bulk -= 1
+                self.state.throttled += 1
+                return self._reply(429, {'error': {'type': 'es_rejected_execution_exception'}, 'status': 429})
+            self.state.bulk_requests += 1
+            self.state.bulk_bytes += len(raw)
+            self.state.bulk_sizes.append(len(raw))
+            indexed = 0
+            i = 0
+            while i < len(lines):
+                action = json.loads(lines[i])
+                op, meta = next(iter(action.items()))
+                index = self.state.index(meta.get('_index', default_index))
+                if self.state.write_blocked(index):
+                    items.append({op: {'_id': meta['_id'], 'status': 403, 'error': {
+                        'type': 'cluster_block_exception', 'reason': 'index [write] blocked by: [FORBIDDEN/8/index write (api)];'
+                    }}})
+                    i += 1 if op == 'delete' else 2
+                    continue
+                if op == 'delete':
+                    found = index['docs'].pop(meta['_id'], None) is not None
+                    index['sizes'].pop(meta['_id'], None)
+                    index['versions'].pop(meta['_id'], None)
+                    items.append({op: {'_id': meta['_id'], 'status': 200 if found else 404,
+                                       'result': 'deleted' if found else 'not_found'}})
+                    i += 1
+                    continue
+                source = json.loads(lines[i + 1])
+                i += 2
+                if self.state.rng.random() < self.state.throttle_ratio:
+                    self.state.throttled += 1
+                    items.append({op: {'_id': meta['_id'], 'status': 429, 'error': {'type': 'es_rejected_execution_exception'}}})
+                    continue
+                if op == 'update':
+                    source = {**index['docs'].get(meta['_id'], {}), **source.get('doc', {})}
+                error = self.state.put(index, meta['_id'], source)
+                if error:
+                    items.append({op: {'_id': meta['_id'], 'status': 400, 'error': error}})
+                    continue
+                indexed += index['sizes'][meta['_id']][1]
+                items.append({op: {'_id': meta['_id'], 'status': 201}})
+        if self.state.analysis_rate:
+            time.sleep(indexed / self.state.analysis_rate)
+        self._reply(200, {'took': 1, 'errors': any(it[next(iter(it))]['status'] >= 300 for it in items), 'items': items})
+
+    def _query(self, name, body: dict) -> dict:
+        docs = (self.state.get(name) or {}).get('docs', {})
+        hits = []
+        match = body.get('query', {}).get('multi_match')
+        if match:
+            terms = match['query'].lower().split()
+            for doc_id, doc in docs.items():
+                text = ' '.join(str(doc.get(field) or '') for field in match['fields']).lower()
+                if any(term in text for term in terms):
+                    hits.append({'_id': doc_id, '_score': 1.0, '_source': doc})
+                    if len(hits) >= body.get('size', 10):
+                        break
+        return {
+            'hits': {'total': {'value': len(docs)}, 'hits': hits},
+            'aggregations': {
+                'top_categories': {'buckets': []},
+                'recent_years': {'buckets': []}
+            }
+        }
+
+    def _search(self, name):
+        body = json.loads(self._body() or b'{}')
+        with self.state.lock:
+            self.state.search_requests += 1
+            response = self._query(name, body)
+        self._reply(200, response)
+
+    def _msearch(self, default_index):
+        lines = self._body().splitlines()
+        responses = []
+        with self.state.lock:
+            self.state.search_requests += 1
+            for header, body in zip(lines[::2], lines[1::2]):
+                name = json.loads(header).get('index', default_index)
+                responses.append(self._query(name, json.loads(body)))
+        self._reply(200, {'took': 1, 'responses': responses})
+
+
+class StubOpenSearch:
+    """Context manager running the stub on a free localhost port
+
+    `analysis_mb_per_sec` makes _bulk take time in proportion to the index
+    structures it builds, so leaner mappings index faster as they would on a real node.
+    """
+
+    def __init__(self, throttle_ratio: float = 0.0, analysis_mb_per_sec: float = 0.0):
+        self.state = StubState(throttle_ratio=throttle_ratio, analysis_rate=analysis_mb_per_sec * 1024 * 1024)
+        handler = type('Handler', (StubHandler,), {'state': self.state})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
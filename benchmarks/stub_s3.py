@@ -0,0 +1,151 @@
+"""
+Minimal in-process S3 stand-in for offline benchmarks (path-style addressing)
+
+Implements PutObject, HeadObject, GetObject and multipart uploads, keeping
+objects and their x-amz-meta-* metadata in memory. `bandwidth` (bytes/sec)
+throttles uploads to mimic a real link; writes to keys in `denied` get
+403 AccessDenied.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class S3State:
+    def __init__(self, bandwidth: float = 0.0):
+        self.lock = threading.Lock()
+        self.objects = {}
+        self.uploads = {}
+        self.bandwidth = bandwidth
+        self.requests = 0
+        self.bytes_received = 0
+        self.denied = set()
+
+
+class S3Handler(BaseHTTPRequestHandler):
+    state: S3State = None
+    # One connection per request: with keep-alive, a PUT's 100-continue handshake on a reused
+    # connection sometimes stalls until botocore's 60s read timeout when the stub is busy
+    protocol_version = 'HTTP/1.0'
+
+    def log_message(self, *args):
+        pass
+
+    def _target(self):
+        url = urlparse(self.path)
+        bucket, _, key = unquote(url.path).lstrip('/').partition('/')
+        return bucket, key, {name: values[0] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(length) if length else b''
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.bytes_received += len(data)
+        if self.state.bandwidth and data:
+            time.sleep(len(data) / self.state.bandwidth)
+        return data
+
+    def _reply(self, status: int, body: bytes = b'', headers: dict = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _metadata(self) -> dict:
+        return {name.lower(): value for name, value in self.headers.items() if name.lower().startswith('x-amz-meta-')}
+
+    def _deny(self, key: str) -> bool:
+        if key not in self.state.denied:
+            return False
+        self._reply(403, b'<Error><Code>AccessDenied</Code><Message>Access Denied</Message></Error>')
+        return True
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        data = self._body()
+        if self._deny(key):
+            return
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self.state.lock:
+            if 'uploadId' in query:
+                self.state.uploads[query['uploadId']]['parts'][int(query['partNumber'])] = data
+            else:
+                self.state.objects[(bucket, key)] = {'data': data, 'metadata': self._metadata(), 'etag': etag}
+        self._reply(200, headers={'ETag': etag})
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        self._body()
+        if self._deny(key):
+            return
+        with self.state.lock:
+            if 'uploads' in query:
+                upload_id = uuid.uuid4().hex
+                self.state.uploads[upload_id] = {'parts': {}, 'metadata': self._metadata()}
+                xml = (f'<InitiateMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>'
+                       f'<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>')
+                return self._reply(200, xml.encode('utf-8'))
+            upload = self.state.uploads.pop(query['uploadId'])
+            data = b''.join(upload['parts'][number] for number in sorted(upload['parts']))
+            etag = f'"{hashlib.md5(data).hexdigest()}-{len(upload["parts"])}"'
+            self.state.objects[(bucket, key)] = {'data': data, 'metadata': upload['metadata'], 'etag': etag}
+        xml = (f'<CompleteMultipartUploadResult><Bucket>{bucket}</Bucket><Key>{key}</Key>'
+               f'<ETag>{etag}</ETag></CompleteMultipartUploadResult>')
+        self._reply(200, xml.encode('utf-8'))
+
+    def do_DELETE(self):
+        bucket, key, query = self._target()
+        with self.state.lock:
+            if 'uploadId' in query:
+                self.state.uploads.pop(query['uploadId'], None)
+            else:
+                self.state.objects.pop((bucket, key), None)
+        self._reply(204)
+
+    def _object(self):
+        bucket, key, _ = self._target()
+        with self.state.lock:
+            return self.state.objects.get((bucket, key))
+
+    def do_HEAD(self):
+        obj = self._object()
+        if obj is None:
+            return self._reply(404)
+        self.send_response(200)
+        self.send_header('ETag', obj['etag'])
+        self.send_header('Content-Length', str(len(obj['data'])))
+        for name, value in obj['metadata'].items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_GET(self):
+        obj = self._object()
+        if obj is None:
+            return self._reply(404, b'<Error><Code>NoSuchKey</Code></Error>')
+        self._reply(200, obj['data'], {'ETag': obj['etag'], **obj['metadata']})
+
+
+class StubS3:
+    """Context manager running the stub on a free localhost port; `endpoint_url` goes to boto3"""
+
+    def __init__(self, bandwidth: float = 0.0):
+        self.state = S3State(bandwidth=bandwidth)
+        handler = type('Handler', (S3Handler,), {'state': self.state})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.endpoint_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
@@ -9,10 +9,88 @@ DEFAULT_LIMIT = 1000
 
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
 S3_BUCKET = os.getenv("S3_BUCKET", "chloe-arxiv-data")
+# Custom S3 endpoint (MinIO, LocalStack, a local stub); unset for AWS
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+# Artifact uploads: uncompressed outputs are compressed on the way ("gzip", "zstd", or "none"),
+# files above the part size go up as parallel multipart uploads
+ARTIFACT_COMPRESSION = os.getenv("ARTIFACT_COMPRESSION", "gzip")
+ARTIFACT_COMPRESSION = None if ARTIFACT_COMPRESSION == "none" else ARTIFACT_COMPRESSION
+S3_PART_SIZE_MB = int(os.getenv("S3_PART_SIZE_MB", "16"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "8"))
+# Also ship the processed papers as a Parquet file
+SHIP_PARQUET = os.getenv("SHIP_PARQUET", "false").lower() == "true"
 
 OPENSEARCH_HOST = os.getenv("OPENSEARCH_HOST", "localhost")
 OPENSEARCH_PORT = int(os.getenv("OPENSEARCH_PORT", "9200"))
 OPENSEARCH_INDEX = "arxiv_papers"
 
+# Bulk indexing: worker threads share one pooled connection
+BULK_THREADS = int(os.getenv("BULK_THREADS", "4"))
+BULK_MAX_CHUNK_BYTES = int(os.getenv("BULK_MAX_CHUNK_BYTES", str(5 * 1024 * 1024)))
+BULK_MAX_CHUNK_DOCS = int(os.getenv("BULK_MAX_CHUNK_DOCS", "500"))
+# Loads at least this large switch the index to refresh_interval=-1 / 0 replicas
+BULK_SETTINGS_THRESHOLD = int(os.getenv("BULK_SETTINGS_THRESHOLD", "10000"))
+# Applied when the versioned index behind the OPENSEARCH_INDEX alias is created (src/index_profiles.py);
+# codec "best_compression" stores _source with DEFLATE instead of LZ4: smaller on disk, a little more CPU
+OPENSEARCH_SHARDS = int(os.getenv("OPENSEARCH_SHARDS", "1"))
+OPENSEARCH_REPLICAS = int(os.getenv("OPENSEARCH_REPLICAS", "1"))
+OPENSEARCH_REFRESH_INTERVAL = os.getenv("OPENSEARCH_REFRESH_INTERVAL", "1s")
+OPENSEARCH_CODEC = os.getenv("OPENSEARCH_CODEC", "best_compression")
+
 DATA_DIR = "data"
-os.makedirs(DATA_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Opt-in Parquet copy of the snapshot (--parquet-cache)
+PARQUET_CACHE_DIR = os.path.join(DATA_DIR, "parquet_cache")
+
+# Incremental indexing (--incremental): what has already been sent to OpenSearch
+INDEX_LEDGER_FILE = os.path.join(DATA_DIR, "index_ledger.sqlite")
+
+# Delta ingestion (--delta): arxiv_id + update_date of every paper in the last snapshot ingested
+SNAPSHOT_MANIFEST_FILE = os.path.join(DATA_DIR, "snapshot_manifest.tsv")
+
+# Search backend for --search and indexing: "opensearch", "local" (embedded BM25 index, no service needed)
+# or "auto" (OpenSearch when reachable, the local index otherwise)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+LOCAL_SEARCH_DIR = os.path.join(DATA_DIR, "local_search")
+# Past this many segments the newest half is merged into one
+LOCAL_SEARCH_MAX_SEGMENTS = int(os.getenv("LOCAL_SEARCH_MAX_SEGMENTS", "16"))
+
+# Search/aggregation result cache in StorageManager: entries kept, seconds before they expire
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "60"))
+
+# Append-only log of every run (parameters, totals, stage timings); a run is flagged as a
+# regression when its throughput is more than REGRESSION_THRESHOLD below the median of the
+# last BASELINE_RUNS comparable runs (same parameters), once BASELINE_MIN_RUNS exist
+RUN_HISTORY_FILE = os.path.join(DATA_DIR, "runs.ndjson")
+BASELINE_RUNS = int(os.getenv("BASELINE_RUNS", "20"))
+BASELINE_MIN_RUNS = int(os.getenv("BASELINE_MIN_RUNS", "5"))
+REGRESSION_THRESHOLD = float(os.getenv("REGRESSION_THRESHOLD", "0.25"))
+
+# Per-stage run metrics are also written here in Prometheus text format (node_exporter textfile
+# collector) when set; METRICS_EXPORT_FORMAT "openmetrics" switches to OpenMetrics
+METRICS_EXPORT_FILE = os.getenv("METRICS_EXPORT_FILE") or None
+METRICS_EXPORT_FORMAT = os.getenv("METRICS_EXPORT_FORMAT", "prometheus")
+
+# Measured worker count and serial/parallel cutover for the parallel processor
+PROCESSOR_TUNING_FILE = os.path.join(DATA_DIR, "processor_tuning.json")
+
+# Keyword ranking: "frequency" (raw counts) or "tfidf" (document frequencies kept across runs)
+KEYWORD_MODE = os.getenv("KEYWORD_MODE", "frequency")
+KEYWORD_DF_FILE = os.path.join(DATA_DIR, "keyword_df.json")
+
+# Papers per batch in streaming mode (--stream)
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "5000"))
+
+# JSON backend for the hot decode/encode paths: "auto" (orjson, then msgspec, then stdlib), or one of "orjson", "msgspec", "json"
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+# Intermediate files: raw papers are always NDJSON; processed output is "ndjson" or "csv"
+PROCESSED_FORMAT = os.getenv("PROCESSED_FORMAT", "ndjson")
+# None, "gzip" or "zstd" (zstd needs the zstandard package)
+INTERMEDIATE_COMPRESSION = os.getenv("INTERMEDIATE_COMPRESSION") or None
+# Daemon mode (--daemon): scheduled jobs from this JSON file (see readme), or the command-line
+# filters as a single job every DAEMON_INTERVAL_MINUTES when the file does not exist
+DAEMON_JOBS_FILE = os.getenv("DAEMON_JOBS_FILE", "daemon_jobs.json")
+DAEMON_INTERVAL_MINUTES = int(os.getenv("DAEMON_INTERVAL_MINUTES", "60"))
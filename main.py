@@ -2,15 +2,109 @@
 
 import sys
 import argparse
+import asyncio
+import itertools
+import re
 from datetime import datetime
 
+import pandas as pd
+
+import config
+
 from src.collector import ArxivCollector
 from src.processor import DataProcessor
-from src.processor_parallel import DataProcessor as ParallelDataProcessor
-from src.storage import StorageManager
+from src.processor_parallel import DataProcessor as ParallelDataProcessor, use_parallel
+from src.processor_vectorized import DataProcessor as VectorizedDataProcessor
+from src.storage import SEARCH_BACKENDS, StorageManager
+from src.async_storage import AsyncStorageManager
+from src.daemon import Daemon, Job, WarmClients, load_jobs
 from src.monitor import PipelineMonitor
+from src.ndjson_io import output_suffix
+
+def print_database_statistics(stats: dict):
+    if stats and stats.get('total_papers', 0) > 0:
+        print(f"\nDatabase statistics:")
+        print(f"  Total papers: {stats.get('total_papers', 0)}")
+        
+        # Show top categories
+        if stats.get('top_categories'):
+            print(f"  Top categories:")
+            for cat in stats['top_categories'][:3]:
+                print(f"    - {cat['key']}: {cat['doc_count']} papers")
+        
+        # Show recent years
+        if stats.get('recent_years'):
+            print(f"  Papers by year:")
+            for year in stats['recent_years'][:3]:
+                print(f"    - {year['key']}: {year['doc_count']} papers")
+
+PROCESSORS = {
+    'standard': DataProcessor,
+    'parallel': ParallelDataProcessor,
+    'vectorized': VectorizedDataProcessor
+}
+
+def _batched(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def artifact_name(batch_id: str, mode: str, category: str, year: int, keyword: str, limit: int, incremental: bool) -> str:
+    """S3 object name (under raw/ and processed/) for a run's outputs
+
+    A full run writes the same files as the last full run of its filters
+    whenever the snapshot is unchanged, so those share one name per scope
+    and the shipper skips the upload. Incremental and delta runs only hold
+    what changed, so each keeps its own batch name.
+    """
+    if incremental or mode == 'delta':
+        return batch_id
+    scope = '_'.join(f"{name}-{value}" for name, value in (('category', category), ('year', year), ('keyword', keyword), ('limit', limit)) if value)
+    return f"{mode}/{re.sub(r'[^A-Za-z0-9.-]+', '_', scope or 'all')}"
+
+def artifact_keys(name: str, raw_file: str, processed_file: str):
+    """S3 keys for a run's raw and processed outputs"""
+    return [
+        (raw_file, f"raw/{name}{output_suffix(raw_file)}"),
+        (processed_file, f"processed/{name}{output_suffix(processed_file)}")
+    ]
+
+def run_params(mode: str, category: str, year: int, limit: int, keyword: str, processor_name: str, incremental: bool, compression: str) -> dict:
+    """What makes two runs comparable in the run history"""
+    return {
+        'mode': mode, 'category': category, 'year': year, 'limit': limit, 'keyword': keyword,
+        'processor': processor_name, 'incremental': incremental, 'compression': compression
+    }
 
-def run_pipeline(category: str = None, year: int = None, limit: int = 1000, keyword: str = None):
+async def store_async(df, artifacts, frame_key: str = None, incremental: bool = False, search_backend: str = config.SEARCH_BACKEND, removed=(), batch_id: str = None, clients: WarmClients = None):
+    metadata = {'batch-id': batch_id} if batch_id else None
+    if clients is not None:
+        storage = await clients.async_storage(incremental, search_backend)
+        return await storage.store(df, artifacts, frame_key, removed=removed, metadata=metadata)
+    async with AsyncStorageManager(incremental=incremental, search_backend=search_backend) as storage:
+        return await storage.store(df, artifacts, frame_key, removed=removed, metadata=metadata)
+
+def run_async(coroutine, clients: WarmClients = None):
+    """asyncio.run, or the daemon's long-lived loop whose async clients stay connected"""
+    return clients.run(coroutine) if clients is not None else asyncio.run(coroutine)
+
+def select_processor(processor_name: str, count: int):
+    """Processor instance and its name; 'auto' chooses by paper count"""
+    if processor_name != 'auto':
+        print(f"Using {processor_name} processor for {count} papers")
+        return PROCESSORS[processor_name](), processor_name
+    if use_parallel(count):
+        # Cutover and worker count are measured by benchmarks/bench_parallel_processor.py
+        processor = ParallelDataProcessor()
+        print(f"Using parallel processor for {count} papers ({processor.workers} workers)")
+        return processor, 'parallel'
+    print(f"Using standard processor for {count} papers")
+    return DataProcessor(), 'standard'
+
+def run_pipeline(category: str = None, year: int = None, limit: int = 1000, keyword: str = None, use_index: bool = True, workers: int = 1, use_cache: bool = False, incremental: bool = False, compression: str = config.INTERMEDIATE_COMPRESSION, processor_name: str = 'auto', search_backend: str = config.SEARCH_BACKEND, clients: WarmClients = None):
     print(f"\n{'='*60}")
     print(f"ArXiv Data Pipeline - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"{'='*60}\n")
@@ -19,7 +113,7 @@ def run_pipeline(category: str = None, year: int = None, limit: int = 1000, keyw
     
     monitor = PipelineMonitor()
     batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-    session = monitor.start_monitoring(batch_id)
+    session = monitor.start_monitoring(batch_id, run_params('batch', category, year, limit, keyword, processor_name, incremental, compression))
     
     try:
         print(f"\nStep 1: Collecting data from Kaggle Dataset...")
@@ -28,7 +122,8 @@ def run_pipeline(category: str = None, year: int = None, limit: int = 1000, keyw
         if not category:
             # Show dataset stats first
             print("\nGetting dataset statistics...")
-            stats = collector.get_dataset_stats()
+            with monitor.stage('dataset_stats'):
+                stats = collector.get_dataset_stats(workers=workers)
             if stats:
                 print(f"Total papers in dataset: {stats.get('total_papers', 'unknown')}")
                 print(f"File size: {stats.get('file_size_mb', 0):.1f} MB")
@@ -37,59 +132,220 @@ def run_pipeline(category: str = None, year: int = None, limit: int = 1000, keyw
                     for cat, count in list(stats['categories'].items())[:5]:
                         print(f"  {cat}: {count} papers")
         
-        papers = collector.collect_papers(category, days_back=None, year=year, limit=limit, keyword=keyword)
+        with monitor.stage('collect') as stage:
+            papers = collector.collect_papers(category, days_back=None, year=year, limit=limit, keyword=keyword, use_index=use_index, workers=workers, use_cache=use_cache, skip_unchanged=incremental)
+            stage['items'] = len(papers)
         
         if not papers:
             print("No papers found!")
             return
         
-        raw_file = collector.save_raw_data(papers, category)
+        with monitor.stage('save_raw', items=len(papers)):
+            raw_file = collector.save_raw_data(papers, category, compression=compression)
         
         print("\nStep 2: Processing data...")
-        # Choose processor based on data size
-        if len(papers) > 1000:
-            print(f"Using parallel processor for {len(papers)} papers (>1000)")
-            processor = ParallelDataProcessor()
-        else:
-            print(f"Using standard processor for {len(papers)} papers (≤1000)")
-            processor = DataProcessor()
+        processor, processor_name = select_processor(processor_name, len(papers))
+        # Runs are compared by the processor that actually ran
+        session['params']['processor'] = processor_name
         
-        df = processor.process_papers(raw_file)
+        with monitor.stage('process') as stage:
+            df = processor.process_papers(raw_file)
+            stage['items'] = len(df)
+        monitor.record_memory(df)
         # Note: keyword filtering already done during collection
         if keyword:
             print(f"(Papers already filtered for keyword '{keyword}' during collection)")
         
-        csv_file, json_file = processor.save_processed_data(df, category)
+        with monitor.stage('save_processed', items=len(df)):
+            processed_file = processor.save_processed_data(df, category, compression=compression)
         
         print("\nStep 3: Data quality check...")
-        quality_report = monitor.check_data_quality(df)
+        with monitor.stage('quality', items=len(df)):
+            quality_report = monitor.check_data_quality(df)
         print(f"Quality score: {quality_report['quality_score']:.2%}")
         
         print("\nStep 4: Storing data...")
-        storage = StorageManager()
+        # Artifact upload and indexing run concurrently
+        with monitor.stage('store', items=len(df)):
+            name = artifact_name(batch_id, 'batch', category, year, keyword, limit, incremental)
+            stored = run_async(store_async(
+                df, artifact_keys(name, raw_file, processed_file),
+                frame_key=f"processed/{name}.parquet" if config.SHIP_PARQUET else None,
+                incremental=incremental, search_backend=search_backend, batch_id=batch_id, clients=clients
+            ), clients)
+        
+        print_database_statistics(stored['statistics'])
+        
+        monitor.end_monitoring(session, len(df))
+        
+    except Exception as e:
+        print(f"\nError in pipeline: {e}")
+        monitor.end_monitoring(session, 0, errors=1)
+        raise
+    
+    monitor.print_summary()
+    print(f"\n{'='*60}")
+    print("Pipeline completed successfully!")
+    print(f"{'='*60}\n")
+
+def run_streaming_pipeline(category: str = None, year: int = None, limit: int = 1000, keyword: str = None, use_index: bool = True, workers: int = 1, use_cache: bool = False, incremental: bool = False, batch_size: int = config.STREAM_BATCH_SIZE, compression: str = config.INTERMEDIATE_COMPRESSION, processor_name: str = 'standard', search_backend: str = config.SEARCH_BACKEND, clients: WarmClients = None):
+    """Collector -> processor -> storage in bounded batches; never holds the full paper list"""
+    print(f"\n{'='*60}")
+    print(f"ArXiv Data Pipeline (streaming) - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*60}\n")
+    
+    print(f"Data Source: Kaggle Dataset (Cornell-University/arxiv)")
+    print(f"Batch size: {batch_size} papers")
+    
+    monitor = PipelineMonitor()
+    batch_id = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    session = monitor.start_monitoring(batch_id, run_params('stream', category, year, limit, keyword, processor_name if processor_name in PROCESSORS else 'standard', incremental, compression))
+    
+    try:
+        collector = ArxivCollector(use_dataset=True)
+        processor = PROCESSORS.get(processor_name, DataProcessor)()
+        storage = clients.storage(incremental, search_backend) if clients is not None else StorageManager(incremental=incremental, search_backend=search_backend)
+        
+        papers = collector.iter_papers(category, year=year, limit=limit, keyword=keyword, use_index=use_index, workers=workers, use_cache=use_cache, skip_unchanged=incremental)
+        
+        quality_reports = []
+        total = 0
+        
+        with collector.open_raw_writer(category, compression=compression) as raw_writer, \
+                processor.open_processed_writer(category, compression=compression) as writer, \
+                storage.bulk_load():
+            batches = _batched(papers, batch_size)
+            while True:
+                # Collection happens lazily as batches are pulled
+                with monitor.stage('collect') as stage:
+                    batch = next(batches, None)
+                    stage['items'] = len(batch or ())
+                if batch is None:
+                    break
+                
+                with monitor.stage('write_raw', items=len(batch)):
+                    raw_writer.write(batch)
+                
+                with monitor.stage('process') as stage:
+                    df = processor.process_batch(batch)
+                    stage['items'] = len(df)
+                if df.empty:
+                    continue
+                monitor.record_memory(df)
+                
+                with monitor.stage('write_processed', items=len(df)):
+                    writer.write(df)
+                with monitor.stage('quality', items=len(df)):
+                    quality_reports.append(monitor.check_data_quality(df))
+                with monitor.stage('index', items=len(df)):
+                    storage.index_papers(df)
+                
+                total += len(df)
+                print(f"Processed batch: {len(df)} papers (total {total})")
+        
+        processor.keywords.save()
+        
+        if not total:
+            print("No papers found!")
+            return
+        
+        quality_report = monitor.combine_quality(quality_reports)
+        print(f"\nQuality score: {quality_report['quality_score']:.2%}")
         
-        storage.upload_to_s3(csv_file, f"processed/{batch_id}.csv")
+        with monitor.stage('ship'):
+            name = artifact_name(batch_id, 'stream', category, year, keyword, limit, incremental)
+            storage.ship_artifacts(artifact_keys(name, raw_writer.path, writer.path), metadata={'batch-id': batch_id})
         
-        storage.index_papers(df)
+        print_database_statistics(storage.get_statistics())
+        
+        monitor.end_monitoring(session, total)
+        
+    except Exception as e:
+        print(f"\nError in pipeline: {e}")
+        monitor.end_monitoring(session, 0, errors=1)
+        raise
+    
+    monitor.print_summary()
+    print(f"\n{'='*60}")
+    print("Pipeline completed successfully!")
+    print(f"{'='*60}\n")
+
+def run_delta_pipeline(category: str = None, year: int = None, keyword: str = None, incremental: bool = False, compression: str = config.INTERMEDIATE_COMPRESSION, processor_name: str = 'auto', search_backend: str = config.SEARCH_BACKEND, clients: WarmClients = None):
+    """Ingest only what changed in the snapshot since the last delta run with the same filters
+    
+    Added and updated papers are processed and upserted, removed ones are
+    deleted. The snapshot becomes the new baseline only once every change is stored.
+    """
+    print(f"\n{'='*60}")
+    print(f"ArXiv Delta Pipeline - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*60}\n")
+    
+    monitor = PipelineMonitor()
+    batch_id = f"delta_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    session = monitor.start_monitoring(batch_id, run_params('delta', category, year, None, keyword, processor_name, incremental, compression))
+    
+    try:
+        print("Step 1: Comparing the snapshot with the last ingested one...")
+        collector = ArxivCollector(use_dataset=True)
+        delta = collector.snapshot_delta(category=category, year=year, keyword=keyword)
+        with monitor.stage('fingerprint') as stage:
+            changes = delta.changes()
+            stage['items'] = delta.current.num_rows
+        print(changes.summary())
         
-        stats = storage.get_statistics()
-        if stats and stats.get('total_papers', 0) > 0:
-            print(f"\nDatabase statistics:")
-            print(f"  Total papers: {stats.get('total_papers', 0)}")
+        with monitor.stage('collect') as stage:
+            papers = collector.collect_changes(changes, category=category, year=year, keyword=keyword)
+            stage['items'] = len(papers)
+        
+        if not papers and not changes.removed:
+            print("Nothing to ingest")
+            delta.commit()
+            monitor.end_monitoring(session, 0)
+            monitor.print_summary()
+            return
+        
+        df = pd.DataFrame()
+        artifacts = []
+        if papers:
+            with monitor.stage('save_raw', items=len(papers)):
+                raw_file = collector.save_raw_data(papers, f"delta_{category}" if category else "delta", compression=compression)
             
-            # Show top categories
-            if stats.get('top_categories'):
-                print(f"  Top categories:")
-                for cat in stats['top_categories'][:3]:
-                    print(f"    - {cat['key']}: {cat['doc_count']} papers")
+            print("\nStep 2: Processing changed papers...")
+            processor, processor_name = select_processor(processor_name, len(papers))
+            session['params']['processor'] = processor_name
+            with monitor.stage('process') as stage:
+                df = processor.process_papers(raw_file)
+                stage['items'] = len(df)
+            monitor.record_memory(df)
             
-            # Show recent years
-            if stats.get('recent_years'):
-                print(f"  Papers by year:")
-                for year in stats['recent_years'][:3]:
-                    print(f"    - {year['key']}: {year['doc_count']} papers")
+            with monitor.stage('save_processed', items=len(df)):
+                processed_file = processor.save_processed_data(df, f"delta_{category}" if category else "delta", compression=compression)
+            
+            print("\nStep 3: Data quality check...")
+            with monitor.stage('quality', items=len(df)):
+                quality_report = monitor.check_data_quality(df)
+            print(f"Quality score: {quality_report['quality_score']:.2%}")
+            artifacts = artifact_keys(batch_id, raw_file, processed_file)
         
-        monitor.end_monitoring(session, len(df))
+        print("\nStep 4: Storing changes...")
+        with monitor.stage('store', items=len(df) + len(changes.removed)):
+            stored = run_async(store_async(
+                df, artifacts, incremental=incremental, search_backend=search_backend, removed=changes.removed, batch_id=batch_id, clients=clients
+            ), clients)
+        
+        # Upserts and deletes are idempotent: anything not stored is simply sent again next run
+        complete = all(
+            result is not None and not result['failed']
+            for result, expected in ((stored['index'], len(df)), (stored['deleted'], len(changes.removed))) if expected
+        )
+        if complete:
+            delta.commit()
+        else:
+            print("Some changes were not stored; the next delta run will retry them")
+        
+        print_database_statistics(stored['statistics'])
+        
+        monitor.end_monitoring(session, len(df) + len(changes.removed), errors=0 if complete else 1)
         
     except Exception as e:
         print(f"\nError in pipeline: {e}")
@@ -98,11 +354,18 @@ def run_pipeline(category: str = None, year: int = None, limit: int = 1000, keyw
     
     monitor.print_summary()
     print(f"\n{'='*60}")
-    print("Pipeline completed successfully!")
+    print("Delta pipeline completed successfully!" if complete else "Delta pipeline completed with errors")
     print(f"{'='*60}\n")
 
-def search_papers(query: str):
-    storage = StorageManager()
+# Pipeline for each daemon job mode
+PIPELINES = {
+    'batch': run_pipeline,
+    'stream': run_streaming_pipeline,
+    'delta': run_delta_pipeline
+}
+
+def search_papers(query: str, search_backend: str = config.SEARCH_BACKEND):
+    storage = StorageManager(search_backend=search_backend)
     results = storage.search_papers(query)
     
     if not results:
@@ -124,13 +387,27 @@ def main():
     parser.add_argument('--keyword', help='Filter papers by keyword in title/abstract')
     parser.add_argument('--search', help='Search for papers in indexed data')
     parser.add_argument('--stats', action='store_true', help='Show dataset statistics')
+    parser.add_argument('--workers', type=int, default=1, help='Number of processes for scanning the dataset file')
+    parser.add_argument('--parquet-cache', action='store_true', help='Collect from the partitioned Parquet cache (built on first use)')
+    parser.add_argument('--stream', action='store_true', help='Stream papers through the pipeline in bounded batches')
+    parser.add_argument('--batch-size', type=int, default=config.STREAM_BATCH_SIZE, help='Papers per batch in streaming mode')
+    parser.add_argument('--compress', choices=['gzip', 'zstd'], default=config.INTERMEDIATE_COMPRESSION, help='Compress the raw/processed NDJSON intermediates')
+    parser.add_argument('--incremental', action='store_true', help='Only collect and index papers that are new or changed since earlier runs')
+    parser.add_argument('--processor', choices=['auto'] + list(PROCESSORS), default='auto', help='Processing engine (auto picks by paper count; streaming uses standard)')
+    parser.add_argument('--search-backend', choices=SEARCH_BACKENDS, default=config.SEARCH_BACKEND, help='Where --search queries and pipelines index: OpenSearch, the embedded local index, or auto')
+    parser.add_argument('--no-index', action='store_true', help='Scan the full dataset instead of using the byte-offset index')
+    parser.add_argument('--delta', action='store_true', help='Ingest only papers added, updated or removed since the last --delta run with the same filters (ignores --limit)')
+    parser.add_argument('--reindex', action='store_true', help='Copy the OpenSearch papers into an index with the current mapping profile and switch the alias to it')
+    parser.add_argument('--daemon', action='store_true', help='Keep running and ingest on a schedule: the jobs in --jobs, or the filters given here as one job')
+    parser.add_argument('--jobs', default=config.DAEMON_JOBS_FILE, help='JSON list of scheduled jobs for --daemon')
+    parser.add_argument('--every', type=int, default=config.DAEMON_INTERVAL_MINUTES, help='Minutes between runs of the command-line job in --daemon mode')
     
     args = parser.parse_args()
     
     if args.stats:
         print("Getting dataset statistics...")
         collector = ArxivCollector(use_dataset=True)
-        stats = collector.get_dataset_stats()
+        stats = collector.get_dataset_stats(workers=args.workers)
         
         print(f"\nDataset Statistics:")
         print(f"Total papers: {stats.get('total_papers', 'unknown')}")
@@ -141,19 +418,67 @@ def main():
             for cat, count in stats['categories'].items():
                 print(f"  {cat}: {count:,} papers")
         
+        if stats.get('subcategories'):
+            print("\nTop subcategories:")
+            for cat, count in stats['subcategories'].items():
+                print(f"  {cat}: {count:,} papers")
+        
         if stats.get('years'):
             print("\nPapers by year (last 10 years):")
             for year, count in stats['years'].items():
                 print(f"  {year}: {count:,} papers")
     
+    elif args.daemon:
+        mode = 'delta' if args.delta else 'stream' if args.stream else 'batch'
+        default = Job(
+            mode=mode, category=args.category, year=args.year, keyword=args.keyword, limit=args.limit,
+            workers=args.workers, incremental=args.incremental, processor=args.processor,
+            search_backend=args.search_backend, compression=args.compress, use_index=not args.no_index,
+            use_cache=args.parquet_cache, batch_size=args.batch_size, every_minutes=args.every
+        )
+        Daemon(load_jobs(args.jobs, default), PIPELINES).run()
+    elif args.delta:
+        run_delta_pipeline(
+            category=args.category,
+            year=args.year,
+            keyword=args.keyword,
+            incremental=args.incremental,
+            compression=args.compress,
+            processor_name=args.processor,
+            search_backend=args.search_backend
+        )
+    elif args.reindex:
+        StorageManager(search_backend='opensearch').reindex()
     elif args.search:
-        search_papers(args.search)
+        search_papers(args.search, search_backend=args.search_backend)
+    elif args.stream:
+        run_streaming_pipeline(
+            category=args.category,
+            year=args.year,
+            limit=args.limit,
+            keyword=args.keyword,
+            use_index=not args.no_index,
+            workers=args.workers,
+            use_cache=args.parquet_cache,
+            incremental=args.incremental,
+            batch_size=args.batch_size,
+            compression=args.compress,
+            processor_name=args.processor,
+            search_backend=args.search_backend
+        )
     else:
         run_pipeline(
             category=args.category,
             year=args.year,
             limit=args.limit,
-            keyword=args.keyword
+            keyword=args.keyword,
+            use_index=not args.no_index,
+            workers=args.workers,
+            use_cache=args.parquet_cache,
+            incremental=args.incremental,
+            compression=args.compress,
+            processor_name=args.processor,
+            search_backend=args.search_backend
         )
 
 if __name__ == "__main__":
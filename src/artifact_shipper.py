@@ -0,0 +1,188 @@
+"""
+Ships pipeline artifacts to S3: streamed compression, parallel multipart uploads, skip-if-unchanged
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
+from botocore.exceptions import ClientError
+
+import config
+from src.ndjson_io import COMPRESSION_SUFFIXES
+
+# Files that are already compressed are uploaded as they are
+COMPRESSED_SUFFIXES = ('.gz', '.zst', '.parquet')
+READ_SIZE = 1024 * 1024
+MB = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compress_file(source: str, target: str, compression: str):
+    """Stream `source` into `target` in fixed-size blocks; output is byte-for-byte reproducible"""
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        if compression == 'gzip':
+            # No mtime or file name in the header, so equal inputs give equal objects
+            with gzip.GzipFile(filename='', fileobj=dst, mode='wb', compresslevel=6, mtime=0) as out:
+                shutil.copyfileobj(src, out, READ_SIZE)
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("zstd compression needs zstandard: pip install zstandard")
+            zstandard.ZstdCompressor(level=3).copy_stream(src, dst, read_size=READ_SIZE, write_size=READ_SIZE)
+        else:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+
+class ArtifactShipper:
+    """Uploads local artifacts through one shared S3 transfer manager
+
+    Each object carries the SHA-256 of its uncompressed content in its
+    `sha256` metadata. When the existing object at the target key has the
+    same hash, the upload (and the compression) is skipped, and the object
+    keeps the metadata (e.g. batch id) of the run that first shipped it. Files above
+    `part_size_mb` go up as multipart uploads with `max_concurrency` parts
+    in flight.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        bucket: str = config.S3_BUCKET,
+        compression: Optional[str] = config.ARTIFACT_COMPRESSION,
+        part_size_mb: int = config.S3_PART_SIZE_MB,
+        max_concurrency: int = config.S3_MAX_CONCURRENCY
+    ):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if client is None:
+            from src.storage import get_s3_client
+            client = get_s3_client()
+        self.client = client
+        self.bucket = bucket
+        self.compression = compression
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size_mb * MB,
+            multipart_chunksize=part_size_mb * MB,
+            max_concurrency=max_concurrency
+        )
+        self._manager = None
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            self._manager = create_transfer_manager(self.client, self.transfer_config)
+        return self._manager
+
+    def shutdown(self):
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def remote_sha256(self, key: str) -> Optional[str]:
+        """Content hash recorded on the existing object, or None if there is no such object"""
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return head.get('Metadata', {}).get('sha256')
+
+    def _prepare(self, local_file: str, s3_key: str, tmp_dir: str) -> Dict:
+        """Hash, check the remote copy, and compress if needed; returns the upload plan"""
+        compress = self.compression and not local_file.endswith(COMPRESSED_SUFFIXES)
+        key = s3_key + COMPRESSION_SUFFIXES[self.compression] if compress else s3_key
+        sha256 = file_sha256(local_file)
+        artifact = {'file': local_file, 'key': key, 'sha256': sha256, 'upload_file': local_file}
+
+        if self.remote_sha256(key) == sha256:
+            artifact['status'] = 'unchanged'
+            return artifact
+
+        if compress:
+            artifact['upload_file'] = os.path.join(tmp_dir, os.path.basename(key))
+            compress_file(local_file, artifact['upload_file'], self.compression)
+        artifact['bytes'] = os.path.getsize(artifact['upload_file'])
+        return artifact
+
+    def ship_all(self, artifacts: List[Tuple[str, str]], frames: List[Tuple[pd.DataFrame, str]] = (),
+                 metadata: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """Ship (local file, S3 key) pairs and (DataFrame, S3 key) pairs as Parquet; all uploads run concurrently
+
+        `metadata` is added to every uploaded object next to its content hash.
+
+        Returns one dict per artifact with the final key, the content hash and
+        a status of "uploaded", "unchanged" or "failed" (failures are reported,
+        not raised, like the rest of the storage step).
+        """
+        results = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            artifacts = [(local_file, s3_key, None) for local_file, s3_key in artifacts]
+            for df, s3_key in frames:
+                path = os.path.join(tmp_dir, os.path.basename(s3_key))
+                try:
+                    # Columns are zstd-compressed inside the file, so it is shipped as is
+                    df.to_parquet(path, compression='zstd', index=False)
+                    artifacts.append((path, s3_key, None))
+                except Exception as e:
+                    artifacts.append((path, s3_key, e))
+
+            futures = []
+            for local_file, s3_key, error in artifacts:
+                if error is None:
+                    try:
+                        artifact = self._prepare(local_file, s3_key, tmp_dir)
+                    except Exception as e:
+                        error = e
+                if error is not None:
+                    artifact = {'file': local_file, 'key': s3_key, 'status': 'failed', 'error': str(error)}
+                results.append(artifact)
+                if 'status' in artifact:
+                    continue
+                try:
+                    futures.append((artifact, self.manager.upload(
+                        artifact['upload_file'], self.bucket, artifact['key'],
+                        extra_args={'Metadata': {**(metadata or {}), 'sha256': artifact['sha256']}}
+                    )))
+                except Exception as e:
+                    artifact.update(status='failed', error=str(e))
+
+            for artifact, future in futures:
+                try:
+                    future.result()
+                    artifact['status'] = 'uploaded'
+                except Exception as e:
+                    artifact.update(status='failed', error=str(e))
+
+        for artifact in results:
+            artifact.pop('upload_file', None)
+            if artifact['status'] == 'uploaded':
+                print(f"✓ Uploaded to s3://{self.bucket}/{artifact['key']} ({artifact['bytes'] / MB:.1f} MB)")
+            elif artifact['status'] == 'unchanged':
+                print(f"✓ Unchanged, not re-uploaded: s3://{self.bucket}/{artifact['key']}")
+            else:
+                # If S3 is not configured or fails, continue without error
+                print(f"S3 upload skipped: {artifact['error']}")
+                # DataFrames only ever had a temporary file
+                if os.path.exists(artifact['file']):
+                    print(f"  (File saved locally: {artifact['file']})")
+        return results
+
+    def ship(self, local_file: str, s3_key: str) -> Dict:
+        return self.ship_all([(local_file, s3_key)])[0]
+
+    def ship_frame(self, df: pd.DataFrame, s3_key: str) -> Dict:
+        return self.ship_all([], [(df, s3_key)])[0]
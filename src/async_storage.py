@@ -0,0 +1,154 @@
+"""
+asyncio storage layer: S3 upload, bulk indexing and the statistics refresh run concurrently
+"""
+import asyncio
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from opensearchpy import AsyncOpenSearch
+
+import config
+from src.bulk_indexer import AsyncBulkIndexer
+from src.index_profiles import ensure_index_async
+from src.storage import STATISTICS_BODY, BaseStorageManager, get_shipper, msearch_body
+
+
+class AsyncStorageManager(BaseStorageManager):
+    """Async counterpart of StorageManager, used for the pipeline's storage step
+
+    Use as `async with AsyncStorageManager() as storage:`. Entering connects
+    to OpenSearch (falling back to the local search index like StorageManager),
+    leaving closes the client. Artifacts are compressed and uploaded in a worker
+    thread by the shared ArtifactShipper, overlapping with indexing on the event loop.
+    Everything but the awaits is shared with StorageManager through BaseStorageManager.
+    """
+
+    async def __aenter__(self):
+        if self.search_backend != 'local':
+            await self._connect_opensearch()
+        self._open_local_index()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        if self.opensearch:
+            await self.opensearch.close()
+            self.opensearch = None
+
+    async def _connect_opensearch(self):
+        client = AsyncOpenSearch(
+            hosts=[{'host': config.OPENSEARCH_HOST, 'port': config.OPENSEARCH_PORT}],
+            use_ssl=False,
+            verify_certs=False,
+            # One pooled connection per in-flight bulk chunk
+            maxsize=config.BULK_THREADS
+        )
+        try:
+            self._index_created(await ensure_index_async(client))
+            self.opensearch = client
+        except Exception:
+            await client.close()
+            print("OpenSearch not available")
+
+    async def ship_artifacts(self, artifacts: List[Tuple[str, str]], frames: List[Tuple[pd.DataFrame, str]] = (),
+                             metadata: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """Compress and upload in a worker thread (see ArtifactShipper.ship_all)"""
+        return await asyncio.to_thread(get_shipper().ship_all, artifacts, frames, metadata)
+
+    async def index_papers(self, df: pd.DataFrame, only_changed: bool = None) -> Optional[Dict]:
+        """Bulk index papers with up to BULK_THREADS requests in flight; same ledger rules as StorageManager"""
+        if self.local_index is not None:
+            return self._indexed_locally(await asyncio.to_thread(self.local_index.add, df))
+
+        if not self.opensearch:
+            print("OpenSearch not available")
+            return None
+
+        documents = self._changed_documents(df, only_changed)
+        indexer = AsyncBulkIndexer(self.opensearch)
+        tune = len(df) >= config.BULK_SETTINGS_THRESHOLD
+
+        try:
+            async with indexer.bulk_settings() if tune else nullcontext():
+                result = await indexer.index_documents(documents)
+            return self._indexed(documents, result)
+        except Exception as e:
+            print(f"Bulk indexing error: {e}")
+            return None
+
+    async def delete_papers(self, arxiv_ids: List[str]) -> Optional[Dict]:
+        """Delete papers by id; same rules as StorageManager.delete_papers"""
+        if self.local_index is not None:
+            return self._removed_locally(arxiv_ids, await asyncio.to_thread(self.local_index.remove, arxiv_ids))
+
+        if not self.opensearch:
+            print("OpenSearch not available")
+            return None
+
+        try:
+            result = await AsyncBulkIndexer(self.opensearch).delete_documents(arxiv_ids)
+        except Exception as e:
+            print(f"Bulk delete error: {e}")
+            return None
+        return self._deleted_from_opensearch(arxiv_ids, result)
+
+    async def search_papers(self, query: str, size: int = 10) -> List[Dict]:
+        return (await self.search_many([query], size))[0]
+
+    async def search_many(self, queries: List[str], size: int = 10) -> List[List[Dict]]:
+        """Cached queries are answered locally; the rest go out in one _msearch request"""
+        results, missing = self._cached_searches(queries, size)
+
+        if missing and self.local_index is not None:
+            for query in missing:
+                self._cache_search(results, query, size, await asyncio.to_thread(self.local_index.search, query, size))
+        elif missing and self.opensearch:
+            try:
+                responses = (await self.opensearch.msearch(body=msearch_body(missing, size)))["responses"]
+            except Exception as e:
+                print(f"Search error: {e}")
+                responses = []
+            self._cache_responses(results, missing, size, responses)
+
+        return self._search_results(results, queries)
+
+    async def get_statistics(self) -> Dict:
+        if self.local_index is not None:
+            return self._local_statistics()
+
+        if not self.opensearch:
+            return {}
+
+        cached = self._cached_statistics()
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.opensearch.search(index=config.OPENSEARCH_INDEX, body=STATISTICS_BODY)
+            return self._cache_statistics(response)
+        except Exception:
+            return {"total_papers": 0}
+
+    async def store(self, df: pd.DataFrame, artifacts: List[Tuple[str, str]], frame_key: Optional[str] = None,
+                    removed: List[str] = (), metadata: Optional[Dict[str, str]] = None) -> Dict:
+        """Ship the artifacts (and `df` as Parquet under `frame_key`, all with `metadata`) while indexing the papers
+
+        The statistics refresh follows indexing and the deletion of `removed`
+        ids (it reports what was just stored) but still overlaps with the
+        upload, so the step takes as long as the slower of upload and
+        index + statistics.
+        """
+        async def index_and_refresh():
+            result = await self.index_papers(df) if len(df) else None
+            deleted = await self.delete_papers(list(removed)) if removed else None
+            return result, deleted, await self.get_statistics()
+
+        frames = [(df, frame_key)] if frame_key else []
+        shipped, (result, deleted, stats) = await asyncio.gather(
+            self.ship_artifacts(artifacts, frames, metadata),
+            index_and_refresh()
+        )
+        return {'artifacts': shipped, 'index': result, 'deleted': deleted, 'statistics': stats}
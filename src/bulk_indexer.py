@@ -0,0 +1,284 @@
+"""
+Parallel bulk indexing engine for OpenSearch
+"""
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import pandas as pd
+from opensearchpy.exceptions import TransportError
+
+import config
+
+
+def iter_documents(df: pd.DataFrame) -> Iterator[Dict]:
+    """Yield one `_source` dict per row without materializing all of them"""
+    columns = list(df.columns)
+    for values in df.itertuples(index=False, name=None):
+        doc = dict(zip(columns, values))
+        # Unparseable dates come through as NaT, missing nullable/Arrow values as NA; send them as null
+        for key, value in doc.items():
+            if value is pd.NaT or value is pd.NA or (isinstance(value, float) and value != value):
+                doc[key] = None
+        # Convert lists to proper format
+        if 'authors' in doc and isinstance(doc['authors'], str):
+            doc['authors'] = [doc['authors']]
+        yield doc
+
+
+class BulkIndexer:
+    """Streams documents to `_bulk` from a thread pool over a pooled connection
+
+    Chunks are capped by serialized size and document count; 429 responses
+    (whole request or individual items) are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        client,
+        index: str = config.OPENSEARCH_INDEX,
+        thread_count: int = config.BULK_THREADS,
+        max_chunk_bytes: int = config.BULK_MAX_CHUNK_BYTES,
+        max_chunk_docs: int = config.BULK_MAX_CHUNK_DOCS,
+        max_retries: int = 5,
+        initial_backoff: float = 1.0,
+        request_timeout: int = 60
+    ):
+        self.client = client
+        self.index = index
+        self.thread_count = max(1, thread_count)
+        self.max_chunk_bytes = max_chunk_bytes
+        self.max_chunk_docs = max_chunk_docs
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.request_timeout = request_timeout
+
+    def _serialize(self, docs: Iterable[Dict]) -> Iterator[Tuple[str, bytes]]:
+        serializer = self.client.transport.serializer
+        for doc in docs:
+            doc_id = doc['arxiv_id']
+            action = serializer.dumps({"index": {"_index": self.index, "_id": doc_id}})
+            source = serializer.dumps(doc)
+            yield doc_id, f"{action}\n{source}\n".encode('utf-8')
+
+    def _serialize_deletes(self, arxiv_ids: Iterable[str]) -> Iterator[Tuple[str, bytes]]:
+        serializer = self.client.transport.serializer
+        for arxiv_id in arxiv_ids:
+            action = serializer.dumps({"delete": {"_index": self.index, "_id": arxiv_id}})
+            yield arxiv_id, f"{action}\n".encode('utf-8')
+
+    def _chunks(self, serialized: Iterator[Tuple[str, bytes]]) -> Iterator[List[Tuple[str, bytes]]]:
+        chunk = []
+        size = 0
+        for doc_id, payload in serialized:
+            if chunk and (size + len(payload) > self.max_chunk_bytes or len(chunk) >= self.max_chunk_docs):
+                yield chunk
+                chunk = []
+                size = 0
+            chunk.append((doc_id, payload))
+            size += len(payload)
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _classify(pending: List[Tuple[str, bytes]], response: Dict) -> Tuple[int, List[Tuple[str, bytes]], List[Dict]]:
+        """Split a bulk response into (success count, throttled payloads to retry, errors)"""
+        success = 0
+        throttled = []
+        errors = []
+        for (doc_id, payload), item in zip(pending, response.get('items', [])):
+            result = next(iter(item.values()))
+            status = result.get('status', 500)
+            # Deleting a paper the index never had leaves it in the wanted state
+            if 200 <= status < 300 or (status == 404 and 'delete' in item):
+                success += 1
+            elif status == 429:
+                throttled.append((doc_id, payload))
+            else:
+                errors.append({'_id': doc_id, 'status': status, 'error': result.get('error')})
+        return success, throttled, errors
+
+    def _send(self, chunk: List[Tuple[str, bytes]]) -> Tuple[int, List[Dict]]:
+        """Send one chunk, retrying throttled documents; returns (success, errors)"""
+        pending = chunk
+        success = 0
+        errors = []
+
+        for attempt in range(self.max_retries + 1):
+            body = b''.join(payload for _, payload in pending)
+            try:
+                response = self.client.bulk(body=body, request_timeout=self.request_timeout)
+            except TransportError as e:
+                if e.status_code == 429 and attempt < self.max_retries:
+                    time.sleep(self.initial_backoff * 2 ** attempt)
+                    continue
+                raise
+
+            ok, throttled, failed = self._classify(pending, response)
+            success += ok
+            errors.extend(failed)
+
+            if not throttled:
+                break
+            if attempt == self.max_retries:
+                errors.extend({'_id': doc_id, 'status': 429, 'error': 'too many requests'} for doc_id, _ in throttled)
+                break
+            pending = throttled
+            time.sleep(self.initial_backoff * 2 ** attempt)
+
+        return success, errors
+
+    def index_documents(self, docs: Iterable[Dict]) -> Dict:
+        """Index a stream of documents; returns counts and docs/sec"""
+        return self._run(self._serialize(docs))
+
+    def delete_documents(self, arxiv_ids: Iterable[str]) -> Dict:
+        """Delete papers by id; ids the index does not have count as deleted"""
+        return self._run(self._serialize_deletes(arxiv_ids))
+
+    def _run(self, serialized: Iterator[Tuple[str, bytes]]) -> Dict:
+        start = time.time()
+        success = 0
+        errors = []
+        # Bound in-flight chunks so the generator is never drained ahead of the network
+        max_in_flight = self.thread_count * 2
+
+        with ThreadPoolExecutor(max_workers=self.thread_count) as executor:
+            in_flight = set()
+            for chunk in self._chunks(serialized):
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        ok, failed = future.result()
+                        success += ok
+                        errors.extend(failed)
+                in_flight.add(executor.submit(self._send, chunk))
+
+            for future in in_flight:
+                ok, failed = future.result()
+                success += ok
+                errors.extend(failed)
+
+        return self._summary(start, success, errors)
+
+    @staticmethod
+    def _summary(start: float, success: int, errors: List[Dict]) -> Dict:
+        elapsed = time.time() - start
+        return {
+            'success': success,
+            'failed': len(errors),
+            'errors': errors,
+            'seconds': elapsed,
+            'docs_per_sec': success / elapsed if elapsed > 0 else 0.0
+        }
+
+    @contextmanager
+    def bulk_settings(self):
+        """Disable refresh and replicas for the duration of a large load, then restore them"""
+        try:
+            current = self.client.indices.get_settings(index=self.index)
+            index_settings = next(iter(current.values()))['settings']['index']
+            original = {
+                'refresh_interval': index_settings.get('refresh_interval', '1s'),
+                'number_of_replicas': index_settings.get('number_of_replicas', '1')
+            }
+            self.client.indices.put_settings(
+                index=self.index,
+                body={'index': {'refresh_interval': '-1', 'number_of_replicas': 0}}
+            )
+        except Exception as e:
+            print(f"Bulk index settings not applied: {e}")
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            self.client.indices.put_settings(index=self.index, body={'index': original})
+            self.client.indices.refresh(index=self.index)
+
+
+class AsyncBulkIndexer(BulkIndexer):
+    """BulkIndexer for an AsyncOpenSearch client: up to `thread_count` chunks in flight on one event loop"""
+
+    async def _send(self, chunk: List[Tuple[str, bytes]]) -> Tuple[int, List[Dict]]:
+        pending = chunk
+        success = 0
+        errors = []
+
+        for attempt in range(self.max_retries + 1):
+            body = b''.join(payload for _, payload in pending)
+            try:
+                response = await self.client.bulk(body=body, request_timeout=self.request_timeout)
+            except TransportError as e:
+                if e.status_code == 429 and attempt < self.max_retries:
+                    await asyncio.sleep(self.initial_backoff * 2 ** attempt)
+                    continue
+                raise
+
+            ok, throttled, failed = self._classify(pending, response)
+            success += ok
+            errors.extend(failed)
+
+            if not throttled:
+                break
+            if attempt == self.max_retries:
+                errors.extend({'_id': doc_id, 'status': 429, 'error': 'too many requests'} for doc_id, _ in throttled)
+                break
+            pending = throttled
+            await asyncio.sleep(self.initial_backoff * 2 ** attempt)
+
+        return success, errors
+
+    async def index_documents(self, docs: Iterable[Dict]) -> Dict:
+        return await self._run(self._serialize(docs))
+
+    async def delete_documents(self, arxiv_ids: Iterable[str]) -> Dict:
+        return await self._run(self._serialize_deletes(arxiv_ids))
+
+    async def _run(self, serialized: Iterator[Tuple[str, bytes]]) -> Dict:
+        start = time.time()
+        success = 0
+        errors = []
+
+        in_flight = set()
+        for chunk in self._chunks(serialized):
+            if len(in_flight) >= self.thread_count:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ok, failed = task.result()
+                    success += ok
+                    errors.extend(failed)
+            in_flight.add(asyncio.ensure_future(self._send(chunk)))
+
+        for ok, failed in await asyncio.gather(*in_flight):
+            success += ok
+            errors.extend(failed)
+
+        return self._summary(start, success, errors)
+
+    @asynccontextmanager
+    async def bulk_settings(self):
+        try:
+            current = await self.client.indices.get_settings(index=self.index)
+            index_settings = next(iter(current.values()))['settings']['index']
+            original = {
+                'refresh_interval': index_settings.get('refresh_interval', '1s'),
+                'number_of_replicas': index_settings.get('number_of_replicas', '1')
+            }
+            await self.client.indices.put_settings(
+                index=self.index,
+                body={'index': {'refresh_interval': '-1', 'number_of_replicas': 0}}
+            )
+        except Exception as e:
+            print(f"Bulk index settings not applied: {e}")
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            await self.client.indices.put_settings(index=self.index, body={'index': original})
+            await self.client.indices.refresh(index=self.index)
@@ -0,0 +1,53 @@
+"""
+JSON encoding/decoding backend: orjson or msgspec when installed, stdlib json otherwise
+"""
+import json
+from typing import Any, Union
+
+import config
+
+BACKENDS = ('orjson', 'msgspec', 'json')
+
+
+def _select(preferred: str):
+    """Return (name, loads, dumps) for the preferred backend, falling back in BACKENDS order if it is not installed"""
+    if preferred != 'auto' and preferred not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend: {preferred}")
+    candidates = BACKENDS if preferred == 'auto' else (preferred,) + BACKENDS
+    for name in candidates:
+        if name == 'orjson':
+            try:
+                import orjson
+            except ImportError:
+                continue
+            return name, orjson.loads, lambda obj: orjson.dumps(obj).decode('utf-8')
+        if name == 'msgspec':
+            try:
+                import msgspec
+            except ImportError:
+                continue
+            decoder = msgspec.json.Decoder()
+            encoder = msgspec.json.Encoder()
+            return name, decoder.decode, lambda obj: encoder.encode(obj).decode('utf-8')
+        if name == 'json':
+            return name, json.loads, json.dumps
+
+
+BACKEND, _loads, _dumps = _select(config.JSON_BACKEND)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode one JSON document; every backend raises a ValueError subclass on bad input"""
+    return _loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Encode to a single-line JSON string (no trailing newline)"""
+    return _dumps(obj)
+
+
+def use_backend(name: str) -> str:
+    """Switch backend at runtime (benchmarks); returns the backend actually selected"""
+    global BACKEND, _loads, _dumps
+    BACKEND, _loads, _dumps = _select(name)
+    return BACKEND
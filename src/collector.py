@@ -1,37 +1,73 @@
 from datetime import datetime
-import json
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 
 import config
 from src.dataset_collector import DatasetCollector  # Using simplified version
+from src.ndjson_io import NDJSONWriter, output_path, write_records
+from src.schema import Paper
+from src.snapshot_delta import SnapshotChanges, SnapshotDelta
 
 class ArxivCollector:
     def __init__(self, use_dataset: bool = True):
         self.use_dataset = True  # Always use dataset
         self.dataset_collector = DatasetCollector()
         
-    def collect_papers(self, category: str = None, days_back: int = None, year: Optional[int] = None, limit: int = 1000, keyword: str = None) -> List[Dict]:
+    def collect_papers(self, category: str = None, days_back: int = None, year: Optional[int] = None, limit: int = 1000, keyword: str = None, use_index: bool = True, workers: int = 1, use_cache: bool = False, skip_unchanged: bool = False) -> List[Paper]:
         papers = self.dataset_collector.collect_from_dataset(
             category=category,
             year=year,
             limit=limit,
-            keyword=keyword
+            keyword=keyword,
+            use_index=use_index,
+            workers=workers,
+            use_cache=use_cache,
+            skip_unchanged=skip_unchanged
         )
         return papers
     
+    def iter_papers(self, category: str = None, year: Optional[int] = None, limit: int = 1000, keyword: str = None, use_index: bool = True, workers: int = 1, use_cache: bool = False, skip_unchanged: bool = False) -> Iterator[Paper]:
+        """Stream papers one at a time instead of building the full list"""
+        return self.dataset_collector.iter_from_dataset(
+            category=category,
+            year=year,
+            limit=limit,
+            keyword=keyword,
+            use_index=use_index,
+            workers=workers,
+            use_cache=use_cache,
+            skip_unchanged=skip_unchanged
+        )
+    
+    def snapshot_delta(self, category: str = None, year: Optional[int] = None, keyword: str = None) -> SnapshotDelta:
+        """Changes since the last delta run with the same filters (see SnapshotDelta)"""
+        return self.dataset_collector.snapshot_delta(category=category, year=year, keyword=keyword)
+    
+    def collect_changes(self, changes: SnapshotChanges, category: str = None, year: Optional[int] = None, keyword: str = None) -> List[Paper]:
+        return self.dataset_collector.collect_changes(changes, category=category, year=year, keyword=keyword)
     
-    def save_raw_data(self, papers: List[Dict], category: str):
+    def save_raw_data(self, papers: List[Paper], category: str, compression: Optional[str] = config.INTERMEDIATE_COMPRESSION):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{config.DATA_DIR}/dataset_{category}_{timestamp}.json"
+        filename = output_path(f"{config.DATA_DIR}/dataset_{category}_{timestamp}", 'ndjson', compression)
         
-        with open(filename, 'w') as f:
-            json.dump(papers, f, indent=2)
+        count = write_records(filename, papers)
         
-        print(f"Saved {len(papers)} papers to {filename}")
+        print(f"Saved {count} papers to {filename}")
         return filename
     
-    def get_dataset_stats(self) -> Dict:
+    def open_raw_writer(self, category: str, compression: Optional[str] = config.INTERMEDIATE_COMPRESSION) -> 'RawDataWriter':
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return RawDataWriter(output_path(f"{config.DATA_DIR}/dataset_{category}_{timestamp}", 'ndjson', compression))
+    
+    def get_dataset_stats(self, workers: int = 1) -> Dict:
         """Get dataset statistics if using Kaggle dataset"""
         if self.dataset_collector:
-            return self.dataset_collector.get_dataset_stats()
-        return {}
\ No newline at end of file
+            return self.dataset_collector.get_dataset_stats(workers=workers)
+        return {}
+
+
+class RawDataWriter(NDJSONWriter):
+    """Writes raw papers as NDJSON one batch at a time"""
+    
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        print(f"Saved {self.count} papers to {self.path}")
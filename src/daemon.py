@@ -0,0 +1,230 @@
+"""
+Long-running scheduler for recurring ingestion (`main.py --daemon`)
+
+A cron job pays the cold start on every run: imports, a fresh OpenSearch
+connection and index check, a new S3 client and a new process pool.
+The daemon pays it once. WarmClients keeps those alive between runs and the
+pipelines borrow them instead of building their own.
+"""
+import asyncio
+import json
+import os
+import re
+import signal
+import time
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, List, Optional
+
+import schedule
+
+import config
+from src.async_storage import AsyncStorageManager
+from src.parallel_scan import get_pool, shutdown_pool
+from src.processor_parallel import load_tuning
+from src.run_history import locked
+from src.storage import SEARCH_BACKENDS, StorageManager, get_shipper
+
+MODES = ('batch', 'stream', 'delta')
+COMPRESSIONS = (None, 'gzip', 'zstd')
+
+
+@dataclass
+class Job:
+    """One scheduled pipeline run: filters, pipeline mode and either an interval or a daily time"""
+    name: Optional[str] = None
+    mode: str = 'batch'
+    category: Optional[str] = None
+    year: Optional[int] = None
+    keyword: Optional[str] = None
+    limit: int = config.DEFAULT_LIMIT
+    workers: int = 1
+    incremental: bool = False
+    processor: str = 'auto'
+    search_backend: str = config.SEARCH_BACKEND
+    compression: Optional[str] = config.INTERMEDIATE_COMPRESSION
+    use_index: bool = True
+    use_cache: bool = False
+    batch_size: int = config.STREAM_BATCH_SIZE
+    every_minutes: Optional[int] = None
+    at: Optional[str] = None
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown job mode: {self.mode}")
+        if self.search_backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend: {self.search_backend}")
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {self.compression}")
+        if self.every_minutes and self.at:
+            raise ValueError(f"Job {self.name}: set every_minutes or at, not both")
+        if not self.at:
+            self.every_minutes = self.every_minutes or config.DAEMON_INTERVAL_MINUTES
+        if not self.name:
+            filters = [str(value) for value in (self.category, self.year, self.keyword) if value]
+            self.name = '_'.join([self.mode] + (filters or ['all']))
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'Job':
+        unknown = set(entry) - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown job settings: {', '.join(sorted(unknown))}")
+        return cls(**entry)
+
+    def pipeline_kwargs(self) -> Dict:
+        kwargs = {
+            'category': self.category, 'year': self.year, 'keyword': self.keyword, 'incremental': self.incremental,
+            'processor_name': self.processor, 'search_backend': self.search_backend, 'compression': self.compression
+        }
+        if self.mode != 'delta':
+            # A delta run takes every change, whatever the limit, and always reads through the index
+            kwargs.update(limit=self.limit, workers=self.workers, use_index=self.use_index, use_cache=self.use_cache)
+        if self.mode == 'stream':
+            kwargs.update(batch_size=self.batch_size)
+        return kwargs
+
+    def describe(self) -> str:
+        when = f"daily at {self.at}" if self.at else f"every {self.every_minutes} minutes"
+        return f"{self.name} ({self.mode}, {when})"
+
+
+def load_jobs(path: str = config.DAEMON_JOBS_FILE, default: Optional[Job] = None) -> List[Job]:
+    """Jobs from a JSON list of Job settings; `default` alone when the file does not exist"""
+    if not os.path.exists(path):
+        if default is None:
+            raise FileNotFoundError(f"No daemon jobs file: {path}")
+        return [default]
+    with open(path, 'r') as f:
+        jobs = [Job.from_dict(entry) for entry in json.load(f)]
+    names = [job.name for job in jobs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate job names in {path}: {', '.join(duplicates)}")
+    return jobs
+
+
+class WarmClients:
+    """Storage managers, S3 client and process pools (processing and dataset scans) kept alive from one run to the next
+
+    Async managers live on one event loop for the whole process, since their
+    aiohttp sessions cannot move between loops; pipelines run their storage
+    step with `run`. A manager that did not reach OpenSearch is rebuilt on
+    the next run, so the daemon reconnects once the service is back.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.storages = {}
+        self.async_storages = {}
+
+    def run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def storage(self, incremental: bool, search_backend: str) -> StorageManager:
+        key = (incremental, search_backend)
+        storage = self.storages.get(key)
+        if storage is None or (search_backend != 'local' and not storage.opensearch):
+            storage = self.storages[key] = StorageManager(incremental=incremental, search_backend=search_backend)
+        return storage
+
+    async def async_storage(self, incremental: bool, search_backend: str) -> AsyncStorageManager:
+        key = (incremental, search_backend)
+        storage = self.async_storages.get(key)
+        if storage is None or (search_backend != 'local' and not storage.opensearch):
+            storage = self.async_storages[key] = await AsyncStorageManager(incremental=incremental, search_backend=search_backend).__aenter__()
+        return storage
+
+    def warm_up(self, jobs: List[Job]):
+        """Connect everything the jobs will use before the first one runs"""
+        get_shipper().manager
+        tuning = load_tuning()
+        if tuning['workers'] > 1 and any(
+            job.processor == 'parallel' or (job.processor == 'auto' and tuning['min_parallel_papers'] is not None)
+            for job in jobs
+        ):
+            get_pool(tuning['workers'])
+        # Dataset scans with --workers share the same pools
+        for workers in {job.workers for job in jobs if job.workers > 1 and job.mode != 'delta' and not job.use_cache}:
+            get_pool(workers)
+        for job in jobs:
+            if job.mode == 'stream':
+                self.storage(job.incremental, job.search_backend)
+            else:
+                self.run(self.async_storage(job.incremental, job.search_backend))
+
+    def close(self):
+        for storage in self.async_storages.values():
+            self.run(storage.close())
+        self.loop.close()
+        for storage in self.storages.values():
+            if storage.opensearch:
+                storage.opensearch.close()
+        get_shipper().shutdown()
+        shutdown_pool()
+
+
+class Daemon:
+    """Runs each job once at startup, then on its schedule, until SIGTERM or Ctrl-C
+
+    Jobs run one at a time in the main thread; a job that overruns its
+    interval is not started again until it finishes. Each job also holds a
+    non-blocking lock file while it runs, so a second daemon with the same
+    job skips it instead of ingesting the same papers concurrently.
+    """
+
+    def __init__(self, jobs: List[Job], pipelines: Dict[str, Callable], clients: Optional[WarmClients] = None):
+        self.jobs = jobs
+        self.pipelines = pipelines
+        self.clients = clients or WarmClients()
+        self.scheduler = schedule.Scheduler()
+        self.stopping = False
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            raise KeyboardInterrupt
+        self.stopping = True
+        print("\nDaemon stopping after the current job (signal again to abort it)")
+
+    def lock_path(self, job: Job) -> str:
+        return os.path.join(config.DATA_DIR, f"daemon_{re.sub(r'[^A-Za-z0-9.-]+', '_', job.name)}")
+
+    def run_job(self, job: Job) -> bool:
+        """Run one job unless another process is already running it; True if it completed"""
+        if self.stopping:
+            return False
+        with locked(self.lock_path(job), blocking=False) as acquired:
+            if not acquired:
+                print(f"Skipping job {job.name}: already running in another process")
+                return False
+            print(f"\nDaemon: starting job {job.describe()}")
+            start = time.perf_counter()
+            try:
+                self.pipelines[job.mode](**job.pipeline_kwargs(), clients=self.clients)
+            except Exception as e:
+                # The pipeline has already recorded the failed run; the daemon keeps going
+                print(f"Daemon: job {job.name} failed: {e}")
+                return False
+            print(f"Daemon: job {job.name} finished in {time.perf_counter() - start:.1f}s")
+            return True
+
+    def schedule_jobs(self):
+        for job in self.jobs:
+            every = self.scheduler.every().day.at(job.at) if job.at else self.scheduler.every(job.every_minutes).minutes
+            every.do(self.run_job, job).tag(job.name)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        print(f"Daemon started with {len(self.jobs)} jobs:")
+        for job in self.jobs:
+            print(f"  - {job.describe()}")
+        try:
+            self.clients.warm_up(self.jobs)
+            self.schedule_jobs()
+            for job in self.jobs:
+                self.run_job(job)
+            while not self.stopping:
+                self.scheduler.run_pending()
+                time.sleep(1)
+        finally:
+            self.clients.close()
+            print("Daemon stopped")
@@ -1,13 +1,24 @@
-import json
+import itertools
 import os
-from typing import List, Dict, Optional
+import sys
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime
 from tqdm import tqdm
 import config
+from src.codec import loads
+from src.dataset_index import DatasetIndex
+from src.dataset_stats import DatasetStats, StatsCache
+from src.index_ledger import IndexLedger
+from src.paper_filter import PaperFilter
+from src.parallel_scan import ParallelScanner
+from src.parquet_cache import ParquetCache
+from src.schema import Paper
+from src.snapshot_delta import SnapshotChanges, SnapshotDelta
 
 class DatasetCollector:
     def __init__(self):
         self.metadata_file = os.path.join(config.DATA_DIR, "kaggle_arxiv", "arxiv-metadata-oai-snapshot.json")
+        self.index = DatasetIndex(self.metadata_file)
     
     def check_dataset(self) -> bool:
         """Check if dataset exists"""
@@ -21,113 +32,211 @@ class DatasetCollector:
         category: Optional[str] = None,
         year: Optional[int] = None,
         limit: int = 1000,
-        keyword: Optional[str] = None
-    ) -> List[Dict]:
+        keyword: Optional[str] = None,
+        use_index: bool = True,
+        workers: int = 1,
+        use_cache: bool = False,
+        skip_unchanged: bool = False
+    ) -> List[Paper]:
         """Collect papers from dataset with filters"""
+        papers = list(self.iter_from_dataset(
+            category=category,
+            year=year,
+            limit=limit,
+            keyword=keyword,
+            use_index=use_index,
+            workers=workers,
+            use_cache=use_cache,
+            skip_unchanged=skip_unchanged
+        ))
+        
+        print(f"Collected {len(papers)} papers")
+        return papers
+    
+    def iter_from_dataset(
+        self, 
+        category: Optional[str] = None,
+        year: Optional[int] = None,
+        limit: int = 1000,
+        keyword: Optional[str] = None,
+        use_index: bool = True,
+        workers: int = 1,
+        use_cache: bool = False,
+        skip_unchanged: bool = False
+    ) -> Iterator[Paper]:
+        """Yield transformed papers one at a time, stopping after `limit`
+        
+        With skip_unchanged, papers whose update_date and version count match the
+        index ledger are dropped before they count towards the limit.
+        """
+        matches = self._iter_matches(
+            category=category,
+            year=year,
+            limit=sys.maxsize if skip_unchanged else limit,
+            keyword=keyword,
+            use_index=use_index,
+            workers=workers,
+            use_cache=use_cache
+        )
+        
+        if skip_unchanged:
+            ledger = IndexLedger()
+            matches = (
+                paper for paper in matches
+                if not ledger.is_unchanged(paper.arxiv_id, paper.updated, len(paper.versions) or 1)
+            )
         
+        yield from itertools.islice(matches, limit)
+    
+    def _iter_matches(
+        self, 
+        category: Optional[str],
+        year: Optional[int],
+        limit: int,
+        keyword: Optional[str],
+        use_index: bool,
+        workers: int,
+        use_cache: bool
+    ) -> Iterator[Paper]:
         if not self.check_dataset():
             raise FileNotFoundError("Dataset not found")
         
-        papers = []
+        if use_cache:
+            cache = ParquetCache(self.metadata_file, config.PARQUET_CACHE_DIR)
+            source = cache.iter_papers(category=category, year=year, keyword=keyword)
+            yield from itertools.islice(source, limit)
+            return
+        
+        paper_filter = PaperFilter(category=category, year=year, keyword=keyword)
+        indexed = use_index and (category or year)
+        
+        offsets = None
+        if indexed:
+            # Seek straight to candidate lines instead of scanning the whole file
+            offsets = self.index.lookup(category=category, year=year)
+            print(f"Index matched {len(offsets):,} candidate papers")
+        
+        if workers > 1:
+            yield from ParallelScanner(self.metadata_file, workers).iter_collect(paper_filter, limit, offsets=offsets)
+            return
         
-        with open(self.metadata_file, 'r', encoding='utf-8') as f:
+        collected = 0
+        
+        with open(self.metadata_file, 'rb') as f:
+            if indexed:
+                lines = self.index.iter_lines(f, offsets)
+            else:
+                lines = f
+            
             pbar = tqdm(desc="Collecting papers", unit=" papers")
             
-            for line in f:
+            for line in lines:
                 # Stop if we have enough
-                if len(papers) >= limit:
+                if collected >= limit:
                     break
                 
+                # Reject on the raw bytes first; only plausible lines are decoded
+                if not paper_filter.prefilter(line):
+                    continue
+                
                 try:
-                    paper = json.loads(line)
+                    paper = loads(line)
                     
-                    # Apply filters
-                    if category and category not in paper.get('categories', ''):
+                    if not paper_filter.matches(paper):
                         continue
                     
-                    if keyword:
-                        text = (paper.get('title', '') + ' ' + paper.get('abstract', '')).lower()
-                        if keyword.lower() not in text:
-                            continue
-                    
-                    if year:
-                        # Simple year check in versions
-                        versions = paper.get('versions', [])
-                        if versions and str(year) not in str(versions[0].get('created', '')):
-                            continue
-                    
-                    # Transform and add
-                    papers.append(self._transform_paper(paper))
-                    pbar.update(1)
-                    pbar.set_postfix({'collected': len(papers)})
-                    
+                    # Transform
+                    transformed = self._transform_paper(paper)
                 except:
                     continue
+                
+                collected += 1
+                pbar.update(1)
+                pbar.set_postfix({'collected': collected})
+                yield transformed
             
             pbar.close()
+    
+    def snapshot_delta(self, category: Optional[str] = None, year: Optional[int] = None, keyword: Optional[str] = None) -> SnapshotDelta:
+        if not self.check_dataset():
+            raise FileNotFoundError("Dataset not found")
+        return SnapshotDelta(self.index, category=category, year=year, keyword=keyword)
+    
+    def collect_changes(
+        self,
+        changes: SnapshotChanges,
+        category: Optional[str] = None,
+        year: Optional[int] = None,
+        keyword: Optional[str] = None
+    ) -> List[Paper]:
+        """Decode only the added and updated lines of a snapshot delta, applying the usual filters
         
-        print(f"Collected {len(papers)} papers")
+        An updated paper that no longer passes them (e.g. its abstract lost the
+        keyword) is appended to `changes.removed`, so its old version is deleted.
+        """
+        paper_filter = PaperFilter(category=category, year=year, keyword=keyword)
+        offsets = changes.offsets
+        updated = set(changes.updated.tolist())
+        papers = []
+        dropped = 0
+        
+        with open(self.metadata_file, 'rb') as f:
+            lines = zip(offsets, self.index.iter_lines(f, offsets))
+            for offset, line in tqdm(lines, total=len(offsets), desc="Collecting changes", unit=" papers"):
+                try:
+                    paper = loads(line) if paper_filter.prefilter(line) or offset in updated else None
+                    if paper is not None and paper_filter.matches(paper):
+                        papers.append(self._transform_paper(paper))
+                    elif offset in updated:
+                        changes.removed.append(paper['id'])
+                        dropped += 1
+                except:
+                    continue
+        
+        if dropped:
+            print(f"{dropped} updated papers no longer match the filters and will be removed")
+        print(f"Collected {len(papers)} added or updated papers")
         return papers
     
-    def _transform_paper(self, paper: Dict) -> Dict:
+    @staticmethod
+    def _transform_paper(paper: Dict) -> Paper:
         """Transform to standard format"""
-        # Parse authors
-        authors = paper.get('authors', '')
-        if isinstance(authors, str):
-            authors = [a.strip() for a in authors.replace(' and ', ', ').split(',') if a.strip()]
-        
-        # Parse categories
-        categories = paper.get('categories', '').split()
-        
-        # Get first version date
-        versions = paper.get('versions', [])
-        published = versions[0].get('created') if versions else None
-        
-        return {
-            'arxiv_id': paper.get('id', ''),
-            'title': paper.get('title', '').replace('\n', ' ').strip(),
-            'abstract': paper.get('abstract', '').replace('\n', ' ').strip(),
-            'authors': authors,
-            'categories': categories,
-            'primary_category': categories[0] if categories else '',
-            'published': published,
-            'updated': paper.get('update_date'),
-            'doi': paper.get('doi'),
-            'journal-ref': paper.get('journal-ref'),
-            'comments': paper.get('comments'),
-            'versions': versions,
-            'authors_parsed': paper.get('authors_parsed', [])
-        }
+        return Paper.from_raw(paper)
     
-    def get_dataset_stats(self) -> Dict:
-        """Get basic dataset statistics"""
+    def get_dataset_stats(self, workers: int = 1) -> Dict:
+        """Get basic dataset statistics, from the stats cache when it is up to date"""
         if not self.check_dataset():
             return {}
         
-        print("Calculating dataset statistics...")
+        cache = StatsCache(self.metadata_file)
+        stats = cache.load()
         
-        total = 0
-        categories = {}
+        if stats is None:
+            print("Calculating dataset statistics...")
+            signature = cache.signature()
+            if self.index.is_valid():
+                # The index already holds categories and years; no need to decode the snapshot
+                stats = self.index.stats()
+            elif workers > 1:
+                stats = ParallelScanner(self.metadata_file, workers).count_stats()
+            else:
+                stats = self._count_stats()
+            cache.save(stats, signature)
         
-        with open(self.metadata_file, 'r', encoding='utf-8') as f:
+        summary = stats.summary()
+        summary['file_size_mb'] = os.path.getsize(self.metadata_file) / (1024 * 1024)
+        return summary
+    
+    def _count_stats(self) -> DatasetStats:
+        """Single-process scan counting papers per category, subcategory and year"""
+        stats = DatasetStats()
+        
+        with open(self.metadata_file, 'rb') as f:
             for line in tqdm(f, desc="Scanning"):
                 try:
-                    paper = json.loads(line)
-                    total += 1
-                    
-                    # Count categories
-                    for cat in paper.get('categories', '').split():
-                        main_cat = cat.split('.')[0]
-                        categories[main_cat] = categories.get(main_cat, 0) + 1
-                        
-                except:
+                    paper = loads(line)
+                except ValueError:
                     continue
+                stats.add(paper.get('categories', ''), DatasetIndex._first_version_year(paper))
         
-        # Top 10 categories
-        top_categories = dict(sorted(categories.items(), key=lambda x: x[1], reverse=True)[:10])
-        
-        return {
-            'total_papers': total,
-            'categories': top_categories,
-            'file_size_mb': os.path.getsize(self.metadata_file) / (1024 * 1024)
-        }
\ No newline at end of file
+        return stats
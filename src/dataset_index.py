@@ -0,0 +1,180 @@
+"""
+Byte-offset sidecar index for the Kaggle arXiv snapshot
+"""
+import json
+import os
+import re
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+from tqdm import tqdm
+
+from src.codec import loads
+from src.dataset_stats import DatasetStats, StatsCache
+from src.paper_filter import category_matches, category_regex
+
+INDEX_VERSION = 2
+
+YEAR_PATTERN = re.compile(r'\b(\d{4})\b')
+
+
+class DatasetIndex:
+    """Maps every snapshot line to its arxiv_id, update_date, categories, first-version year and byte offset.
+
+    File layout: one JSON header line with the snapshot size/mtime, then one
+    tab-separated line per paper: offset, year, arxiv_id, update_date, categories.
+    The first category is the primary one.
+    """
+
+    def __init__(self, metadata_file: str, index_file: Optional[str] = None):
+        self.metadata_file = metadata_file
+        self.index_file = index_file or f"{metadata_file}.idx"
+        self.offsets = None
+        self.years = None
+        self.categories = None
+
+    def _signature(self) -> Dict:
+        stat = os.stat(self.metadata_file)
+        return {
+            'version': INDEX_VERSION,
+            'size': stat.st_size,
+            'mtime': int(stat.st_mtime)
+        }
+
+    def is_valid(self) -> bool:
+        """Check the sidecar exists and matches the snapshot's size and mtime"""
+        if not os.path.exists(self.index_file):
+            return False
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            return False
+        return header == self._signature()
+
+    def ensure(self):
+        """Build the index if missing or stale, then load it"""
+        if not self.is_valid():
+            self.build()
+        if self.offsets is None:
+            self.load()
+
+    def build(self):
+        """One full pass over the snapshot, writing the sidecar atomically
+
+        The dataset statistics cache is filled in the same pass.
+        """
+        print(f"Building dataset index: {self.index_file}")
+        signature = self._signature()
+        stats_cache = StatsCache(self.metadata_file)
+        stats_signature = stats_cache.signature()
+        stats = DatasetStats()
+        tmp_file = f"{self.index_file}.tmp"
+
+        with open(self.metadata_file, 'rb') as src, open(tmp_file, 'w', encoding='utf-8') as out:
+            out.write(json.dumps(signature) + '\n')
+            pbar = tqdm(total=signature['size'], desc="Indexing", unit="B", unit_scale=True)
+
+            offset = 0
+            for line in src:
+                line_offset = offset
+                offset += len(line)
+                pbar.update(len(line))
+                try:
+                    paper = loads(line)
+                except ValueError:
+                    continue
+
+                year = self._first_version_year(paper)
+                categories = paper.get('categories', '')
+                out.write(f"{line_offset}\t{year}\t{paper.get('id', '')}\t{paper.get('update_date') or ''}\t{categories}\n")
+                stats.add(categories, year)
+
+            pbar.close()
+
+        os.replace(tmp_file, self.index_file)
+        stats_cache.save(stats, stats_signature)
+        self.offsets = None
+
+    def load(self):
+        """Load offsets, years and categories into compact arrays"""
+        offsets = array('q')
+        years = array('H')
+        categories = []
+        interned = {}
+
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            f.readline()
+            for line in f:
+                offset, year, _, _, cats = line.rstrip('\n').split('\t', 4)
+                offsets.append(int(offset))
+                years.append(int(year))
+                categories.append(interned.setdefault(cats, cats))
+
+        self.offsets = offsets
+        self.years = years
+        self.categories = categories
+
+    def lookup(self, category: Optional[str] = None, year: Optional[int] = None) -> List[int]:
+        """Return byte offsets of papers that pass the category/year filters, in file order"""
+        self.ensure()
+
+        matches = []
+        for offset, paper_year, cats in zip(self.offsets, self.years, self.categories):
+            if category and not category_matches(category, cats):
+                continue
+            # Papers without versions are not excluded by the year filter
+            if year and paper_year and paper_year != year:
+                continue
+            matches.append(offset)
+        return matches
+
+    def stats(self) -> DatasetStats:
+        """Dataset statistics from the loaded index, without decoding the snapshot"""
+        self.ensure()
+        stats = DatasetStats()
+        for year, cats in zip(self.years, self.categories):
+            stats.add(cats, year)
+        return stats
+
+    def fingerprints(self, category: Optional[str] = None, year: Optional[int] = None) -> pa.Table:
+        """offset, arxiv_id and update_date of the papers passing the category/year filters, read straight from the sidecar
+
+        Same rules as `lookup`, applied as Arrow filters over the whole column.
+        """
+        if not self.is_valid():
+            self.build()
+        table = csv.read_csv(
+            self.index_file,
+            read_options=csv.ReadOptions(skip_rows=1, column_names=['offset', 'year', 'arxiv_id', 'update_date', 'categories']),
+            parse_options=csv.ParseOptions(delimiter='\t', quote_char=False),
+            convert_options=csv.ConvertOptions(
+                include_columns=['offset', 'year', 'arxiv_id', 'update_date', 'categories'],
+                # Ids like 0704.0010 must stay strings
+                column_types={'offset': pa.int64(), 'year': pa.int32(), 'arxiv_id': pa.string(),
+                              'update_date': pa.string(), 'categories': pa.string()}
+            )
+        )
+        if category:
+            table = table.filter(pc.match_substring_regex(table['categories'], category_regex(category)))
+        if year:
+            # Papers without versions are not excluded by the year filter
+            table = table.filter(pc.is_in(table['year'], pa.array([year, 0], pa.int32())))
+        return table.select(['offset', 'arxiv_id', 'update_date'])
+
+    def iter_lines(self, f, offsets: List[int]) -> Iterator[bytes]:
+        """Seek to each offset in a binary handle and yield the raw line"""
+        for offset in offsets:
+            f.seek(offset)
+            yield f.readline()
+
+    @staticmethod
+    def _first_version_year(paper: Dict) -> int:
+        versions = paper.get('versions') or []
+        if not versions:
+            return 0
+        match = YEAR_PATTERN.search(str(versions[0].get('created', '')))
+        return int(match.group(1)) if match else 0
@@ -0,0 +1,97 @@
+"""
+Per-category, per-subcategory and per-year counts of the snapshot, cached next to it
+"""
+import json
+import os
+from collections import Counter
+from typing import Dict, Optional
+
+STATS_VERSION = 1
+
+
+class DatasetStats:
+    """Mergeable counters: each scan shard fills its own instance and they are combined with `merge`"""
+
+    def __init__(self):
+        self.total = 0
+        self.categories = Counter()
+        self.subcategories = Counter()
+        self.years = Counter()
+
+    def add(self, categories: str, year: int):
+        """Count one paper from its raw categories string and first-version year (0 if unknown)"""
+        self.total += 1
+        for cat in categories.split():
+            self.subcategories[cat] += 1
+            self.categories[cat.split('.')[0]] += 1
+        if year:
+            self.years[year] += 1
+
+    def merge(self, other: 'DatasetStats') -> 'DatasetStats':
+        self.total += other.total
+        self.categories.update(other.categories)
+        self.subcategories.update(other.subcategories)
+        self.years.update(other.years)
+        return self
+
+    def summary(self, top: int = 10) -> Dict:
+        """Top categories/subcategories and the most recent years, as printed by --stats"""
+        return {
+            'total_papers': self.total,
+            'categories': dict(self.categories.most_common(top)),
+            'subcategories': dict(self.subcategories.most_common(top)),
+            'years': dict(sorted(self.years.items())[-top:])
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'total': self.total,
+            'categories': dict(self.categories),
+            'subcategories': dict(self.subcategories),
+            'years': {str(year): count for year, count in self.years.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DatasetStats':
+        stats = cls()
+        stats.total = data['total']
+        stats.categories = Counter(data['categories'])
+        stats.subcategories = Counter(data['subcategories'])
+        stats.years = Counter({int(year): count for year, count in data['years'].items()})
+        return stats
+
+
+class StatsCache:
+    """`<snapshot>.stats.json`, valid while the snapshot's size and mtime are unchanged"""
+
+    def __init__(self, metadata_file: str, stats_file: Optional[str] = None):
+        self.metadata_file = metadata_file
+        self.stats_file = stats_file or f"{metadata_file}.stats.json"
+
+    def signature(self) -> Dict:
+        stat = os.stat(self.metadata_file)
+        return {
+            'version': STATS_VERSION,
+            'size': stat.st_size,
+            'mtime': int(stat.st_mtime)
+        }
+
+    def load(self) -> Optional[DatasetStats]:
+        """Cached stats, or None if missing or stale"""
+        if not os.path.exists(self.stats_file):
+            return None
+        try:
+            with open(self.stats_file, 'r') as f:
+                cached = json.load(f)
+            if cached.get('snapshot') != self.signature():
+                return None
+            return DatasetStats.from_dict(cached['stats'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, stats: DatasetStats, signature: Optional[Dict] = None):
+        """Write atomically; pass the signature taken before the scan started"""
+        tmp_file = f"{self.stats_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'snapshot': signature or self.signature(), 'stats': stats.to_dict()}, f)
+        os.replace(tmp_file, self.stats_file)
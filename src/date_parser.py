@@ -0,0 +1,101 @@
+"""
+Fast, memoized parsing of the date formats found in the arXiv snapshot
+
+Every result is a naive datetime in UTC.
+"""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+# "Mon, 2 Apr 2007 19:18:42 GMT" once the weekday is sliced off
+RFC2822_FORMAT = '%d %b %Y %H:%M:%S GMT'
+
+UTC_ZONES = {'GMT', 'UT', 'UTC', 'Z', '+0000', '-0000'}
+
+CACHE_SIZE = 1 << 16
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _parse_email(value: str) -> Optional[datetime]:
+    """Any RFC-2822 variant (other zones, no weekday or seconds, lowercase month)"""
+    try:
+        return _as_utc(parsedate_to_datetime(value))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _parse_rfc2822(value: str) -> Optional[datetime]:
+    """Split "Mon, 2 Apr 2007 19:18:42 GMT" by hand instead of going through strptime"""
+    try:
+        _, day, month, year, clock, zone = value.split()
+        hour, minute, second = clock.split(':')
+        if zone in UTC_ZONES:
+            return datetime(int(year), MONTHS[month], int(day), int(hour), int(minute), int(second))
+    except (ValueError, KeyError):
+        pass
+    return _parse_email(value)
+
+
+def _parse_iso(value: str) -> Optional[datetime]:
+    if len(value) == 4 and value.isdigit():
+        return datetime(int(value), 1, 1)
+    try:
+        return _as_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    except ValueError:
+        # "2 Apr 2007 19:18:42 GMT": RFC-2822 without the weekday
+        return _parse_email(value)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(value: Optional[str]) -> Optional[datetime]:
+    """Parse an arXiv date; None for missing or unrecognised values
+
+    The format is picked from the first character: versions[].created is
+    RFC-2822 ("Mon, ..."), update_date is ISO ("2008-11-13").
+    """
+    if not value:
+        return None
+    if value[0].isalpha():
+        return _parse_rfc2822(value)
+    return _parse_iso(value)
+
+
+def parse_dates(values: Iterable[Optional[str]]) -> List[Optional[datetime]]:
+    return [parse_date(value) for value in values]
+
+
+def parse_date_series(values: pd.Series) -> pd.Series:
+    """Parse a whole column at once; unparseable values become NaT
+
+    The format is detected from the first non-null value and handed to
+    `pd.to_datetime`; whatever that misses goes through `parse_date`.
+    """
+    text = values.where(values.notna(), None)
+    sample = text.dropna()
+    if sample.empty:
+        return pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    first = sample.iloc[0]
+    if first and first[0].isalpha():
+        parsed = pd.to_datetime(text.str.slice(5), format=RFC2822_FORMAT, errors='coerce')
+    else:
+        # Values with an offset are converted, naive ones taken as UTC already
+        parsed = pd.to_datetime(text, format='ISO8601', errors='coerce', utc=True).dt.tz_localize(None)
+
+    remaining = parsed.isna() & text.notna()
+    if remaining.any():
+        # .dt results are flagged as views; assign into a copy
+        parsed = parsed.copy()
+        parsed[remaining] = pd.array(parse_dates(text[remaining]), dtype='datetime64[ns]')
+    return parsed
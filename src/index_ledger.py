@@ -0,0 +1,69 @@
+"""
+Content-hash ledger of what has already been indexed, keyed by arxiv_id
+"""
+import hashlib
+import json
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+
+import config
+
+# Derived from the current date, so they change on every run without the paper changing
+VOLATILE_FIELDS = ('days_since_published',)
+
+
+class IndexLedger:
+    """SQLite table of arxiv_id -> (update_date, version_count, digest of the indexed _source)"""
+
+    def __init__(self, path: str = config.INDEX_LEDGER_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ledger ("
+            " arxiv_id TEXT PRIMARY KEY,"
+            " update_date TEXT,"
+            " version_count INTEGER,"
+            " digest TEXT)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def digest(doc: Dict) -> str:
+        stable = {k: v for k, v in doc.items() if k not in VOLATILE_FIELDS}
+        payload = json.dumps(stable, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, arxiv_id: str) -> Optional[Tuple[str, int, str]]:
+        return self.conn.execute(
+            "SELECT update_date, version_count, digest FROM ledger WHERE arxiv_id = ?", (arxiv_id,)
+        ).fetchone()
+
+    def is_unchanged(self, arxiv_id: str, update_date: Optional[str], version_count: int) -> bool:
+        """Cheap check on raw metadata, used by the collector before processing"""
+        entry = self.get(arxiv_id)
+        return entry is not None and entry[0] == str(update_date)[:10] and entry[1] == version_count
+
+    def is_indexed(self, arxiv_id: str, digest: str) -> bool:
+        entry = self.get(arxiv_id)
+        return entry is not None and entry[2] == digest
+
+    def record(self, entries: Iterable[Tuple[str, Optional[str], int, str]]):
+        """Store (arxiv_id, update_date, version_count, digest) for successfully indexed papers"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO ledger (arxiv_id, update_date, version_count, digest) VALUES (?, ?, ?, ?)",
+            ((arxiv_id, str(update_date)[:10] if update_date is not None else None, version_count, digest)
+             for arxiv_id, update_date, version_count, digest in entries)
+        )
+        self.conn.commit()
+
+    def remove(self, arxiv_ids: Iterable[str]):
+        self.conn.executemany("DELETE FROM ledger WHERE arxiv_id = ?", ((i,) for i in arxiv_ids))
+        self.conn.commit()
+
+    def clear(self):
+        """Forget everything, e.g. when the index is recreated"""
+        self.conn.execute("DELETE FROM ledger")
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM ledger").fetchone()[0]
@@ -0,0 +1,236 @@
+"""
+Versioned OpenSearch index profiles: explicit mappings for every processed field, served through an alias
+
+Papers live in a concrete index named `<alias>_v<version>`; everything reads
+and writes through the alias (config.OPENSEARCH_INDEX). A mapping change is
+a new profile version: IndexProfiles.reindex copies the papers into a new
+concrete index and swaps the alias atomically, so searches never see a gap.
+"""
+import copy
+from typing import Dict, Optional, Tuple
+
+from opensearchpy.exceptions import NotFoundError
+
+import config
+
+# Shown in search results but never searched, sorted or aggregated: kept in _source only
+DISPLAY_ONLY = {"type": "keyword", "index": False, "doc_values": False}
+# Kept for aggregations and sorting, never queried by value
+METRIC = {"type": "integer", "index": False}
+# Nested structures that are only displayed; not parsed at all
+OPAQUE = {"type": "object", "enabled": False}
+
+PROFILES = {
+    # What StorageManager used to create: 7 fields, the rest mapped dynamically on first write
+    1: {
+        "properties": {
+            "arxiv_id": {"type": "keyword"},
+            "title": {"type": "text"},
+            "abstract": {"type": "text"},
+            "authors": {"type": "keyword"},
+            "primary_category": {"type": "keyword"},
+            "year": {"type": "integer"},
+            "keywords": {"type": "keyword"}
+        }
+    },
+    # Every processed column (schema.PROCESSED_DTYPES), nothing dynamic
+    2: {
+        "dynamic": "strict",
+        "properties": {
+            "arxiv_id": {"type": "keyword"},
+            "title": {"type": "text"},
+            "abstract": {"type": "text"},
+            "authors": {"type": "keyword"},
+            "author_count": {"type": "short"},
+            "categories": {"type": "keyword"},
+            "primary_category": {"type": "keyword"},
+            "published_date": {"type": "date"},
+            "updated_date": {"type": "date"},
+            "year": {"type": "short"},
+            "month": {"type": "byte"},
+            "version_count": {"type": "short"},
+            "versions": OPAQUE,
+            "first_version_date": DISPLAY_ONLY,
+            "last_version_date": DISPLAY_ONLY,
+            "journal_ref": DISPLAY_ONLY,
+            "doi": {"type": "keyword", "doc_values": False},
+            "comments": DISPLAY_ONLY,
+            "institutions": {"type": "keyword"},
+            "author_affiliations": OPAQUE,
+            "publication_date": {"type": "date"},
+            "publication_type": {"type": "keyword"},
+            "citation_count": {"type": "integer"},
+            "keywords": {"type": "keyword"},
+            "title_length": METRIC,
+            "abstract_length": METRIC,
+            "is_collaborative": {"type": "boolean"},
+            "is_interdisciplinary": {"type": "boolean"},
+            "days_since_published": METRIC
+        }
+    }
+}
+CURRENT_VERSION = max(PROFILES)
+
+
+def index_name(version: int = CURRENT_VERSION, alias: str = config.OPENSEARCH_INDEX) -> str:
+    return f"{alias}_v{version}"
+
+
+def index_settings() -> Dict:
+    return {
+        "number_of_shards": config.OPENSEARCH_SHARDS,
+        "number_of_replicas": config.OPENSEARCH_REPLICAS,
+        "refresh_interval": config.OPENSEARCH_REFRESH_INTERVAL,
+        "codec": config.OPENSEARCH_CODEC
+    }
+
+
+def index_body(version: int = CURRENT_VERSION, alias: Optional[str] = config.OPENSEARCH_INDEX) -> Dict:
+    """Create-index body for a profile; with `alias`, the index is created already behind it"""
+    mappings = copy.deepcopy(PROFILES[version])
+    mappings["_meta"] = {"profile_version": version}
+    body = {"settings": {"index": index_settings()}, "mappings": mappings}
+    if alias:
+        body["aliases"] = {alias: {}}
+    return body
+
+
+def profile_version(mappings: Dict) -> int:
+    """Profile version recorded in an index's mappings; pre-profile indexes count as 1"""
+    return mappings.get("_meta", {}).get("profile_version", 1)
+
+
+def created(alias: str):
+    print(f"Created index: {index_name(CURRENT_VERSION, alias)} (alias {alias})")
+
+
+def warn_if_outdated(current: Tuple[str, int]):
+    concrete, version = current
+    if version < CURRENT_VERSION:
+        print(f"Index {concrete} uses profile v{version} (current v{CURRENT_VERSION}); run with --reindex to migrate")
+
+
+class IndexProfiles:
+    """Creates, inspects and migrates the concrete index behind the alias"""
+
+    def __init__(self, client, alias: str = config.OPENSEARCH_INDEX):
+        self.client = client
+        self.alias = alias
+
+    def current(self) -> Optional[Tuple[str, int]]:
+        """(concrete index, profile version) behind the alias, or None when there is none
+
+        An index created before profiles existed carries the alias name itself
+        and no version; it counts as profile 1.
+        """
+        try:
+            concrete = next(iter(self.client.indices.get_alias(name=self.alias)))
+        except NotFoundError:
+            if not self.client.indices.exists(index=self.alias):
+                return None
+            concrete = self.alias
+        return concrete, profile_version(self.client.indices.get_mapping(index=concrete)[concrete]["mappings"])
+
+    def ensure(self) -> bool:
+        """Create the current profile's index behind the alias if nothing is there; True if created"""
+        current = self.current()
+        if current is None:
+            self.client.indices.create(index=index_name(CURRENT_VERSION, self.alias), body=index_body(CURRENT_VERSION, self.alias))
+            created(self.alias)
+            return True
+        warn_if_outdated(current)
+        return False
+
+    def _copy(self, source: str, target: str) -> Dict:
+        """Reindex with external versions: a paper is only written if the target's copy is older"""
+        return self.client.reindex(
+            body={"conflicts": "proceed", "source": {"index": source}, "dest": {"index": target, "version_type": "external"}},
+            wait_for_completion=True, request_timeout=3600
+        )
+
+    def _block_writes(self, index: str, blocked: bool):
+        self.client.indices.put_settings(index=index, body={"index": {"blocks.write": blocked}})
+
+    def reindex(self, version: int = CURRENT_VERSION, delete_old: bool = True) -> Dict:
+        """Copy the papers into a new index with `version`'s profile and move the alias to it
+
+        The bulk copy runs with refresh and replicas off while writes through
+        the alias still land in the old index. The old index is then made
+        read-only and a second pass copies what changed meanwhile (newer
+        versions win, unchanged papers are skipped as conflicts) before the
+        alias moves. Writes during that short final pass are rejected (403)
+        and reported as failed, so the run can be repeated; deletions made
+        during the bulk copy are not carried over.
+        """
+        current = self.current()
+        target = index_name(version, self.alias)
+        if current is None:
+            self.ensure()
+            return {"source": None, "target": target, "copied": 0, "failures": []}
+        source, _ = current
+        if source == target:
+            print(f"Index {target} already uses profile v{version}")
+            return {"source": source, "target": target, "copied": 0, "failures": []}
+
+        body = index_body(version, alias=None)
+        final_settings = {key: body["settings"]["index"][key] for key in ("refresh_interval", "number_of_replicas")}
+        body["settings"]["index"].update(refresh_interval="-1", number_of_replicas=0)
+        self.client.indices.create(index=target, body=body)
+
+        copied = self._copy(source, target)
+        failures = list(copied.get("failures", []))
+
+        self._block_writes(source, True)
+        try:
+            caught_up = self._copy(source, target)
+            # Papers the mapping rejected in the first pass are rejected again; report them once
+            rejected = {failure.get("id") for failure in failures}
+            failures.extend(
+                failure for failure in caught_up.get("failures", [])
+                if failure.get("status") != 409 and failure.get("id") not in rejected
+            )
+
+            if source == self.alias:
+                # A pre-profile index named like the alias has to go in the same atomic update
+                actions = [{"remove_index": {"index": source}}, {"add": {"index": target, "alias": self.alias}}]
+            else:
+                actions = [{"remove": {"index": source, "alias": self.alias}}, {"add": {"index": target, "alias": self.alias}}]
+            self.client.indices.update_aliases(body={"actions": actions})
+        except Exception:
+            self._block_writes(source, False)
+            raise
+
+        if source != self.alias:
+            if delete_old:
+                self.client.indices.delete(index=source)
+            else:
+                self._block_writes(source, False)
+
+        self.client.indices.put_settings(index=target, body={"index": final_settings})
+        self.client.indices.refresh(index=target)
+        print(f"Reindexed {copied.get('total', 0)} papers from {source} into {target}; alias {self.alias} now points to {target}")
+        if failures:
+            print(f"  {len(failures)} papers were rejected by the new mapping")
+        return {"source": source, "target": target, "copied": copied.get("total", 0), "failures": failures}
+
+
+async def current_index_async(client, alias: str = config.OPENSEARCH_INDEX) -> Optional[Tuple[str, int]]:
+    """IndexProfiles.current for an AsyncOpenSearch client"""
+    try:
+        concrete = next(iter(await client.indices.get_alias(name=alias)))
+    except NotFoundError:
+        if not await client.indices.exists(index=alias):
+            return None
+        concrete = alias
+    return concrete, profile_version((await client.indices.get_mapping(index=concrete))[concrete]["mappings"])
+
+
+async def ensure_index_async(client, alias: str = config.OPENSEARCH_INDEX) -> bool:
+    """IndexProfiles.ensure for an AsyncOpenSearch client"""
+    current = await current_index_async(client, alias)
+    if current is None:
+        await client.indices.create(index=index_name(CURRENT_VERSION, alias), body=index_body(CURRENT_VERSION, alias))
+        created(alias)
+        return True
+    warn_if_outdated(current)
+    return False
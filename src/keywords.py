@@ -0,0 +1,139 @@
+"""
+Keyword extraction from title and abstract: term frequency or corpus-level TF-IDF
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+import config
+
+STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'in', 'on', 'to', 'for', 'of', 'with',
+    'is', 'are', 'was', 'were', 'be', 'we', 'our', 'this', 'that', 'these'
+})
+
+# Same tokens as the original re.sub(r'[^\w\s]', ' ', text).split()
+TOKEN_RE = re.compile(r'\w+')
+# ASCII-only text (nearly all of arXiv): punctuation -> space, then str.split, which beats the regex
+ASCII_PUNCTUATION = str.maketrans({
+    chr(c): ' ' for c in range(128) if not re.match(r'[\w\s]', chr(c))
+})
+
+MODES = ('frequency', 'tfidf')
+
+
+class KeywordExtractor:
+    """Top keywords per paper, with the title counted twice
+
+    `frequency` ranks by raw count (the original behaviour). `tfidf` weights
+    counts by inverse document frequency, using frequencies stored in
+    `df_file` by earlier runs plus every paper seen so far in this one.
+    A `frozen` extractor (a parallel worker) scores against the statistics
+    it loaded and keeps what it sees in `pending` for the parent to `merge`.
+    """
+
+    def __init__(self, mode: str = config.KEYWORD_MODE, df_file: str = config.KEYWORD_DF_FILE, frozen: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown keyword mode: {mode}")
+        self.mode = mode
+        self.df_file = df_file
+        self.frozen = frozen
+        self.documents = 0
+        self.doc_freq = Counter()
+        self.pending_documents = 0
+        self.pending = Counter()
+        self._dirty = False
+        if mode == 'tfidf':
+            self.load()
+
+    def _counts(self, title: str, abstract: str) -> Counter:
+        # Title twice, then abstract: ties keep this first-seen order
+        text = f"{title} {title} {abstract}".lower()
+        if text.isascii():
+            counts = Counter(text.translate(ASCII_PUNCTUATION).split())
+        else:
+            counts = Counter(TOKEN_RE.findall(text))
+        for word in [word for word in counts if len(word) < 2 or word in STOPWORDS]:
+            del counts[word]
+        return counts
+
+    def _top(self, counts: Counter, max_keywords: int) -> List[str]:
+        if self.mode == 'tfidf':
+            documents = self.documents
+            doc_freq = self.doc_freq
+            counts = {
+                word: count * (math.log((1 + documents) / (1 + doc_freq[word])) + 1)
+                for word, count in counts.items()
+            }
+        # sorted() is stable, so equal scores stay in first-seen order
+        return sorted(counts, key=counts.__getitem__, reverse=True)[:max_keywords]
+
+    def observe(self, counts: Iterable[Counter]):
+        """Add documents to the corpus statistics (to `pending` when frozen)"""
+        if self.frozen:
+            for doc_counts in counts:
+                self.pending.update(doc_counts.keys())
+                self.pending_documents += 1
+            return
+        for doc_counts in counts:
+            self.doc_freq.update(doc_counts.keys())
+            self.documents += 1
+        self._dirty = True
+
+    def take_pending(self) -> Tuple[int, Counter]:
+        """Documents and frequencies observed while frozen, cleared once taken"""
+        pending = (self.pending_documents, self.pending)
+        self.pending_documents = 0
+        self.pending = Counter()
+        return pending
+
+    def merge(self, documents: int, doc_freq: Counter):
+        """Add statistics observed elsewhere, e.g. by a frozen worker's extractor"""
+        if not documents:
+            return
+        self.documents += documents
+        self.doc_freq.update(doc_freq)
+        self._dirty = True
+
+    def extract(self, title: str, abstract: str, max_keywords: int = 5) -> List[str]:
+        counts = self._counts(title or '', abstract or '')
+        if self.mode == 'tfidf':
+            self.observe([counts])
+        return self._top(counts, max_keywords)
+
+    def extract_many(self, titles: Iterable[str], abstracts: Iterable[str], max_keywords: int = 5) -> List[List[str]]:
+        """Extract for a whole batch; in tfidf mode the batch is counted first so it sees its own frequencies"""
+        if self.mode != 'tfidf':
+            return [self._top(self._counts(title or '', abstract or ''), max_keywords) for title, abstract in zip(titles, abstracts)]
+
+        counts = [self._counts(title or '', abstract or '') for title, abstract in zip(titles, abstracts)]
+        self.observe(counts)
+        return [self._top(doc_counts, max_keywords) for doc_counts in counts]
+
+    def load(self):
+        if not os.path.exists(self.df_file):
+            return
+        try:
+            with open(self.df_file, 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            print(f"Ignoring unreadable keyword statistics: {self.df_file}")
+            return
+        self.documents = stored.get('documents', 0)
+        self.doc_freq = Counter(stored.get('doc_freq', {}))
+
+    def save(self):
+        """Persist document frequencies for later runs (only in tfidf mode, only if changed)"""
+        if self.mode != 'tfidf' or not self._dirty:
+            return
+        tmp_file = f"{self.df_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'documents': self.documents, 'doc_freq': self.doc_freq}, f)
+        os.replace(tmp_file, self.df_file)
+        self._dirty = False
+
+    def stats(self) -> Dict:
+        return {'mode': self.mode, 'documents': self.documents, 'vocabulary': len(self.doc_freq)}
@@ -0,0 +1,373 @@
+"""
+Embedded full-text search over processed papers: an on-disk inverted index with BM25 scoring
+
+The index is a list of immutable segments, one appended per indexed batch.
+Each segment holds a sorted term dictionary, postings (doc numbers and term
+frequencies), document lengths and a stored copy of the searchable fields,
+all as .npy files that are memory-mapped at query time. Re-indexing a paper
+marks its older copy as deleted in the segment's `live` bitmap; merging
+segments drops deleted documents.
+"""
+import json
+import os
+import shutil
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+from src.codec import loads
+from src.keywords import ASCII_PUNCTUATION, STOPWORDS, TOKEN_RE
+
+MANIFEST_VERSION = 1
+# Longer tokens are nearly always formulas or URLs; they are not indexed
+MAX_TERM_BYTES = 32
+# Fields kept in the segment's document store and returned by search()
+STORED_FIELDS = ('arxiv_id', 'title', 'abstract', 'authors', 'primary_category', 'year', 'keywords')
+
+# BM25 parameters (the Lucene/OpenSearch defaults)
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens, minus stopwords and one-character tokens"""
+    text = text.lower()
+    tokens = text.translate(ASCII_PUNCTUATION).split() if text.isascii() else TOKEN_RE.findall(text)
+    return [token for token in tokens if len(token) > 1 and token not in STOPWORDS]
+
+
+def _encode_term(term: str) -> Optional[bytes]:
+    encoded = term.encode('utf-8')
+    return encoded if len(encoded) <= MAX_TERM_BYTES else None
+
+
+def _save(path: str, array: np.ndarray):
+    with open(path, 'wb') as f:
+        np.save(f, array)
+
+
+class Segment:
+    """One immutable segment directory, memory-mapped"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.terms = self._load('terms.npy')
+        self.offsets = self._load('offsets.npy')
+        self.docs = self._load('postings_docs.npy')
+        self.tfs = self._load('postings_tfs.npy')
+        self.doc_lens = self._load('doc_lens.npy')
+        self.ids = self._load('ids.npy')
+        self.id_docs = self._load('id_docs.npy')
+        self.doc_offsets = self._load('doc_offsets.npy')
+        # The only mutable part; small enough to keep in memory
+        self.live = np.load(os.path.join(path, 'live.npy'))
+        self._refresh_totals()
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, name), mmap_mode='r')
+
+    def _refresh_totals(self):
+        self.live_count = int(self.live.sum())
+        self.live_length = int(self.doc_lens[self.live].sum()) if self.live_count else 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    def postings(self, term: bytes):
+        """(doc numbers, term frequencies) for a term, or None if the segment does not contain it"""
+        if len(term) > self.terms.dtype.itemsize:
+            return None
+        i = int(np.searchsorted(self.terms, term))
+        if i == len(self.terms) or self.terms[i] != term:
+            return None
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    def find(self, arxiv_ids: np.ndarray) -> np.ndarray:
+        """Doc numbers of the given (sorted, bytes) arxiv ids that are live in this segment"""
+        if not len(self.ids):
+            return np.empty(0, dtype=np.uint32)
+        positions = np.searchsorted(self.ids, arxiv_ids)
+        positions[positions == len(self.ids)] = 0
+        docs = self.id_docs[positions[self.ids[positions] == arxiv_ids]]
+        return docs[self.live[docs]]
+
+    def delete(self, docs: np.ndarray):
+        self.live[docs] = False
+        tmp_file = os.path.join(self.path, 'live.npy.tmp')
+        _save(tmp_file, self.live)
+        os.replace(tmp_file, os.path.join(self.path, 'live.npy'))
+        self._refresh_totals()
+
+    def document(self, doc: int) -> Dict:
+        with open(os.path.join(self.path, 'docs.ndjson'), 'rb') as f:
+            f.seek(int(self.doc_offsets[doc]))
+            return loads(f.readline())
+
+    def stored_lines(self):
+        """Raw stored-document lines of the live documents, in doc number order"""
+        with open(os.path.join(self.path, 'docs.ndjson'), 'rb') as f:
+            for doc, line in enumerate(f):
+                if self.live[doc]:
+                    yield line
+
+
+def _write_segment(path: str, terms: np.ndarray, offsets: np.ndarray, docs: np.ndarray, tfs: np.ndarray,
+                   doc_lens: np.ndarray, arxiv_ids: List[str], stored_lines: List[bytes]):
+    """Write a segment to a temporary directory and move it into place"""
+    tmp_dir = f"{path}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    ids = np.array([arxiv_id.encode('utf-8') for arxiv_id in arxiv_ids], dtype=bytes)
+    id_order = np.argsort(ids, kind='stable').astype(np.uint32)
+    doc_offsets = np.zeros(len(stored_lines), dtype=np.int64)
+    if stored_lines:
+        doc_offsets[1:] = np.cumsum([len(line) for line in stored_lines[:-1]])
+
+    arrays = {
+        'terms.npy': terms,
+        'offsets.npy': offsets.astype(np.int64),
+        'postings_docs.npy': docs.astype(np.uint32),
+        'postings_tfs.npy': tfs.astype(np.uint16),
+        'doc_lens.npy': doc_lens.astype(np.uint32),
+        'ids.npy': ids[id_order],
+        'id_docs.npy': id_order,
+        'doc_offsets.npy': doc_offsets,
+        'live.npy': np.ones(len(arxiv_ids), dtype=bool),
+    }
+    for name, array in arrays.items():
+        _save(os.path.join(tmp_dir, name), array)
+    with open(os.path.join(tmp_dir, 'docs.ndjson'), 'wb') as f:
+        f.writelines(stored_lines)
+
+    os.replace(tmp_dir, path)
+
+
+def _postings(term_ids: np.ndarray, docs: np.ndarray, tfs: np.ndarray, vocabulary_size: int):
+    """Group (term, doc, tf) triples by term, docs ascending; returns (offsets, docs, tfs)"""
+    order = np.lexsort((docs, term_ids))
+    offsets = np.zeros(vocabulary_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=vocabulary_size), out=offsets[1:])
+    return offsets, docs[order], tfs[order]
+
+
+class LocalSearchIndex:
+    """Append-only BM25 index over title (counted twice) and abstract, stored under `path`
+
+    Single writer: one pipeline run appends at a time. Readers only need the
+    manifest, which is replaced atomically after each segment is in place.
+    """
+
+    def __init__(self, path: str = config.LOCAL_SEARCH_DIR, max_segments: int = config.LOCAL_SEARCH_MAX_SEGMENTS):
+        self.path = path
+        self.max_segments = max_segments
+        self.manifest_file = os.path.join(path, 'manifest.json')
+        os.makedirs(path, exist_ok=True)
+        self.segment_names = []
+        self.next_segment = 0
+        self.segments = []
+        self._open()
+
+    def _open(self):
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                self.segment_names = manifest['segments']
+                self.next_segment = manifest['next_segment']
+        self.segments = [Segment(os.path.join(self.path, name)) for name in self.segment_names]
+
+    def _save_manifest(self):
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'segments': self.segment_names,
+                'next_segment': self.next_segment
+            }, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    def _new_segment_name(self) -> str:
+        name = f"seg_{self.next_segment:06d}"
+        self.next_segment += 1
+        return name
+
+    def count(self) -> int:
+        return sum(segment.live_count for segment in self.segments)
+
+    def add(self, df: pd.DataFrame) -> int:
+        """Index a batch of processed papers as a new segment; returns the number of papers added
+
+        A paper already in the index is replaced by the new copy.
+        """
+        if df.empty:
+            return 0
+
+        stored = df[[field for field in STORED_FIELDS if field in df.columns]]
+        stored = stored.drop_duplicates('arxiv_id', keep='last')
+        if 'year' in stored.columns:
+            stored = stored.assign(year=pd.to_numeric(stored['year'], errors='coerce').astype('Int64'))
+        lines = stored.to_json(orient='records', lines=True, force_ascii=False).encode('utf-8').splitlines(keepends=True)
+        arxiv_ids = stored['arxiv_id'].astype(str).tolist()
+
+        term_index = {}
+        term_ids, docs, tfs = [], [], []
+        doc_lens = np.zeros(len(stored), dtype=np.uint32)
+        texts = zip(stored['title'].fillna('').astype(str), stored['abstract'].fillna('').astype(str))
+        for doc, (title, abstract) in enumerate(texts):
+            counts = Counter(tokenize(f"{title} {title} {abstract}"))
+            doc_lens[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                term_id = term_index.get(term)
+                if term_id is None:
+                    encoded = _encode_term(term)
+                    if encoded is None:
+                        continue
+                    term_id = term_index[term] = len(term_index)
+                term_ids.append(term_id)
+                docs.append(doc)
+                tfs.append(min(tf, 65535))
+
+        # Renumber terms in sorted byte order so the dictionary can be binary-searched
+        vocabulary = np.array([term.encode('utf-8') for term in term_index], dtype=bytes)
+        order = np.argsort(vocabulary, kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        offsets, docs, tfs = _postings(
+            rank[np.array(term_ids, dtype=np.int64)], np.array(docs, dtype=np.uint32),
+            np.array(tfs, dtype=np.uint16), len(vocabulary)
+        )
+
+        name = self._new_segment_name()
+        _write_segment(os.path.join(self.path, name), vocabulary[order], offsets, docs, tfs, doc_lens, arxiv_ids, lines)
+        self.segment_names.append(name)
+        self._save_manifest()
+
+        # Only after the new copy is committed: an interrupted run leaves a duplicate, never a gap
+        ids = np.sort(np.array([arxiv_id.encode('utf-8') for arxiv_id in arxiv_ids], dtype=bytes))
+        for segment in self.segments:
+            replaced = segment.find(ids)
+            if len(replaced):
+                segment.delete(replaced)
+        self.segments.append(Segment(os.path.join(self.path, name)))
+
+        if len(self.segments) > self.max_segments:
+            # The newest segments are the smallest; folding them together keeps merges cheap
+            self.merge(len(self.segments) // 2)
+        return len(stored)
+
+    def remove(self, arxiv_ids: List[str]) -> int:
+        """Mark papers deleted in every segment; returns how many were live"""
+        ids = np.sort(np.array([arxiv_id.encode('utf-8') for arxiv_id in arxiv_ids], dtype=bytes))
+        removed = 0
+        for segment in self.segments:
+            docs = segment.find(ids)
+            if len(docs):
+                segment.delete(docs)
+                removed += len(docs)
+        return removed
+
+    def merge(self, count: Optional[int] = None):
+        """Merge the newest `count` segments (all by default) into one, dropping deleted papers"""
+        count = len(self.segments) if count is None else count
+        merging = self.segments[-count:] if count else []
+        if not merging or (len(merging) == 1 and merging[0].live_count == len(merging[0])):
+            return
+
+        vocabulary = np.unique(np.concatenate([segment.terms for segment in merging]))
+        term_ids, docs, tfs, doc_lens, arxiv_ids, lines = [], [], [], [], [], []
+        base = 0
+        for segment in merging:
+            renumber = np.full(len(segment), -1, dtype=np.int64)
+            renumber[segment.live] = np.arange(segment.live_count) + base
+            segment_terms = np.searchsorted(vocabulary, segment.terms)
+            posting_terms = np.repeat(segment_terms, np.diff(segment.offsets))
+            posting_docs = renumber[segment.docs]
+            keep = posting_docs >= 0
+            term_ids.append(posting_terms[keep])
+            docs.append(posting_docs[keep])
+            tfs.append(np.asarray(segment.tfs)[keep])
+            doc_lens.append(np.asarray(segment.doc_lens)[segment.live])
+            for line in segment.stored_lines():
+                lines.append(line)
+                arxiv_ids.append(loads(line)['arxiv_id'])
+            base += segment.live_count
+
+        # Terms that only occurred in deleted papers are dropped from the dictionary
+        used, term_ids = np.unique(np.concatenate(term_ids), return_inverse=True)
+        offsets, docs, tfs = _postings(term_ids, np.concatenate(docs), np.concatenate(tfs), len(used))
+
+        name = self._new_segment_name()
+        _write_segment(
+            os.path.join(self.path, name), vocabulary[used], offsets, docs, tfs,
+            np.concatenate(doc_lens), arxiv_ids, lines
+        )
+        merged_names = self.segment_names[-count:]
+        self.segment_names = self.segment_names[:-count] + [name]
+        self._save_manifest()
+        self.segments = self.segments[:-count] + [Segment(os.path.join(self.path, name))]
+        for merged in merged_names:
+            shutil.rmtree(os.path.join(self.path, merged), ignore_errors=True)
+        print(f"Merged {count} search segments ({base:,} papers)")
+
+    def search(self, query: str, size: int = 10) -> List[Dict]:
+        """BM25 over title and abstract (any query term may match); returns stored documents, best first"""
+        terms = [encoded for encoded in (_encode_term(term) for term in dict.fromkeys(tokenize(query))) if encoded]
+        total_docs = self.count()
+        if not terms or not total_docs:
+            return []
+        avg_length = sum(segment.live_length for segment in self.segments) / total_docs
+
+        # Document frequency over live papers in all segments, so scores do not depend on segmentation
+        hits = [[segment.postings(term) for term in terms] for segment in self.segments]
+        doc_freq = np.zeros(len(terms))
+        for segment, segment_hits in zip(self.segments, hits):
+            for t, postings in enumerate(segment_hits):
+                if postings is None:
+                    continue
+                if segment.live_count == len(segment):
+                    doc_freq[t] += len(postings[0])
+                else:
+                    doc_freq[t] += np.count_nonzero(segment.live[postings[0]])
+        idf = np.log(1 + (total_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        candidates = []
+        for segment, segment_hits in zip(self.segments, hits):
+            matched = [(t, postings) for t, postings in enumerate(segment_hits) if postings is not None]
+            if not matched:
+                continue
+            docs = np.concatenate([postings[0] for _, postings in matched])
+            tfs = np.concatenate([postings[1] for _, postings in matched]).astype(np.float64)
+            weights = np.concatenate([np.full(len(postings[0]), idf[t]) for t, postings in matched])
+            lengths = segment.doc_lens[docs]
+            scores = weights * tfs * (K1 + 1) / (tfs + K1 * (1 - B + B * lengths / avg_length))
+
+            if len(docs) * 8 > len(segment):
+                # Common terms: a dense accumulator is cheaper than sorting the postings
+                scores = np.bincount(docs, weights=scores, minlength=len(segment))
+                docs = np.flatnonzero(scores)
+                scores = scores[docs]
+            else:
+                docs, inverse = np.unique(docs, return_inverse=True)
+                scores = np.bincount(inverse, weights=scores)
+            live = segment.live[docs]
+            docs, scores = docs[live], scores[live]
+            if len(docs) > size:
+                top = np.argpartition(-scores, size)[:size]
+                docs, scores = docs[top], scores[top]
+            candidates.extend(zip(scores.tolist(), [segment] * len(docs), docs.tolist()))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [segment.document(doc) for _, segment, doc in candidates[:size]]
+
+    def clear(self):
+        """Drop every segment"""
+        self.segments = []
+        for name in self.segment_names:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        self.segment_names = []
+        self._save_manifest()
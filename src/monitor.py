@@ -1,19 +1,64 @@
 import json
 import time
+from contextlib import contextmanager
 from datetime import datetime
+from functools import wraps
 import os
+import resource
+from typing import Callable, Dict, Optional, Tuple
 import config
+from src.codec import loads
+from src.run_history import RunHistory, locked
+from src.schema import frame_memory
+
+EXPORT_FORMATS = ('prometheus', 'openmetrics')
+
+def _io_counters() -> Tuple[Optional[int], Optional[int]]:
+    """Bytes this process has passed through read/write syscalls (files and sockets); None outside Linux"""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['rchar']), int(fields['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def _reset_peak_rss() -> bool:
+    """Restart the kernel's RSS high-water mark (Linux); False if unsupported"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss_mb() -> float:
+    """RSS high-water mark since the last reset (or since start), in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    # ru_maxrss is KB on Linux, bytes on macOS; it cannot be reset
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if peak > 1 << 30 else peak / 1024
 
 class PipelineMonitor:
     def __init__(self):
         self.metrics_file = f"{config.DATA_DIR}/metrics.json"
         self.metrics = self._load_metrics()
+        self.history = RunHistory()
+        # Stage records of the current run, by name, in first-entered order
+        self.stages = {}
+        self._active = []
+        self.frame_memory = None
     
     def _load_metrics(self) -> dict:
         if os.path.exists(self.metrics_file):
             try:
-                with open(self.metrics_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.metrics_file, 'rb') as f:
+                    data = loads(f.read())
                     return data
             except:
                 pass
@@ -25,9 +70,81 @@ class PipelineMonitor:
             "last_run": None
         }
     
-    def start_monitoring(self, batch_id: str) -> dict:
+    @contextmanager
+    def stage(self, name: str, items: Optional[int] = None):
+        """Measure a pipeline stage: wall/CPU time, syscall bytes read/written and peak RSS
+
+        Yields a dict; set `stage['items']` inside the block when the count is
+        only known afterwards. Entering the same name again (one stage per
+        streaming batch) adds to the existing record.
+        """
+        measured = {'items': items}
+        rchar, wchar = _io_counters()
+        # Nested stages restart the high-water mark; the enclosing stages keep what they saw so far
+        for outer in self._active:
+            outer['peak_rss_mb'] = max(outer['peak_rss_mb'], _peak_rss_mb())
+        measured['peak_rss_mb'] = 0.0
+        _reset_peak_rss()
+        self._active.append(measured)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield measured
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._active.pop()
+            peak = _peak_rss_mb()
+            measured['peak_rss_mb'] = max(measured['peak_rss_mb'], peak)
+            if self._active:
+                self._active[-1]['peak_rss_mb'] = max(self._active[-1]['peak_rss_mb'], measured['peak_rss_mb'])
+            rchar_end, wchar_end = _io_counters()
+            record = self.stages.setdefault(name, {
+                'name': name, 'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0,
+                'bytes_read': 0, 'bytes_written': 0, 'peak_rss_mb': 0.0
+            })
+            record['calls'] += 1
+            record['wall_seconds'] += wall
+            record['cpu_seconds'] += cpu
+            record['items'] += measured['items'] or 0
+            if rchar is not None and rchar_end is not None:
+                record['bytes_read'] += rchar_end - rchar
+                record['bytes_written'] += wchar_end - wchar
+            record['peak_rss_mb'] = max(record['peak_rss_mb'], measured['peak_rss_mb'])
+            record['items_per_sec'] = record['items'] / record['wall_seconds'] if record['wall_seconds'] > 0 else 0.0
+    
+    def timed(self, name: str, count: Optional[Callable] = None):
+        """Decorator form of stage(); `count(result)` gives the item count"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name) as measured:
+                    result = func(*args, **kwargs)
+                    if count is not None:
+                        measured['items'] = count(result)
+                    return result
+            return wrapper
+        return decorator
+    
+    def record_memory(self, df) -> Dict:
+        """Add a processed frame's memory_usage(deep=True) to this run; streaming batches add up"""
+        report = frame_memory(df)
+        if self.frame_memory is None:
+            self.frame_memory = report
+        else:
+            self.frame_memory['rows'] += report['rows']
+            self.frame_memory['bytes'] += report['bytes']
+            for column, size in report['columns'].items():
+                self.frame_memory['columns'][column] = self.frame_memory['columns'].get(column, 0) + size
+        return report
+    
+    def start_monitoring(self, batch_id: str, params: Optional[Dict] = None) -> dict:
+        """`params` (category, limit, processor, ...) decides which earlier runs are comparable"""
+        self.stages = {}
+        self.frame_memory = None
         return {
             "batch_id": batch_id,
+            "params": dict(params or {}),
             "start_time": time.time(),
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
@@ -37,19 +154,85 @@ class PipelineMonitor:
         session["processing_time"] = time.time() - session["start_time"]
         session["papers_processed"] = papers_count
         session["success"] = errors == 0
+        session["stages"] = list(self.stages.values())
+        session["frame_memory"] = self.frame_memory
+        # Judged against the comparable runs before this one
+        session["baseline"] = self.history.check(session)
+        self.history.append(session)
         
-        # 更新總體統計
-        self.metrics["total_runs"] += 1
-        self.metrics["total_papers"] += papers_count
-        self.metrics["total_time"] += session["processing_time"]
-        self.metrics["last_run"] = session
-        
-        self._save_metrics()
+        # 更新總體統計 (reloaded under the lock so concurrent runs do not lose each other's totals)
+        with locked(self.metrics_file):
+            self.metrics = self._load_metrics()
+            self.metrics["total_runs"] += 1
+            self.metrics["total_papers"] += papers_count
+            self.metrics["total_time"] += session["processing_time"]
+            self.metrics["last_run"] = session
+            self._save_metrics()
+        if config.METRICS_EXPORT_FILE:
+            self.export_metrics(config.METRICS_EXPORT_FILE, config.METRICS_EXPORT_FORMAT)
         return session
     
     def _save_metrics(self):
-        with open(self.metrics_file, 'w') as f:
+        tmp_file = f"{self.metrics_file}.tmp"
+        with open(tmp_file, 'w') as f:
             json.dump(self.metrics, f, indent=2)
+        os.replace(tmp_file, self.metrics_file)
+    
+    def format_metrics(self, fmt: str = 'prometheus') -> str:
+        """Run totals and the last run's stages in Prometheus text or OpenMetrics format"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        
+        lines = []
+        
+        def family(name: str, kind: str, help_text: str, samples):
+            # OpenMetrics names the counter family without the _total suffix its samples carry
+            declared = name[:-len('_total')] if fmt == 'openmetrics' and kind == 'counter' else name
+            lines.append(f"# HELP {declared} {help_text}")
+            lines.append(f"# TYPE {declared} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+        
+        family('arxiv_pipeline_runs_total', 'counter', 'Pipeline runs recorded', [('', self.metrics['total_runs'])])
+        family('arxiv_pipeline_papers_total', 'counter', 'Papers processed over all runs', [('', self.metrics['total_papers'])])
+        
+        last_run = self.metrics.get('last_run') or {}
+        if last_run:
+            family('arxiv_pipeline_last_run_seconds', 'gauge', 'Duration of the last run',
+                   [('', round(last_run['processing_time'], 6))])
+            family('arxiv_pipeline_last_run_papers', 'gauge', 'Papers processed by the last run',
+                   [('', last_run['papers_processed'])])
+            baseline = last_run.get('baseline')
+            if baseline:
+                family('arxiv_pipeline_baseline_throughput', 'gauge', 'Throughput percentiles (papers/sec) of comparable earlier runs',
+                       [('{quantile="0.5"}', round(baseline['p50'], 6)), ('{quantile="0.95"}', round(baseline['p95'], 6))])
+                family('arxiv_pipeline_last_run_regression', 'gauge', '1 if the last run was slower than its baseline',
+                       [('', int(baseline['regression']))])
+        
+        stages = last_run.get('stages', [])
+        for field, kind, help_text in (
+            ('wall_seconds', 'gauge', 'Wall-clock time per stage in the last run'),
+            ('cpu_seconds', 'gauge', 'CPU time of this process per stage in the last run'),
+            ('items', 'gauge', 'Items handled per stage in the last run'),
+            ('items_per_sec', 'gauge', 'Throughput per stage in the last run'),
+            ('bytes_read', 'gauge', 'Bytes read through syscalls per stage in the last run'),
+            ('bytes_written', 'gauge', 'Bytes written through syscalls per stage in the last run'),
+            ('peak_rss_mb', 'gauge', 'Peak resident memory (MB) per stage in the last run'),
+        ):
+            if stages:
+                family(f"arxiv_pipeline_stage_{field}", kind, help_text,
+                       [(f'{{stage="{stage["name"]}"}}', round(stage.get(field, 0), 6)) for stage in stages])
+        
+        if fmt == 'openmetrics':
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+    
+    def export_metrics(self, path: str, fmt: str = 'prometheus'):
+        """Write the metrics for a textfile collector or scraper; replaced atomically"""
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w') as f:
+            f.write(self.format_metrics(fmt))
+        os.replace(tmp_file, path)
     
     def check_data_quality(self, df) -> dict:
         total_cells = len(df) * len(df.columns)
@@ -60,7 +243,23 @@ class PipelineMonitor:
         return {
             "quality_score": quality_score,
             "total_records": len(df),
-            "missing_ratio": missing_cells / total_cells
+            "missing_ratio": missing_cells / total_cells,
+            "missing_cells": int(missing_cells),
+            "total_cells": int(total_cells)
+        }
+    
+    def combine_quality(self, reports: list) -> dict:
+        """Merge per-batch quality reports from streaming mode"""
+        total_cells = sum(r["total_cells"] for r in reports)
+        missing_cells = sum(r["missing_cells"] for r in reports)
+        missing_ratio = missing_cells / total_cells if total_cells else 0.0
+        
+        return {
+            "quality_score": 1.0 - missing_ratio,
+            "total_records": sum(r["total_records"] for r in reports),
+            "missing_ratio": missing_ratio,
+            "missing_cells": missing_cells,
+            "total_cells": total_cells
         }
     
     def print_summary(self):
@@ -82,5 +281,31 @@ class PipelineMonitor:
                 print(f"  Time: {self.metrics['last_run']['timestamp']}")
                 print(f"  Papers: {self.metrics['last_run']['papers_processed']}")
                 print(f"  Duration: {self.metrics['last_run']['processing_time']:.1f}s")
+                
+                memory = self.metrics['last_run'].get('frame_memory')
+                if memory and memory['rows']:
+                    largest = sorted(memory['columns'].items(), key=lambda item: item[1], reverse=True)[:3]
+                    shares = ', '.join(f"{name} {size / memory['bytes']:.0%}" for name, size in largest)
+                    print(f"  DataFrame memory: {memory['bytes'] / 1024 / 1024:.1f} MB "
+                          f"({memory['bytes'] / memory['rows']:,.0f} bytes/paper; largest: {shares})")
+                
+                baseline = self.metrics['last_run'].get('baseline')
+                if baseline:
+                    print(f"  Throughput: {baseline['throughput']:,.0f} papers/s "
+                          f"(baseline p50 {baseline['p50']:,.0f}, p95 {baseline['p95']:,.0f} over {baseline['baseline_runs']} runs)")
+                    if baseline['regression']:
+                        print(f"  ⚠ Regression: {1 - baseline['ratio']:.0%} slower than the baseline median")
+                    if baseline['slow_stages']:
+                        print(f"  ⚠ Slower stages: {', '.join(baseline['slow_stages'])}")
+                
+                stages = self.metrics['last_run'].get('stages')
+                if stages:
+                    total = sum(stage['wall_seconds'] for stage in stages) or 1.0
+                    print(f"\n  {'Stage':<16}{'Wall':>9}{'%':>6}{'CPU':>9}{'Items/s':>11}{'Read MB':>9}{'Write MB':>10}{'Peak MB':>9}")
+                    for stage in stages:
+                        print(f"  {stage['name']:<16}{stage['wall_seconds']:>8.2f}s{stage['wall_seconds'] / total:>6.0%}"
+                              f"{stage['cpu_seconds']:>8.2f}s{stage['items_per_sec']:>11,.0f}"
+                              f"{stage['bytes_read'] / 1024 / 1024:>9.1f}{stage['bytes_written'] / 1024 / 1024:>10.1f}"
+                              f"{stage['peak_rss_mb']:>9.0f}")
         else:
             print("No runs recorded yet.")
\ No newline at end of file
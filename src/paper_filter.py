@@ -0,0 +1,85 @@
+import re
+from typing import Dict, Optional
+
+# Kelvin sign and dotted capital I, JSON-escaped and raw UTF-8 (see `PaperFilter.prefilter`)
+FOLDING_CHARS = (b'\\u212a', b'\\u0130', '\u212a'.encode('utf-8'), '\u0130'.encode('utf-8'))
+
+
+def has_folding_chars(line: bytes) -> bool:
+    """Whether a raw line holds one of `FOLDING_CHARS`; ASCII lines without escapes skip the searches"""
+    if line.isascii() and b'\\' not in line:
+        return False
+    return any(char in line for char in FOLDING_CHARS)
+
+
+def category_matches(category: str, categories: str) -> bool:
+    """Exact match on a space-separated categories string
+
+    "cs" matches "cs.LG" and "cs.CV", "cs.LG" only matches itself;
+    neither matches "physics.comp-ph" or "math-ph"-style lookalikes.
+    """
+    prefix = category + '.'
+    return any(cat == category or cat.startswith(prefix) for cat in categories.split())
+
+
+def category_regex(category: str) -> str:
+    """`category_matches` as a regex over the raw categories string (for Arrow filters)"""
+    return rf"(^|\s){re.escape(category)}(\.\S*)?(\s|$)"
+
+
+class PaperFilter:
+    """Category/keyword/year filter applied to raw snapshot records
+
+    Kept as a small picklable object so scan workers can apply the same rules.
+    `prefilter` runs on the undecoded line and only rejects lines that
+    `matches` would reject too, so most lines never reach `json.loads`.
+    """
+
+    def __init__(self, category: Optional[str] = None, year: Optional[int] = None, keyword: Optional[str] = None):
+        self.category = category
+        self.year = year
+        self.keyword = keyword.lower() if keyword else None
+
+        self._category_bytes = category.encode('utf-8') if category else None
+        self._year_bytes = str(year).encode('ascii') if year else None
+        # The raw line holds JSON-escaped text, so only plain ASCII keywords can be looked up byte-for-byte
+        plain = self.keyword and self.keyword.isascii() and self.keyword.isprintable() and not set(self.keyword) & set('"\\/')
+        # Words are checked separately: a phrase may straddle the title/abstract join
+        self.keyword_words = self.keyword.split() if plain else []
+        self._keyword_words = [word.encode('ascii') for word in self.keyword_words]
+        self._keyword_folds = any(char in 'ik' for word in self.keyword_words for char in word)
+
+    def prefilter(self, line: bytes) -> bool:
+        """Cheap necessary conditions on the raw JSON line"""
+        if self._category_bytes and self._category_bytes not in line:
+            return False
+
+        # No versions (no "created") is let through by the year filter, so keep those lines
+        if self._year_bytes and self._year_bytes not in line and b'"created"' in line:
+            return False
+
+        # bytes.lower() folds ASCII only; the Kelvin sign and dotted capital I are the only
+        # non-ASCII characters str.lower() maps onto ASCII letters, so lines holding them are kept
+        if self._keyword_words:
+            lowered = line.lower()
+            if not all(word in lowered for word in self._keyword_words):
+                return self._keyword_folds and has_folding_chars(lowered)
+
+        return True
+
+    def matches(self, paper: Dict) -> bool:
+        if self.category and not category_matches(self.category, paper.get('categories', '')):
+            return False
+
+        if self.keyword:
+            text = (paper.get('title', '') + ' ' + paper.get('abstract', '')).lower()
+            if self.keyword not in text:
+                return False
+
+        if self.year:
+            # Simple year check in versions
+            versions = paper.get('versions', [])
+            if versions and str(self.year) not in str(versions[0].get('created', '')):
+                return False
+
+        return True
@@ -0,0 +1,203 @@
+"""
+Multi-process scan of the snapshot file split into newline-aligned byte ranges,
+or of the index's candidate offsets split into contiguous runs
+
+The process pools live for the whole process and are shared with the
+parallel processor, so repeated runs (the daemon) never pay worker startup.
+"""
+import atexit
+import os
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from tqdm import tqdm
+
+from src.codec import loads
+from src.dataset_stats import DatasetStats
+from src.paper_filter import PaperFilter
+from src.schema import Paper
+
+# More shards than workers keeps the pool busy and lets limit mode stop early
+SHARDS_PER_WORKER = 4
+# Shards submitted ahead of the one being consumed, per worker
+SHARDS_IN_FLIGHT = 2
+
+_pools = {}
+
+
+def get_pool(workers: int) -> Pool:
+    """Reuse one pool per worker count across calls"""
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = Pool(workers)
+    return pool
+
+
+def shutdown_pool():
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.close()
+        pool.join()
+
+
+atexit.register(shutdown_pool)
+
+
+def compute_shards(path: str, num_shards: int) -> List[Tuple[int, int]]:
+    """Split a file into byte ranges that start and end on line boundaries"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    
+    num_shards = max(1, min(num_shards, size))
+    step = size // num_shards
+    boundaries = [0]
+    
+    with open(path, 'rb') as f:
+        for i in range(1, num_shards):
+            f.seek(max(i * step, boundaries[-1]))
+            f.readline()  # Move to the start of the next full line
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+    
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def iter_shard_lines(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Yield the raw lines that begin inside [start, end)"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+
+def iter_offset_lines(path: str, offsets: Sequence[int]) -> Iterator[bytes]:
+    """Yield the raw lines starting at each offset"""
+    with open(path, 'rb') as f:
+        for offset in offsets:
+            f.seek(offset)
+            yield f.readline()
+
+
+def split_offsets(offsets: Sequence[int], num_shards: int) -> List[Sequence[int]]:
+    """Split offsets into contiguous runs of about the same length, keeping file order"""
+    size = max(1, -(-len(offsets) // max(1, num_shards)))
+    return [offsets[i:i + size] for i in range(0, len(offsets), size)]
+
+
+def _collect_lines(lines: Iterable[bytes], paper_filter: PaperFilter, limit: int) -> List[Paper]:
+    papers = []
+    for line in lines:
+        if len(papers) >= limit:
+            break
+        if not paper_filter.prefilter(line):
+            continue
+        try:
+            paper = loads(line)
+            if paper_filter.matches(paper):
+                papers.append(Paper.from_raw(paper))
+        except:
+            continue
+    return papers
+
+
+def _collect_shard(task: Tuple[str, int, int, PaperFilter, int]) -> List[Paper]:
+    """Worker: filter and transform one shard, keeping at most `limit` papers"""
+    path, start, end, paper_filter, limit = task
+    return _collect_lines(iter_shard_lines(path, start, end), paper_filter, limit)
+
+
+def _collect_offsets(task: Tuple[str, Sequence[int], PaperFilter, int]) -> List[Paper]:
+    """Worker: filter and transform the lines at a run of index offsets, keeping at most `limit` papers"""
+    path, offsets, paper_filter, limit = task
+    return _collect_lines(iter_offset_lines(path, offsets), paper_filter, limit)
+
+
+def _count_shard(task: Tuple[str, int, int]) -> DatasetStats:
+    """Worker: count papers per category, subcategory and year in one shard"""
+    from src.dataset_index import DatasetIndex
+    
+    path, start, end = task
+    stats = DatasetStats()
+    for line in iter_shard_lines(path, start, end):
+        try:
+            paper = loads(line)
+        except ValueError:
+            continue
+        stats.add(paper.get('categories', ''), DatasetIndex._first_version_year(paper))
+    return stats
+
+
+class ParallelScanner:
+    def __init__(self, path: str, workers: int):
+        self.path = path
+        self.workers = max(1, workers)
+    
+    def collect(self, paper_filter: PaperFilter, limit: int) -> List[Paper]:
+        """Filter and transform papers across a process pool, in file order"""
+        return list(self.iter_collect(paper_filter, limit))
+    
+    def iter_collect(self, paper_filter: PaperFilter, limit: int, offsets: Optional[Sequence[int]] = None) -> Iterator[Paper]:
+        """Yield matching papers shard by shard, in file order, stopping after `limit`
+
+        With `offsets` (an index lookup) only those lines are read, split into
+        contiguous runs instead of byte ranges.
+        """
+        if offsets is None:
+            shards = compute_shards(self.path, self.workers * SHARDS_PER_WORKER)
+            worker, tasks = _collect_shard, [(self.path, start, end, paper_filter, limit) for start, end in shards]
+        else:
+            shards = split_offsets(offsets, self.workers * SHARDS_PER_WORKER)
+            worker, tasks = _collect_offsets, [(self.path, shard, paper_filter, limit) for shard in shards]
+        
+        collected = 0
+        pbar = tqdm(total=len(tasks), desc=f"Scanning shards ({self.workers} workers)", unit=" shards")
+        # Results are taken in shard order, so the first `limit` matches are the same as a serial scan
+        for shard_papers in self._imap(worker, tasks):
+            pbar.update(1)
+            for paper in shard_papers[:limit - collected]:
+                collected += 1
+                yield paper
+            pbar.set_postfix({'collected': collected})
+            if collected >= limit:
+                break
+        pbar.close()
+    
+    def _imap(self, worker, tasks: List) -> Iterator:
+        """Ordered results from the shared pool with only a few shards queued ahead
+
+        Stopping early leaves at most those shards running, instead of the
+        whole file keeping the pool busy for the next caller.
+        """
+        pool = get_pool(self.workers)
+        tasks = iter(tasks)
+        pending = deque(pool.apply_async(worker, (task,)) for task in islice(tasks, self.workers * SHARDS_IN_FLIGHT))
+        while pending:
+            result = pending.popleft().get()
+            for task in islice(tasks, 1):
+                pending.append(pool.apply_async(worker, (task,)))
+            yield result
+    
+    def count_stats(self) -> DatasetStats:
+        """Count papers per category, subcategory and year across a process pool"""
+        shards = compute_shards(self.path, self.workers * SHARDS_PER_WORKER)
+        tasks = [(self.path, start, end) for start, end in shards]
+        
+        stats = DatasetStats()
+        for shard_stats in tqdm(
+            get_pool(self.workers).imap_unordered(_count_shard, tasks), total=len(tasks), desc="Scanning shards"
+        ):
+            stats.merge(shard_stats)
+        
+        return stats
@@ -0,0 +1,206 @@
+"""
+Columnar Parquet cache of the transformed snapshot, partitioned by year and primary category
+"""
+import json
+import os
+import shutil
+from typing import Dict, Iterator, Optional
+
+from tqdm import tqdm
+
+from src.codec import loads
+from src.dataset_index import DatasetIndex
+from src.dataset_stats import DatasetStats, StatsCache
+from src.paper_filter import PaperFilter, category_regex
+from src.schema import Paper
+
+CACHE_VERSION = 2
+BATCH_SIZE = 50000
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("The Parquet cache needs pyarrow: pip install pyarrow")
+
+
+class ParquetCache:
+    """Opt-in Parquet copy of the snapshot with the `schema.Paper` fields
+
+    Title and abstract are stored as in the snapshot and cleaned on read, so
+    keyword matching sees the same text as PaperFilter.matches on the other
+    collection paths. A `_manifest.json` records the snapshot size/mtime it
+    was built from; the cache is rebuilt whenever they change.
+    """
+
+    def __init__(self, metadata_file: str, cache_dir: str):
+        _require_pyarrow()
+        self.metadata_file = metadata_file
+        self.cache_dir = cache_dir
+        self.manifest_file = os.path.join(cache_dir, "_manifest.json")
+
+    @staticmethod
+    def schema():
+        import pyarrow as pa
+
+        return pa.schema([
+            ('arxiv_id', pa.string()),
+            ('title', pa.string()),
+            ('abstract', pa.string()),
+            ('authors', pa.list_(pa.string())),
+            ('categories', pa.list_(pa.string())),
+            ('primary_category', pa.string()),
+            ('published', pa.string()),
+            ('updated', pa.string()),
+            ('doi', pa.string()),
+            ('journal-ref', pa.string()),
+            ('comments', pa.string()),
+            ('versions', pa.list_(pa.struct([('version', pa.string()), ('created', pa.string())]))),
+            ('authors_parsed', pa.list_(pa.list_(pa.string()))),
+            ('year', pa.int16()),
+            # Raw categories string, only used for filter pushdown
+            ('_categories', pa.string()),
+        ])
+
+    @staticmethod
+    def partitioning():
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.partitioning(
+            pa.schema([('year', pa.int16()), ('primary_category', pa.string())]),
+            flavor='hive'
+        )
+
+    def _signature(self) -> Dict:
+        stat = os.stat(self.metadata_file)
+        return {
+            'version': CACHE_VERSION,
+            'size': stat.st_size,
+            'mtime': int(stat.st_mtime)
+        }
+
+    def is_valid(self) -> bool:
+        """Check the manifest matches the snapshot's size and mtime"""
+        if not os.path.exists(self.manifest_file):
+            return False
+        try:
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return manifest.get('snapshot') == self._signature()
+
+    def ensure(self):
+        if not self.is_valid():
+            self.build()
+
+    def build(self):
+        """Convert the snapshot once into partitioned Parquet"""
+        import pyarrow.dataset as ds
+
+        print(f"Building Parquet cache: {self.cache_dir}")
+        signature = self._signature()
+        stats_cache = StatsCache(self.metadata_file)
+        stats_signature = stats_cache.signature()
+        stats = DatasetStats()
+        schema = self.schema()
+        tmp_dir = f"{self.cache_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        counter = {'rows': 0}
+
+        def batches():
+            import pyarrow as pa
+
+            rows = []
+            with open(self.metadata_file, 'rb') as f:
+                for line in tqdm(f, desc="Converting", unit=" papers"):
+                    try:
+                        raw = loads(line)
+                    except ValueError:
+                        continue
+                    paper = Paper.from_raw(raw).to_dict()
+                    paper['title'] = raw.get('title', '')
+                    paper['abstract'] = raw.get('abstract', '')
+                    paper['year'] = DatasetIndex._first_version_year(raw)
+                    paper['_categories'] = raw.get('categories', '')
+                    stats.add(paper['_categories'], paper['year'])
+                    rows.append(paper)
+                    if len(rows) >= BATCH_SIZE:
+                        counter['rows'] += len(rows)
+                        yield pa.RecordBatch.from_pylist(rows, schema=schema)
+                        rows = []
+            if rows:
+                counter['rows'] += len(rows)
+                yield pa.RecordBatch.from_pylist(rows, schema=schema)
+
+        ds.write_dataset(
+            batches(),
+            tmp_dir,
+            schema=schema,
+            format='parquet',
+            partitioning=self.partitioning(),
+            basename_template='part-{i}.parquet',
+            max_partitions=100000,
+            existing_data_behavior='overwrite_or_ignore'
+        )
+
+        with open(os.path.join(tmp_dir, "_manifest.json"), 'w') as f:
+            json.dump({'snapshot': signature, 'rows': counter['rows']}, f, indent=2)
+
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.replace(tmp_dir, self.cache_dir)
+        stats_cache.save(stats, stats_signature)
+        print(f"Cached {counter['rows']:,} papers as Parquet")
+
+    def _filter_expression(self, paper_filter: PaperFilter):
+        """Necessary conditions of `paper_filter` that Arrow can evaluate; rows still go through matches()"""
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        expression = None
+
+        def combine(left, right):
+            return right if left is None else left & right
+
+        if paper_filter.year:
+            # Partition pruning; year 0 means no versions, which the year filter lets through
+            expression = combine(expression, (ds.field('year') == paper_filter.year) | (ds.field('year') == 0))
+        if paper_filter.category:
+            expression = combine(expression, pc.match_substring_regex(ds.field('_categories'), category_regex(paper_filter.category)))
+        # Like PaperFilter.prefilter: each word on its own, since a phrase may span a line break or the title/abstract join
+        for word in paper_filter.keyword_words:
+            expression = combine(
+                expression,
+                pc.match_substring(ds.field('title'), word, ignore_case=True)
+                | pc.match_substring(ds.field('abstract'), word, ignore_case=True)
+            )
+        return expression
+
+    def iter_papers(
+        self,
+        category: Optional[str] = None,
+        year: Optional[int] = None,
+        keyword: Optional[str] = None
+    ) -> Iterator[Paper]:
+        """Yield transformed papers matching the filters, reading only the needed columns"""
+        import pyarrow.dataset as ds
+
+        self.ensure()
+        paper_filter = PaperFilter(category=category, year=year, keyword=keyword)
+        dataset = ds.dataset(self.cache_dir, format='parquet', partitioning=self.partitioning())
+        columns = [name for name in self.schema().names if name != 'year']
+        scanner = dataset.scanner(columns=columns, filter=self._filter_expression(paper_filter))
+
+        for batch in scanner.to_batches():
+            for record in batch.to_pylist():
+                raw = {'categories': record.pop('_categories'), 'title': record['title'],
+                       'abstract': record['abstract'], 'versions': record['versions']}
+                if not paper_filter.matches(raw):
+                    continue
+                record['title'] = Paper.clean_text(record['title'])
+                record['abstract'] = Paper.clean_text(record['abstract'])
+                record['primary_category'] = record['primary_category'] or ''
+                yield Paper.from_dict(record)
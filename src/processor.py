@@ -1,108 +1,111 @@
-import json
+import os
 import pandas as pd
+import pyarrow as pa
 from datetime import datetime
-from typing import List, Dict
-import re
+from typing import Iterable, List, Optional
 
 import config
+from src.codec import dumps
+from src.date_parser import parse_date
+from src.keywords import KeywordExtractor
+from src.ndjson_io import NDJSONWriter, iter_records, output_path
+from src.schema import Paper, ProcessedPaper, compact_frame
 
 class DataProcessor:
     def __init__(self):
         self.quality_threshold = 0.8
+        self.keywords = KeywordExtractor()
         
     def process_papers(self, filename: str) -> pd.DataFrame:
-        with open(filename, 'r') as f:
-            papers = json.load(f)
+        print(f"Processing papers from {filename}")
         
-        print(f"Processing {len(papers)} papers")
+        # Records are read incrementally; the raw list is never held in memory
+        df = self.process_batch(iter_records(filename))
+        print(f"Processed {len(df)} papers")
+        self.keywords.save()
         
+        quality_score = self._calculate_quality(df)
+        print(f"Data quality score: {quality_score:.2%}")
+        
+        return df
+    
+    def process_batch(self, papers: Iterable) -> pd.DataFrame:
+        """Process an in-memory batch of papers (used directly by streaming mode)"""
         processed = []
         for paper in papers:
             processed_paper = self._process_single_paper(paper)
             if processed_paper:
                 processed.append(processed_paper)
         
-        df = pd.DataFrame(processed)
+        if not processed:
+            return pd.DataFrame()
         
-        df = self._add_metrics(df)
+        df = ProcessedPaper.to_frame(processed)
         
-        quality_score = self._calculate_quality(df)
-        print(f"Data quality score: {quality_score:.2%}")
+        df = self._add_metrics(df)
         
-        return df
+        return compact_frame(df)
     
-    def _process_single_paper(self, paper: Dict) -> Dict:
+    def _process_single_paper(self, paper) -> Optional[ProcessedPaper]:
         try:
+            # Accepts a Paper from the collector or its dict form read back from the raw file
+            paper = Paper.coerce(paper)
+            
             # Extract version information
-            versions = paper.get('versions', [])
+            versions = paper.versions
             version_count = len(versions) if versions else 1
             
+            published_date = self._parse_date(paper.published)
+            
             # Get first and last version dates
             first_version_date = None
             last_version_date = None
             if versions:
-                if len(versions) > 0 and 'created' in versions[0]:
+                if 'created' in versions[0]:
                     first_version_date = versions[0].get('created')
-                if len(versions) > 0 and 'created' in versions[-1]:
+                if 'created' in versions[-1]:
                     last_version_date = versions[-1].get('created')
             
-            return {
-                'arxiv_id': paper['arxiv_id'],
-                'title': paper['title'][:500],  
-                'abstract': paper['abstract'][:2000],  
-                'authors': paper['authors'],
-                'author_count': len(paper['authors']),
-                'categories': paper['categories'],
-                'primary_category': paper.get('primary_category', paper['categories'][0] if paper['categories'] else 'unknown'),
-                'published_date': self._parse_date(paper['published']),
-                'updated_date': self._parse_date(paper['updated']),
-                'year': self._parse_date(paper['published']).year,
-                'month': self._parse_date(paper['published']).month,
-                'version_count': version_count,
-                'versions': versions,
-                'first_version_date': first_version_date,
-                'last_version_date': last_version_date,
-                'journal_ref': paper.get('journal-ref') or paper.get('journal_ref'),
-                'doi': paper.get('doi'),
-                'comments': paper.get('comments'),
-                'institutions': self._extract_institutions(paper),
-                'author_affiliations': str(paper.get('authors_parsed', [])) if paper.get('authors_parsed') else "",
-                'publication_date': None,  # To be enriched from Crossref API
-                'publication_type': 'preprint',  # preprint/journal/conference
-                'citation_count': 0,  # To be enriched from Semantic Scholar API
-                'keywords': self._extract_keywords(paper['title'], paper['abstract'])  # Extract keywords from title and abstract
-            }
+            return ProcessedPaper(
+                arxiv_id=paper.arxiv_id,
+                title=paper.title[:500],
+                abstract=paper.abstract[:2000],
+                authors=paper.authors,
+                author_count=len(paper.authors),
+                categories=paper.categories,
+                primary_category=paper.primary_category,
+                published_date=published_date,
+                updated_date=self._parse_date(paper.updated),
+                year=published_date.year if published_date else None,
+                month=published_date.month if published_date else None,
+                version_count=version_count,
+                versions=versions,
+                first_version_date=first_version_date,
+                last_version_date=last_version_date,
+                journal_ref=paper.journal_ref or None,
+                doi=paper.doi,
+                comments=paper.comments,
+                institutions=self._extract_institutions(paper.authors_parsed),
+                author_affiliations=paper.authors_parsed or [],
+                publication_date=None,
+                publication_type='preprint',
+                citation_count=0,
+                keywords=self._extract_keywords(paper.title, paper.abstract)
+            )
         except Exception as e:
-            print(f"Error processing paper {paper.get('arxiv_id')}: {e}")
+            arxiv_id = paper.get('arxiv_id') if isinstance(paper, dict) else getattr(paper, 'arxiv_id', None)
+            print(f"Error processing paper {arxiv_id}: {e}")
             return None
     
-    def _parse_date(self, date_str: str) -> datetime:
-        if not date_str:
-            return datetime.now()
-        
-        try:
-            # Try ISO format first
-            return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        except:
-            try:
-                # Try arXiv format: "Mon, 2 Apr 2007 19:18:42 GMT"
-                return datetime.strptime(date_str, '%a, %d %b %Y %H:%M:%S %Z')
-            except:
-                # Last resort - check if it's just a year
-                try:
-                    if date_str.isdigit() and len(date_str) == 4:
-                        return datetime(int(date_str), 1, 1)
-                except:
-                    pass
-                return datetime.now()
+    def _parse_date(self, date_str: str) -> Optional[datetime]:
+        """Parse via the shared memoized parser; None when the date is missing or unrecognised"""
+        return parse_date(date_str)
     
-    def _extract_institutions(self, paper: Dict) -> List[str]:
-        """Extract institutions from authors_parsed field only"""
+    def _extract_institutions(self, authors_parsed: List[List[str]]) -> List[str]:
+        """Extract institutions from authors_parsed ([['LastName', 'FirstName', 'Affiliation']])"""
         institutions = []
         
-        # Only check authors_parsed field (format: [['LastName', 'FirstName', 'Affiliation']])
-        authors_parsed = paper.get('authors_parsed', [])
-        for author in authors_parsed:
+        for author in authors_parsed or []:
             if len(author) > 2 and author[2]:
                 affiliation = author[2].strip()
                 if affiliation and affiliation not in institutions:
@@ -112,36 +115,7 @@ class DataProcessor:
     
     def _extract_keywords(self, title: str, abstract: str, max_keywords: int = 5) -> List[str]:
         """Extract top keywords from title and abstract"""
-        try:
-            # Combine title (weighted more) and abstract
-            text = f"{title} {title} {abstract}"
-            
-            # Basic preprocessing
-            text = text.lower()
-            text = re.sub(r'[^\w\s]', ' ', text)
-            
-            # Basic stopwords
-            stopwords = {
-                'the', 'a', 'an', 'and', 'or', 'in', 'on', 'to', 'for', 'of', 'with',
-                'is', 'are', 'was', 'were', 'be', 'we', 'our', 'this', 'that', 'these'
-            }
-            
-            # Count word frequency
-            words = text.split()
-            word_freq = {}
-            
-            for word in words:
-                if len(word) >= 2 and word not in stopwords:  # Include short words like AI, ML, NLP
-                    word_freq[word] = word_freq.get(word, 0) + 1
-            
-            # Get top keywords by frequency
-            sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-            keywords = [word for word, freq in sorted_words[:max_keywords]]
-            
-            return keywords
-            
-        except Exception:
-            return []
+        return self.keywords.extract(title, abstract, max_keywords)
     
     def _add_metrics(self, df: pd.DataFrame) -> pd.DataFrame:
         df['title_length'] = df['title'].str.len()
@@ -170,15 +144,35 @@ class DataProcessor:
         
         return sum(scores) / len(scores)
     
-    def save_processed_data(self, df: pd.DataFrame, category: str):
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        csv_file = f"{config.DATA_DIR}/processed_{category}_{timestamp}.csv"
-        df.to_csv(csv_file, index=False)
-        print(f"Saved processed data to {csv_file}")
+    def save_processed_data(self, df: pd.DataFrame, category: str, fmt: str = config.PROCESSED_FORMAT, compression: Optional[str] = config.INTERMEDIATE_COMPRESSION) -> str:
+        """Write the processed DataFrame once, as NDJSON (default) or CSV"""
+        with self.open_processed_writer(category, fmt, compression) as writer:
+            writer.write(df)
         
-        json_file = f"{config.DATA_DIR}/processed_{category}_{timestamp}.json"
-        df.to_json(json_file, orient='records', date_format='iso')
-        print(f"Saved processed data to {json_file}")
-        
-        return csv_file, json_file
\ No newline at end of file
+        return writer.path
+    
+    def open_processed_writer(self, category: str, fmt: str = config.PROCESSED_FORMAT, compression: Optional[str] = config.INTERMEDIATE_COMPRESSION) -> 'ProcessedDataWriter':
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return ProcessedDataWriter(output_path(f"{config.DATA_DIR}/processed_{category}_{timestamp}", fmt, compression))
+
+
+class ProcessedDataWriter(NDJSONWriter):
+    """Appends processed batches to a single NDJSON or CSV output file"""
+    
+    def write(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        
+        if '.csv' in os.path.basename(self.path):
+            # Nested Arrow columns (lists, structs) go into the cells as JSON
+            nested = [column for column, dtype in df.dtypes.items()
+                      if isinstance(dtype, pd.ArrowDtype) and pa.types.is_nested(dtype.pyarrow_dtype)]
+            df = df.assign(**{column: [dumps(value) for value in df[column].tolist()] for column in nested})
+            df.to_csv(self._file, header=self.count == 0, index=False)
+            self.count += len(df)
+        else:
+            self.write_frame(df)
+    
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        print(f"Saved processed data to {self.path}")
@@ -1,179 +1,179 @@
 """
 Parallel version of processor for better performance
+
+A persistent process pool reads byte ranges of the raw NDJSON file itself
+(or gets chunks of in-memory papers) and sends back columnar batches.
+Worker count and the serial/parallel cutover come from a measured tuning
+file written by `python -m benchmarks.bench_parallel_processor --save`.
 """
 import json
-import pandas as pd
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict
-import re
-from multiprocessing import Pool, cpu_count
+from multiprocessing import cpu_count
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
 import config
+from src.codec import loads
+from src.keywords import KeywordExtractor
+from src.ndjson_io import iter_records
+from src.parallel_scan import SHARDS_PER_WORKER, compute_shards, get_pool, iter_shard_lines
+from src.processor import DataProcessor as StandardDataProcessor
+from src.schema import ProcessedPaper, compact_frame
+
+# Used until a benchmark has measured this machine
+DEFAULT_TUNING = {
+    'workers': cpu_count(),
+    'min_parallel_papers': 1000
+}
+
+_worker_processor = None
+
+
+def load_tuning(path: str = config.PROCESSOR_TUNING_FILE) -> Dict:
+    """Measured worker count and cutover; defaults if the file is missing or unreadable"""
+    tuning = dict(DEFAULT_TUNING)
+    try:
+        with open(path, 'r') as f:
+            measured = json.load(f)
+        tuning.update({k: measured[k] for k in DEFAULT_TUNING if k in measured})
+    except (OSError, ValueError):
+        pass
+    return tuning
+
+
+def save_tuning(workers: int, min_parallel_papers: Optional[int], path: str = config.PROCESSOR_TUNING_FILE, **details):
+    """`min_parallel_papers` None means the parallel engine never won and is not used"""
+    with open(path, 'w') as f:
+        json.dump({
+            'workers': workers,
+            'min_parallel_papers': min_parallel_papers,
+            'cpu_count': cpu_count(),
+            'measured_at': datetime.now().isoformat(timespec='seconds'),
+            **details
+        }, f, indent=2)
+
+
+def use_parallel(paper_count: int, tuning: Dict = None) -> bool:
+    tuning = tuning or load_tuning()
+    cutover = tuning['min_parallel_papers']
+    return cutover is not None and tuning['workers'] > 1 and paper_count >= cutover
+
+
+def count_lines(path: str) -> int:
+    """Line count of an uncompressed file, read in large blocks without decoding"""
+    with open(path, 'rb') as f:
+        return sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+
+
+def _worker() -> StandardDataProcessor:
+    """This worker's processor, built on its first task: the pool is shared with dataset scans"""
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = StandardDataProcessor()
+        _worker_processor.keywords.frozen = True
+    return _worker_processor
+
+
+def _sync_keywords(spec: Tuple[str, str, int]):
+    """Use the parent's keyword mode; in tfidf mode, the statistics it saved before this batch"""
+    mode, df_file, documents = spec
+    keywords = _worker().keywords
+    if keywords.mode != mode or keywords.df_file != df_file or (mode == 'tfidf' and keywords.documents != documents):
+        _worker_processor.keywords = KeywordExtractor(mode, df_file, frozen=True)
+
+
+def _process_rows(papers: Iterable, keywords: Tuple[str, str, int]) -> Tuple[Dict[str, list], Tuple[int, Counter]]:
+    """Process papers and return them as column lists (keys are pickled once, not per row)
+
+    The keyword document frequencies observed on the way are sent back with them.
+    """
+    _sync_keywords(keywords)
+    rows = []
+    for paper in papers:
+        row = _worker_processor._process_single_paper(paper)
+        if row:
+            rows.append(row)
+    return (ProcessedPaper.columns(rows) if rows else {}), _worker_processor.keywords.take_pending()
+
+
+def _process_range(task: Tuple[str, int, int, Tuple[str, str, int]]) -> Tuple[Dict[str, list], Tuple[int, Counter]]:
+    """Worker: read and process the raw NDJSON lines in one byte range"""
+    path, start, end, keywords = task
+    return _process_rows((loads(line) for line in iter_shard_lines(path, start, end) if line.strip()), keywords)
+
+
+def _process_chunk(task: Tuple[List, Tuple[str, str, int]]) -> Tuple[Dict[str, list], Tuple[int, Counter]]:
+    """Worker: process a chunk of papers that is already in memory"""
+    papers, keywords = task
+    return _process_rows(papers, keywords)
+
+
+class DataProcessor(StandardDataProcessor):
+    """Standard processing spread over the process pool above the measured cutover
+
+    In tfidf mode every paper of a batch is scored against the keyword
+    statistics as they were when the batch started; the workers' document
+    frequencies are merged back afterwards.
+    """
+
+    def __init__(self, workers: int = None):
+        super().__init__()
+        self.tuning = load_tuning()
+        self.workers = max(1, workers or self.tuning['workers'])
 
-class DataProcessor:
-    def __init__(self):
-        self.quality_threshold = 0.8
-        
     def process_papers(self, filename: str) -> pd.DataFrame:
-        with open(filename, 'r') as f:
-            papers = json.load(f)
-        
-        print(f"Processing {len(papers)} papers with parallel processing")
-        
-        # Use multiprocessing for large datasets
-        if len(papers) > 100:
-            # Use half of available CPUs to avoid overload
-            num_workers = max(1, cpu_count() // 2)
-            chunk_size = len(papers) // num_workers
-            
-            with Pool(num_workers) as pool:
-                processed = pool.map(self._process_single_paper, papers)
-        else:
-            # For small datasets, use sequential processing
-            processed = [self._process_single_paper(paper) for paper in papers]
-        
-        # Filter out None values
-        processed = [p for p in processed if p is not None]
-        
-        df = pd.DataFrame(processed)
-        df = self._add_metrics(df)
-        
+        print(f"Processing papers from {filename} with {self.workers} workers")
+
+        df = self.process_file(filename)
+        print(f"Processed {len(df)} papers")
+        self.keywords.save()
+
         quality_score = self._calculate_quality(df)
         print(f"Data quality score: {quality_score:.2%}")
-        
-        return df
-    
-    def _process_single_paper(self, paper: Dict) -> Dict:
-        """Same as original processor.py"""
-        try:
-            # Extract version information
-            versions = paper.get('versions', [])
-            version_count = len(versions) if versions else 1
-            
-            # Get first and last version dates
-            first_version_date = None
-            last_version_date = None
-            if versions:
-                if len(versions) > 0 and 'created' in versions[0]:
-                    first_version_date = versions[0].get('created')
-                if len(versions) > 0 and 'created' in versions[-1]:
-                    last_version_date = versions[-1].get('created')
-            
-            return {
-                'arxiv_id': paper['arxiv_id'],
-                'title': paper['title'][:500],  
-                'abstract': paper['abstract'][:2000],  
-                'authors': paper['authors'],
-                'author_count': len(paper['authors']),
-                'categories': paper['categories'],
-                'primary_category': paper.get('primary_category', paper['categories'][0] if paper['categories'] else 'unknown'),
-                'published_date': self._parse_date(paper['published']),
-                'updated_date': self._parse_date(paper['updated']),
-                'year': self._parse_date(paper['published']).year,
-                'month': self._parse_date(paper['published']).month,
-                'version_count': version_count,
-                'versions': versions,
-                'first_version_date': first_version_date,
-                'last_version_date': last_version_date,
-                'journal_ref': paper.get('journal-ref') or paper.get('journal_ref'),
-                'doi': paper.get('doi'),
-                'comments': paper.get('comments'),
-                'institutions': self._extract_institutions(paper),
-                'author_affiliations': str(paper.get('authors_parsed', [])) if paper.get('authors_parsed') else "",
-                'publication_date': None,
-                'publication_type': 'preprint',
-                'citation_count': 0,
-                'keywords': self._extract_keywords(paper['title'], paper['abstract'])
-            }
-        except Exception as e:
-            return None
-    
-    def _parse_date(self, date_str: str) -> datetime:
-        """Same as original"""
-        if not date_str:
-            return datetime.now()
-        
-        try:
-            return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-        except:
-            try:
-                return datetime.strptime(date_str, '%a, %d %b %Y %H:%M:%S %Z')
-            except:
-                try:
-                    if date_str.isdigit() and len(date_str) == 4:
-                        return datetime(int(date_str), 1, 1)
-                except:
-                    pass
-                return datetime.now()
-    
-    def _extract_institutions(self, paper: Dict) -> List[str]:
-        """Same as original"""
-        institutions = []
-        authors_parsed = paper.get('authors_parsed', [])
-        for author in authors_parsed:
-            if len(author) > 2 and author[2]:
-                affiliation = author[2].strip()
-                if affiliation and affiliation not in institutions:
-                    institutions.append(affiliation)
-        return institutions
-    
-    def _extract_keywords(self, title: str, abstract: str, max_keywords: int = 5) -> List[str]:
-        """Same as original"""
-        try:
-            text = f"{title} {title} {abstract}"
-            text = text.lower()
-            text = re.sub(r'[^\w\s]', ' ', text)
-            
-            stopwords = {
-                'the', 'a', 'an', 'and', 'or', 'in', 'on', 'to', 'for', 'of', 'with',
-                'is', 'are', 'was', 'were', 'be', 'we', 'our', 'this', 'that', 'these'
-            }
-            
-            words = text.split()
-            word_freq = {}
-            
-            for word in words:
-                if len(word) >= 2 and word not in stopwords:
-                    word_freq[word] = word_freq.get(word, 0) + 1
-            
-            sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-            keywords = [word for word, freq in sorted_words[:max_keywords]]
-            
-            return keywords
-        except Exception:
-            return []
-    
-    def _add_metrics(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Same as original"""
-        df['title_length'] = df['title'].str.len()
-        df['abstract_length'] = df['abstract'].str.len()
-        df['is_collaborative'] = df['author_count'] > 1
-        df['is_interdisciplinary'] = df['categories'].apply(
-            lambda cats: len(set([c.split('.')[0] for c in cats])) > 1
-        )
-        df['days_since_published'] = (datetime.now() - pd.to_datetime(df['published_date'])).dt.days
+
         return df
-    
-    def _calculate_quality(self, df: pd.DataFrame) -> float:
-        """Same as original"""
-        scores = []
-        completeness = 1 - (df.isnull().sum().sum() / (len(df) * len(df.columns)))
-        scores.append(completeness)
-        validity = len(df[df['abstract_length'] > 50]) / len(df)
-        scores.append(validity)
-        uniqueness = 1 - (df['arxiv_id'].duplicated().sum() / len(df))
-        scores.append(uniqueness)
-        return sum(scores) / len(scores)
-    
-    def save_processed_data(self, df: pd.DataFrame, category: str):
-        """Same as original"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        csv_file = f"{config.DATA_DIR}/processed_{category}_{timestamp}.csv"
-        df.to_csv(csv_file, index=False)
-        print(f"Saved processed data to {csv_file}")
-        
-        json_file = f"{config.DATA_DIR}/processed_{category}_{timestamp}.json"
-        df.to_json(json_file, orient='records', date_format='iso')
-        print(f"Saved processed data to {json_file}")
-        
-        return csv_file, json_file
\ No newline at end of file
+
+    def _use_pool(self, paper_count: int) -> bool:
+        # Below the measured cutover, sending work to the pool costs more than it saves
+        return self.workers > 1 and use_parallel(paper_count, dict(self.tuning, workers=self.workers))
+
+    def _keyword_spec(self) -> Tuple[str, str, int]:
+        """What workers need to score keywords like this process; tfidf statistics are saved first"""
+        self.keywords.save()
+        return self.keywords.mode, self.keywords.df_file, self.keywords.documents
+
+    def process_file(self, filename: str) -> pd.DataFrame:
+        if filename.endswith('.ndjson') and self._use_pool(count_lines(filename)):
+            # Uncompressed NDJSON can be split by byte range; workers read it themselves
+            shards = compute_shards(filename, self.workers * SHARDS_PER_WORKER)
+            keywords = self._keyword_spec()
+            tasks = [(filename, start, end, keywords) for start, end in shards]
+            return self._merge(get_pool(self.workers).imap(_process_range, tasks))
+        return self.process_batch(list(iter_records(filename)))
+
+    def process_batch(self, papers: Iterable) -> pd.DataFrame:
+        papers = papers if isinstance(papers, list) else list(papers)
+
+        if not self._use_pool(len(papers)):
+            return super().process_batch(papers)
+
+        num_chunks = self.workers * SHARDS_PER_WORKER
+        chunk_size = max(1, -(-len(papers) // num_chunks))
+        keywords = self._keyword_spec()
+        chunks = [(papers[i:i + chunk_size], keywords) for i in range(0, len(papers), chunk_size)]
+        return self._merge(get_pool(self.workers).imap(_process_chunk, chunks))
+
+    def _merge(self, batches: Iterable[Tuple[Dict[str, list], Tuple[int, Counter]]]) -> pd.DataFrame:
+        """Concatenate columnar batches in order, merge keyword statistics and add the metric columns"""
+        columns = {}
+        for batch, (documents, doc_freq) in batches:
+            for key, values in batch.items():
+                columns.setdefault(key, []).extend(values)
+            self.keywords.merge(documents, doc_freq)
+
+        if not columns:
+            return pd.DataFrame()
+
+        return compact_frame(self._add_metrics(pd.DataFrame(columns)))
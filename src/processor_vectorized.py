@@ -0,0 +1,147 @@
+"""
+Vectorized processor: builds Arrow columns from the papers and derives fields with Arrow list kernels
+"""
+from datetime import datetime
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.date_parser import parse_date_series
+from src.processor import DataProcessor as StandardDataProcessor
+from src.schema import PROCESSED_DTYPES, STRING, Paper, compact_frame
+
+
+def _lists(column: str, values: list) -> pa.ListArray:
+    """A list column as its PROCESSED_DTYPES Arrow type; missing lists become empty ones"""
+    array = pa.array(values, type=PROCESSED_DTYPES[column].pyarrow_dtype, from_pandas=True)
+    if array.null_count:
+        array = pa.ListArray.from_arrays(array.offsets, array.values)
+    return array
+
+
+def _series(array: pa.Array) -> pd.Series:
+    return pd.Series(pd.arrays.ArrowExtensionArray(array))
+
+
+def _take(values: pa.Array, positions: np.ndarray, present: np.ndarray) -> pa.Array:
+    """`values` at `positions` (offsets into a list array's flat values), null where not `present`"""
+    return values.take(pa.array(positions, mask=~present))
+
+
+def _truncated(values: list, limit: int) -> Tuple[pa.Array, np.ndarray]:
+    """Strings cut to `limit` characters like str[:limit], and their lengths; slicing is skipped when none is longer"""
+    array = pa.array(values, type=pa.string())
+    lengths = pc.utf8_length(array).to_numpy(zero_copy_only=False)
+    if len(lengths) and lengths.max() > limit:
+        array = pc.utf8_slice_codeunits(array, 0, limit)
+        lengths = np.minimum(lengths, limit)
+    return array, lengths.astype('int64')
+
+
+def _first_occurrences(rows: np.ndarray, values: pa.Array) -> np.ndarray:
+    """Positions of the first occurrence of each (row, value) pair, in their original order"""
+    codes = pc.dictionary_encode(values).indices.to_numpy().astype(np.int64)
+    width = int(codes.max()) + 1 if len(codes) else 1
+    _, first = np.unique(rows.astype(np.int64) * width + codes, return_index=True)
+    return np.sort(first)
+
+
+def _regroup(rows: np.ndarray, values: pa.Array, size: int) -> pa.ListArray:
+    """One list per row from values whose (ascending) row numbers are in `rows`"""
+    offsets = np.zeros(size + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=size), out=offsets[1:])
+    return pa.ListArray.from_arrays(pa.array(offsets), values)
+
+
+class DataProcessor(StandardDataProcessor):
+    """Same output as the standard processor, computed column by column"""
+
+    def process_batch(self, papers: Iterable) -> pd.DataFrame:
+        papers = list(papers)
+        if not papers:
+            return pd.DataFrame()
+        if set(map(type, papers)) != {Paper}:
+            papers = [Paper.coerce(paper) for paper in papers]
+        raw = Paper.columns(papers)
+
+        authors = _lists('authors', raw['authors'])
+        categories = _lists('categories', raw['categories'])
+        versions = _lists('versions', raw['versions'])
+        authors_parsed = _lists('author_affiliations', raw['authors_parsed'])
+
+        published = parse_date_series(pd.Series(raw['published'], dtype=object))
+        year = published.dt.year
+        month = published.dt.month
+        if not published.isna().any():
+            year = year.astype('int64')
+            month = month.astype('int64')
+
+        # First/last version dates straight from the list offsets
+        offsets = versions.offsets.to_numpy()
+        has_versions = offsets[1:] > offsets[:-1]
+        created = versions.values.field('created')
+        version_count = np.diff(offsets)
+
+        title, title_length = _truncated(raw['title'], 500)
+        abstract, abstract_length = _truncated(raw['abstract'], 2000)
+        author_count = pc.list_value_length(authors).to_numpy().astype('int64')
+
+        journal_ref = pa.array(raw['journal_ref'], type=pa.string())
+        journal_ref = pc.if_else(pc.equal(journal_ref, ''), pa.scalar(None, pa.string()), journal_ref)
+
+        df = pd.DataFrame({
+            'arxiv_id': pd.Series(raw['arxiv_id'], dtype=STRING),
+            'title': _series(title),
+            'abstract': _series(abstract),
+            'authors': _series(authors),
+            'author_count': author_count,
+            'categories': _series(categories),
+            'primary_category': raw['primary_category'],
+            'published_date': published,
+            'updated_date': parse_date_series(pd.Series(raw['updated'], dtype=object)),
+            'year': year,
+            'month': month,
+            'version_count': np.where(version_count > 0, version_count, 1).astype('int64'),
+            'versions': _series(versions),
+            'first_version_date': _series(_take(created, offsets[:-1], has_versions)),
+            'last_version_date': _series(_take(created, offsets[1:] - 1, has_versions)),
+            'journal_ref': _series(journal_ref),
+            'doi': pd.Series(raw['doi'], dtype=STRING),
+            'comments': pd.Series(raw['comments'], dtype=STRING),
+            'institutions': _series(self._institutions(authors_parsed)),
+            'author_affiliations': _series(authors_parsed),
+            'publication_date': pd.Series(None, index=range(len(papers)), dtype=STRING),
+            'publication_type': 'preprint',
+            'citation_count': 0,
+            'keywords': self.keywords.extract_many(raw['title'], raw['abstract']),
+            # Metrics as the standard processor's _add_metrics adds them
+            'title_length': title_length,
+            'abstract_length': abstract_length,
+            'is_collaborative': author_count > 1,
+            'is_interdisciplinary': self._interdisciplinary(categories),
+            'days_since_published': (datetime.now() - published).dt.days
+        })
+
+        return compact_frame(df)
+
+    def _institutions(self, authors_parsed: pa.ListArray) -> pa.ListArray:
+        """Distinct stripped third fields ([last, first, affiliation]) per paper, in first-seen order"""
+        entries = authors_parsed.values
+        offsets = entries.offsets.to_numpy()
+        affiliations = pc.utf8_trim_whitespace(_take(entries.values, offsets[:-1] + 2, np.diff(offsets) > 2))
+        rows = pc.list_parent_indices(authors_parsed).to_numpy()
+
+        named = np.flatnonzero(pc.fill_null(pc.not_equal(affiliations, ''), False).to_numpy(zero_copy_only=False))
+        affiliations = affiliations.take(named)
+        first = _first_occurrences(rows[named], affiliations)
+        return _regroup(rows[named][first], affiliations.take(first), len(authors_parsed))
+
+    def _interdisciplinary(self, categories: pa.ListArray) -> np.ndarray:
+        """More than one archive ("cs" of "cs.LG") among a paper's categories"""
+        archives = pc.list_element(pc.split_pattern(categories.flatten(), '.', max_splits=1), 0)
+        rows = pc.list_parent_indices(categories).to_numpy()
+        distinct = rows[_first_occurrences(rows, archives)]
+        return np.bincount(distinct, minlength=len(categories)) > 1
@@ -0,0 +1,134 @@
+"""
+Append-only run log (NDJSON) and rolling baselines for spotting slow runs
+"""
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+import config
+from src.codec import dumps, loads
+
+# Stages shorter than this are too noisy to flag on their own
+MIN_STAGE_SECONDS = 0.1
+
+
+@contextmanager
+def locked(path: str, blocking: bool = True):
+    """Exclusive advisory lock on `path`.lock, held for the block; serializes concurrent runs
+
+    Yields whether the lock was taken: with blocking=False the block runs at
+    once and gets False when another process holds the lock.
+    """
+    with open(f"{path}.lock", 'a') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def run_throughput(run: Dict) -> float:
+    return run['papers_processed'] / run['processing_time'] if run.get('processing_time') else 0.0
+
+
+class RunHistory:
+    """One JSON line per finished run: parameters, totals and stage timings
+
+    Lines are only ever appended, each with a single write under the lock,
+    so concurrent runs cannot interleave or lose each other's records. A
+    line cut short by a crash is skipped when reading.
+    """
+
+    def __init__(
+        self,
+        history_file: str = config.RUN_HISTORY_FILE,
+        window: int = config.BASELINE_RUNS,
+        min_runs: int = config.BASELINE_MIN_RUNS,
+        threshold: float = config.REGRESSION_THRESHOLD
+    ):
+        self.history_file = history_file
+        self.window = window
+        self.min_runs = min_runs
+        self.threshold = threshold
+
+    def append(self, run: Dict):
+        line = (dumps(run) + '\n').encode('utf-8')
+        with locked(self.history_file):
+            fd = os.open(self.history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def runs(self) -> Iterator[Dict]:
+        if not os.path.exists(self.history_file):
+            return
+        with open(self.history_file, 'rb') as f:
+            for line in f:
+                try:
+                    yield loads(line)
+                except ValueError:
+                    continue
+
+    def comparable(self, params: Dict) -> List[Dict]:
+        """The last `window` successful runs with the same parameters, oldest first"""
+        matches = [run for run in self.runs() if run.get('success') and run.get('params') == params]
+        return matches[-self.window:]
+
+    def baseline(self, params: Dict) -> Optional[Dict]:
+        """Rolling p50/p95 throughput (papers/sec), overall and per stage; None until `min_runs` exist"""
+        runs = self.comparable(params)
+        if len(runs) < self.min_runs:
+            return None
+
+        throughputs = [run_throughput(run) for run in runs]
+        stages = {}
+        for run in runs:
+            for stage in run.get('stages', []):
+                if stage.get('items'):
+                    stages.setdefault(stage['name'], []).append(stage['items_per_sec'])
+
+        return {
+            'runs': len(runs),
+            'p50': float(np.percentile(throughputs, 50)),
+            'p95': float(np.percentile(throughputs, 95)),
+            'stages': {
+                name: float(np.percentile(values, 50))
+                for name, values in stages.items() if len(values) >= self.min_runs
+            }
+        }
+
+    def check(self, run: Dict) -> Optional[Dict]:
+        """Compare a finished run with the baseline of the runs before it
+
+        A run is flagged when its throughput is more than `threshold` below the
+        baseline median; stages are flagged the same way against their own medians.
+        """
+        baseline = self.baseline(run.get('params'))
+        if baseline is None:
+            return None
+
+        throughput = run_throughput(run)
+        floor = 1 - self.threshold
+        slow_stages = [
+            stage['name'] for stage in run.get('stages', [])
+            if stage.get('items') and stage['wall_seconds'] >= MIN_STAGE_SECONDS and stage['name'] in baseline['stages']
+            and stage['items_per_sec'] < baseline['stages'][stage['name']] * floor
+        ]
+        return {
+            'baseline_runs': baseline['runs'],
+            'p50': baseline['p50'],
+            'p95': baseline['p95'],
+            'throughput': throughput,
+            'ratio': throughput / baseline['p50'] if baseline['p50'] else 0.0,
+            'regression': bool(run.get('success')) and throughput < baseline['p50'] * floor,
+            'slow_stages': slow_stages
+        }
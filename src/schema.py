@@ -0,0 +1,238 @@
+"""
+Typed records shared by the collector and the processors
+
+`Paper` is a snapshot record after transformation (what the raw NDJSON
+intermediate holds); `ProcessedPaper` is one processed row. Both use
+`__slots__`, so a paper costs one small object instead of a dict.
+Processed frames are stored with the compact dtypes in PROCESSED_DTYPES.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+@dataclass
+class Paper:
+    __slots__ = (
+        'arxiv_id', 'title', 'abstract', 'authors', 'categories', 'primary_category',
+        'published', 'updated', 'doi', 'journal_ref', 'comments', 'versions', 'authors_parsed'
+    )
+    arxiv_id: str
+    title: str
+    abstract: str
+    authors: List[str]
+    categories: List[str]
+    primary_category: str
+    published: Optional[str]
+    updated: Optional[str]
+    doi: Optional[str]
+    journal_ref: Optional[str]
+    comments: Optional[str]
+    versions: List[Dict]
+    authors_parsed: List[List[str]]
+
+    @classmethod
+    def from_raw(cls, raw: Dict) -> 'Paper':
+        """Build from a line of arxiv-metadata-oai-snapshot.json"""
+        # Parse authors
+        authors = raw.get('authors', '')
+        if isinstance(authors, str):
+            authors = [a.strip() for a in authors.replace(' and ', ', ').split(',') if a.strip()]
+
+        # Parse categories
+        categories = raw.get('categories', '').split()
+
+        # Get first version date
+        versions = raw.get('versions', [])
+        published = versions[0].get('created') if versions else None
+
+        return cls(
+            raw.get('id', ''),
+            cls.clean_text(raw.get('title', '')),
+            cls.clean_text(raw.get('abstract', '')),
+            authors,
+            categories,
+            categories[0] if categories else '',
+            published,
+            raw.get('update_date'),
+            raw.get('doi'),
+            raw.get('journal-ref'),
+            raw.get('comments'),
+            versions,
+            raw.get('authors_parsed', [])
+        )
+
+    @staticmethod
+    def clean_text(text: str) -> str:
+        """Title/abstract as stored: hard line breaks become spaces, outer whitespace dropped"""
+        return text.replace('\n', ' ').strip()
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> 'Paper':
+        """Build from the dict form (raw NDJSON intermediate, Parquet cache rows)"""
+        categories = record['categories']
+        return cls(
+            record['arxiv_id'],
+            record['title'],
+            record['abstract'],
+            record['authors'],
+            categories,
+            record.get('primary_category', categories[0] if categories else 'unknown'),
+            record['published'],
+            record['updated'],
+            record.get('doi'),
+            record.get('journal-ref') or record.get('journal_ref'),
+            record.get('comments'),
+            record.get('versions') or [],
+            record.get('authors_parsed') or []
+        )
+
+    @classmethod
+    def columns(cls, papers: List['Paper']) -> Dict[str, list]:
+        return {name: list(map(attrgetter(name), papers)) for name in cls.__slots__}
+
+    @classmethod
+    def coerce(cls, paper) -> 'Paper':
+        return paper if isinstance(paper, cls) else cls.from_dict(paper)
+
+    def to_dict(self) -> Dict:
+        """Dict form with the snapshot's key names (`journal-ref`), as written to the raw intermediate"""
+        return {
+            'arxiv_id': self.arxiv_id,
+            'title': self.title,
+            'abstract': self.abstract,
+            'authors': self.authors,
+            'categories': self.categories,
+            'primary_category': self.primary_category,
+            'published': self.published,
+            'updated': self.updated,
+            'doi': self.doi,
+            'journal-ref': self.journal_ref,
+            'comments': self.comments,
+            'versions': self.versions,
+            'authors_parsed': self.authors_parsed
+        }
+
+
+@dataclass
+class ProcessedPaper:
+    __slots__ = (
+        'arxiv_id', 'title', 'abstract', 'authors', 'author_count', 'categories', 'primary_category',
+        'published_date', 'updated_date', 'year', 'month', 'version_count', 'versions',
+        'first_version_date', 'last_version_date', 'journal_ref', 'doi', 'comments',
+        'institutions', 'author_affiliations', 'publication_date', 'publication_type',
+        'citation_count', 'keywords'
+    )
+    arxiv_id: str
+    title: str
+    abstract: str
+    authors: List[str]
+    author_count: int
+    categories: List[str]
+    primary_category: str
+    published_date: Optional[datetime]
+    updated_date: Optional[datetime]
+    year: Optional[int]
+    month: Optional[int]
+    version_count: int
+    versions: List[Dict]
+    first_version_date: Optional[str]
+    last_version_date: Optional[str]
+    journal_ref: Optional[str]
+    doi: Optional[str]
+    comments: Optional[str]
+    institutions: List[str]
+    author_affiliations: List[List[str]]  # authors_parsed as given: [last, first, affiliation]
+    publication_date: Optional[str]  # To be enriched from Crossref API
+    publication_type: str  # preprint/journal/conference
+    citation_count: int  # To be enriched from Semantic Scholar API
+    keywords: List[str]
+
+    @classmethod
+    def columns(cls, rows: List['ProcessedPaper']) -> Dict[str, list]:
+        """Rows -> dict of column lists"""
+        return {name: list(map(attrgetter(name), rows)) for name in cls.__slots__}
+
+    @classmethod
+    def to_frame(cls, rows: Iterable['ProcessedPaper']) -> pd.DataFrame:
+        rows = list(rows)
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(cls.columns(rows))
+
+
+STRING = pd.ArrowDtype(pa.string())
+STRING_LIST = pd.ArrowDtype(pa.list_(pa.string()))
+
+# Text lives in Arrow buffers instead of one Python object per cell, nested
+# fields as Arrow lists/structs, repeated labels as categoricals and
+# missing numbers as nullable integers instead of float NaN
+PROCESSED_DTYPES = {
+    'arxiv_id': STRING,
+    'title': STRING,
+    'abstract': STRING,
+    'authors': STRING_LIST,
+    'author_count': 'int32',
+    'categories': STRING_LIST,
+    'primary_category': 'category',
+    'published_date': 'datetime64[ns]',
+    'updated_date': 'datetime64[ns]',
+    'year': 'Int16',
+    'month': 'Int8',
+    'version_count': 'int16',
+    'versions': pd.ArrowDtype(pa.list_(pa.struct([('version', pa.string()), ('created', pa.string())]))),
+    'first_version_date': STRING,
+    'last_version_date': STRING,
+    'journal_ref': STRING,
+    'doi': STRING,
+    'comments': STRING,
+    'institutions': STRING_LIST,
+    'author_affiliations': pd.ArrowDtype(pa.list_(pa.list_(pa.string()))),
+    'publication_date': STRING,
+    'publication_type': 'category',
+    'citation_count': 'int32',
+    'keywords': STRING_LIST,
+    'title_length': 'int32',
+    'abstract_length': 'int32',
+    'days_since_published': 'Int32'
+}
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert a processed frame to PROCESSED_DTYPES; columns not listed are left as they are"""
+    if df.empty:
+        return df
+
+    converted = {}
+    for column, dtype in PROCESSED_DTYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        values = df[column]
+        if isinstance(dtype, pd.ArrowDtype):
+            array = pa.array(values.to_numpy(dtype=object), type=dtype.pyarrow_dtype, from_pandas=True)
+            converted[column] = pd.Series(pd.arrays.ArrowExtensionArray(array), index=df.index)
+        elif dtype == 'datetime64[ns]':
+            converted[column] = pd.to_datetime(values)
+        else:
+            converted[column] = values.astype(dtype)
+    return df.assign(**converted)
+
+
+def read_processed_parquet(path: str) -> pd.DataFrame:
+    """Read a processed Parquet artifact back with PROCESSED_DTYPES
+
+    pandas cannot rebuild nested Arrow dtypes from the metadata it writes
+    ("list<item: string>[pyarrow]"), so the table is converted without it.
+    """
+    return compact_frame(pq.read_table(path).to_pandas(ignore_metadata=True))
+
+
+def frame_memory(df: pd.DataFrame) -> Dict:
+    """memory_usage(deep=True) of a frame: bytes per column and the total"""
+    columns = df.memory_usage(index=False, deep=True)
+    return {'rows': len(df), 'bytes': int(columns.sum()), 'columns': {name: int(size) for name, size in columns.items()}}
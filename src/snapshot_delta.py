@@ -0,0 +1,114 @@
+"""
+Papers added, updated and removed since the last snapshot ingested in delta mode
+
+Every Kaggle release rewrites the whole snapshot, but few records change.
+The dataset index already holds each line's arxiv_id and update_date; joining
+those fingerprints with the manifest saved by the previous delta run tells
+which lines to decode and which ids are gone, without touching the rest.
+Only papers in the run's category/year scope are fingerprinted, so a paper
+that moves out of scope shows up as removed.
+"""
+import os
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+import config
+from src.dataset_index import DatasetIndex
+
+MANIFEST_COLUMNS = {'arxiv_id': pa.string(), 'update_date': pa.string()}
+
+
+@dataclass
+class SnapshotChanges:
+    added: np.ndarray
+    updated: np.ndarray
+    removed: List[str]
+    unchanged: int
+    first_run: bool
+
+    @property
+    def offsets(self) -> List[int]:
+        """Byte offsets of the added and updated lines, in file order"""
+        return np.sort(np.concatenate([self.added, self.updated])).tolist()
+
+    def summary(self) -> str:
+        if self.first_run:
+            return f"No earlier delta run: all {len(self.added):,} papers in scope count as added"
+        return (f"{len(self.added):,} added, {len(self.updated):,} updated, {len(self.removed):,} removed, "
+                f"{self.unchanged:,} unchanged")
+
+
+class SnapshotDelta:
+    """Diffs the current snapshot against the last ingested one
+
+    Each filter combination keeps its own manifest, so a `--category cs` delta
+    run does not mark math papers as seen. The category and year filters are
+    applied to the fingerprints themselves; the keyword needs the decoded
+    text, so DatasetCollector.collect_changes applies it to the changed
+    lines. commit() makes the current snapshot the new baseline; call it
+    only once its changes are stored, and an interrupted run simply sees the
+    same changes again.
+    """
+
+    def __init__(self, index: DatasetIndex, category: Optional[str] = None, year: Optional[int] = None,
+                 keyword: Optional[str] = None, manifest_file: str = config.SNAPSHOT_MANIFEST_FILE):
+        self.index = index
+        self.category = category
+        self.year = year
+        scope = '_'.join(f"{name}-{value}" for name, value in (('category', category), ('year', year), ('keyword', keyword)) if value)
+        if scope:
+            root, ext = os.path.splitext(manifest_file)
+            manifest_file = f"{root}.{re.sub(r'[^A-Za-z0-9.-]+', '_', scope)}{ext}"
+        self.manifest_file = manifest_file
+        self.current = None
+
+    def previous(self) -> Optional[pa.Table]:
+        if not os.path.exists(self.manifest_file):
+            return None
+        return csv.read_csv(
+            self.manifest_file,
+            parse_options=csv.ParseOptions(delimiter='\t', quote_char=False),
+            convert_options=csv.ConvertOptions(column_types=MANIFEST_COLUMNS)
+        )
+
+    def changes(self) -> SnapshotChanges:
+        self.current = self.index.fingerprints(category=self.category, year=self.year)
+        previous = self.previous()
+        if previous is None:
+            return SnapshotChanges(self.current['offset'].to_numpy(), np.empty(0, dtype=np.int64), [], 0, True)
+
+        # Hash join in Arrow: no Python objects per paper, even for millions of ids
+        joined = self.current.join(
+            previous.rename_columns(['arxiv_id', 'previous_update_date']), 'arxiv_id', join_type='full outer'
+        )
+        added = pc.is_null(joined['previous_update_date'])
+        removed = pc.is_null(joined['offset'])
+        kept = pc.invert(pc.or_(added, removed))
+        updated = pc.and_(kept, pc.not_equal(joined['update_date'], joined['previous_update_date']))
+        updated_offsets = joined.filter(updated)['offset'].to_numpy()
+        return SnapshotChanges(
+            added=joined.filter(added)['offset'].to_numpy(),
+            updated=updated_offsets,
+            removed=joined.filter(removed)['arxiv_id'].to_pylist(),
+            # pc.sum over an empty scope is null, so count the rows instead
+            unchanged=joined.filter(kept).num_rows - len(updated_offsets),
+            first_run=False
+        )
+
+    def commit(self):
+        """Save the in-scope fingerprints read by changes() as the manifest for the next run"""
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            # write_csv would quote the header row
+            f.write(('\t'.join(MANIFEST_COLUMNS) + '\n').encode('utf-8'))
+            csv.write_csv(
+                self.current.select(list(MANIFEST_COLUMNS)), f,
+                csv.WriteOptions(include_header=False, delimiter='\t', quoting_style='none')
+            )
+        os.replace(tmp_file, self.manifest_file)
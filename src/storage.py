@@ -1,14 +1,235 @@
 import json
 import pandas as pd
-from typing import Dict, List
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
 from opensearchpy import OpenSearch
 import boto3
 import config
+from src.artifact_shipper import ArtifactShipper
+from src.bulk_indexer import BulkIndexer, iter_documents
+from src.index_ledger import IndexLedger
+from src.index_profiles import IndexProfiles
+from src.local_search import LocalSearchIndex
+from src.query_cache import QueryCache
 
-class StorageManager:
-    def __init__(self):
+SEARCH_BACKENDS = ('auto', 'opensearch', 'local')
+
+# Exact total and the top categories / recent years distribution in one round trip
+STATISTICS_BODY = {
+    "size": 0,
+    "track_total_hits": True,
+    "aggs": {
+        "top_categories": {
+            "terms": {"field": "primary_category", "size": 5}
+        },
+        "recent_years": {
+            "terms": {"field": "year", "size": 5, "order": {"_key": "desc"}}
+        }
+    }
+}
+
+def search_body(query: str, size: int) -> Dict:
+    return {
+        "query": {
+            "multi_match": {
+                "query": query,
+                "fields": ["title", "abstract"]
+            }
+        },
+        "size": size
+    }
+
+def msearch_body(queries: List[str], size: int) -> List[Dict]:
+    """Header and body lines of one _msearch request for several queries"""
+    body = []
+    for query in queries:
+        body.append({"index": config.OPENSEARCH_INDEX})
+        body.append(search_body(query, size))
+    return body
+
+def search_key(query: str, size: int) -> Tuple:
+    return ('search', query, size)
+
+STATISTICS_KEY = ('statistics',)
+
+def parse_hits(response: Dict) -> List[Dict]:
+    return [hit["_source"] for hit in response["hits"]["hits"]]
+
+def parse_statistics(response: Dict) -> Dict:
+    return {
+        "total_papers": response["hits"]["total"]["value"],
+        "top_categories": response["aggregations"]["top_categories"]["buckets"],
+        "recent_years": response["aggregations"]["recent_years"]["buckets"]
+    }
+
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """One S3 client per process, shared by every upload (boto3 clients are thread-safe)"""
+    return boto3.client(
+        's3',
+        region_name=config.AWS_REGION,
+        endpoint_url=config.S3_ENDPOINT_URL
+    )
+
+@lru_cache(maxsize=None)
+def get_shipper() -> ArtifactShipper:
+    """One artifact shipper (and transfer manager) per process"""
+    return ArtifactShipper(get_s3_client())
+
+class ChangedDocuments:
+    """`_source` dicts of a frame, minus papers whose content digest the ledger already has"""
+    
+    def __init__(self, df: pd.DataFrame, ledger: Optional[IndexLedger]):
+        self.df = df
+        self.ledger = ledger
+        self.pending = {}
+        self.skipped = 0
+    
+    def __iter__(self) -> Iterator[Dict]:
+        for doc in iter_documents(self.df):
+            if self.ledger is not None:
+                digest = self.ledger.digest(doc)
+                if self.ledger.is_indexed(doc['arxiv_id'], digest):
+                    self.skipped += 1
+                    continue
+                self.pending[doc['arxiv_id']] = (doc.get('updated_date'), doc.get('version_count'), digest)
+            yield doc
+    
+    def record(self, result: Dict):
+        """Remember the successfully indexed papers in the ledger"""
+        if self.ledger is None:
+            return
+        failed_ids = {error['_id'] for error in result['errors']}
+        self.ledger.record(
+            (arxiv_id, *entry) for arxiv_id, entry in self.pending.items() if arxiv_id not in failed_ids
+        )
+    
+    def report(self, result: Dict):
+        sent = len(self.df) - self.skipped
+        print(f"Indexed {result['success']}/{sent} papers by OpenSearch "
+              f"(bulk mode, {result['docs_per_sec']:,.0f} docs/sec)")
+        if self.skipped:
+            print(f"Skipped {self.skipped} unchanged papers (incremental mode)")
+        if result['failed']:
+            print(f"Failed to index {result['failed']} papers")
+        result['skipped'] = self.skipped
+
+def forget_deleted(ledger: Optional[IndexLedger], arxiv_ids: List[str], result: Dict):
+    """Drop deleted papers from the ledger, so a paper that comes back is not skipped as unchanged"""
+    failed_ids = {error['_id'] for error in result['errors']}
+    (ledger if ledger is not None else IndexLedger()).remove(i for i in arxiv_ids if i not in failed_ids)
+
+class BaseStorageManager:
+    """Backend choice, query cache, ledger rules and result handling shared by the sync and async managers
+
+    Subclasses only add the I/O: connecting, sending requests and calling the local index.
+    """
+    
+    def __init__(self, incremental: bool = False, search_backend: str = config.SEARCH_BACKEND):
+        if search_backend not in SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend: {search_backend}")
+        self.search_backend = search_backend
         self.opensearch = None
-        self._connect_opensearch()
+        self.local_index = None
+        # Search and aggregation results, dropped whenever the index is written to
+        self.query_cache = QueryCache()
+        # Ledger of already-indexed content; only consulted in incremental mode
+        self.ledger = IndexLedger() if incremental else None
+    
+    def _open_local_index(self):
+        """Use the local search index when asked to, or when 'auto' could not reach OpenSearch"""
+        if self.search_backend == 'local' or (self.search_backend == 'auto' and not self.opensearch):
+            self.local_index = LocalSearchIndex()
+            print(f"Using local search index: {self.local_index.path}")
+    
+    def _index_created(self, created: bool):
+        # A fresh index holds nothing the ledger remembers
+        if created and self.ledger is not None:
+            self.ledger.clear()
+    
+    def _changed_documents(self, df: pd.DataFrame, only_changed: Optional[bool]) -> ChangedDocuments:
+        if only_changed is None:
+            only_changed = self.ledger is not None
+        ledger = (self.ledger if self.ledger is not None else IndexLedger()) if only_changed else None
+        return ChangedDocuments(df, ledger)
+    
+    def _indexed_locally(self, added: int) -> Dict:
+        self.query_cache.invalidate()
+        print(f"Indexed {added} papers in the local search index")
+        return {'success': added, 'failed': 0, 'errors': [], 'skipped': 0}
+    
+    def _indexed(self, documents: ChangedDocuments, result: Dict) -> Dict:
+        self.query_cache.invalidate()
+        documents.report(result)
+        documents.record(result)
+        return result
+    
+    def _removed_locally(self, arxiv_ids: List[str], removed: int) -> Dict:
+        print(f"Removed {removed} papers from the local search index")
+        return self._deleted(arxiv_ids, {'success': len(arxiv_ids), 'failed': 0, 'errors': []})
+    
+    def _deleted_from_opensearch(self, arxiv_ids: List[str], result: Dict) -> Dict:
+        print(f"Deleted {result['success']}/{len(arxiv_ids)} papers from OpenSearch")
+        return self._deleted(arxiv_ids, result)
+    
+    def _deleted(self, arxiv_ids: List[str], result: Dict) -> Dict:
+        self.query_cache.invalidate()
+        forget_deleted(self.ledger, arxiv_ids, result)
+        return result
+    
+    def _cached_searches(self, queries: List[str], size: int) -> Tuple[Dict[str, List[Dict]], List[str]]:
+        """Results already in the cache, and the distinct queries still to send"""
+        results = {}
+        missing = []
+        for query in dict.fromkeys(queries):
+            cached = self.query_cache.get(search_key(query, size))
+            if cached is None:
+                missing.append(query)
+            else:
+                results[query] = cached
+        return results, missing
+    
+    def _cache_search(self, results: Dict[str, List[Dict]], query: str, size: int, hits: List[Dict]):
+        results[query] = hits
+        self.query_cache.put(search_key(query, size), hits)
+    
+    def _cache_responses(self, results: Dict[str, List[Dict]], queries: List[str], size: int, responses: List[Dict]):
+        for query, response in zip(queries, responses):
+            # Failures are per query; they are reported and not cached
+            if "error" in response:
+                print(f"Search error for '{query}': {response['error']}")
+                continue
+            self._cache_search(results, query, size, parse_hits(response))
+    
+    @staticmethod
+    def _search_results(results: Dict[str, List[Dict]], queries: List[str]) -> List[List[Dict]]:
+        """One list per query, in order; copies, so callers cannot alter the cache"""
+        return [list(results.get(query, [])) for query in queries]
+    
+    def _local_statistics(self) -> Dict:
+        return {"total_papers": self.local_index.count()}
+    
+    def _cached_statistics(self) -> Optional[Dict]:
+        cached = self.query_cache.get(STATISTICS_KEY)
+        return dict(cached) if cached is not None else None
+    
+    def _cache_statistics(self, response: Dict) -> Dict:
+        stats = parse_statistics(response)
+        self.query_cache.put(STATISTICS_KEY, stats)
+        return dict(stats)
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the search and statistics cache"""
+        return self.query_cache.stats()
+
+class StorageManager(BaseStorageManager):
+    def __init__(self, incremental: bool = False, search_backend: str = config.SEARCH_BACKEND):
+        super().__init__(incremental, search_backend)
+        self._bulk_loading = False
+        if search_backend != 'local':
+            self._connect_opensearch()
+        self._open_local_index()
     
     def _connect_opensearch(self):
         """Connect to OpenSearch if available"""
@@ -16,144 +237,142 @@ class StorageManager:
             self.opensearch = OpenSearch(
                 hosts=[{'host': config.OPENSEARCH_HOST, 'port': config.OPENSEARCH_PORT}],
                 use_ssl=False,
-                verify_certs=False
+                verify_certs=False,
+                # One pooled connection per bulk worker thread
+                pool_maxsize=config.BULK_THREADS
             )
             # Create index if not exists
-            if not self.opensearch.indices.exists(index=config.OPENSEARCH_INDEX):
-                self._create_index()
+            self._create_index()
         except:
+            self.opensearch = None
             print("OpenSearch not available")
     
     def _create_index(self):
-        """Create OpenSearch index with basic mappings"""
-        index_body = {
-            "mappings": {
-                "properties": {
-                    "arxiv_id": {"type": "keyword"},
-                    "title": {"type": "text"},
-                    "abstract": {"type": "text"},
-                    "authors": {"type": "keyword"},
-                    "primary_category": {"type": "keyword"},
-                    "year": {"type": "integer"},
-                    "keywords": {"type": "keyword"}
-                }
-            }
-        }
-        
-        self.opensearch.indices.create(index=config.OPENSEARCH_INDEX, body=index_body)
-        print(f"Created index: {config.OPENSEARCH_INDEX}")
+        """Create the current index profile behind the alias unless an index is already there"""
+        self._index_created(IndexProfiles(self.opensearch).ensure())
+    
+    def reindex(self) -> Optional[Dict]:
+        """Move the papers to an index with the current profile without taking search down"""
+        if not self.opensearch:
+            print("OpenSearch not available")
+            return None
+        result = IndexProfiles(self.opensearch).reindex()
+        self.query_cache.invalidate()
+        return result
     
     def upload_to_s3(self, local_file: str, s3_key: str):
-        """Upload file to S3"""
-        try:
-            # Try to create S3 client
-            s3_client = boto3.client(
-                's3', 
-                region_name=config.AWS_REGION
-            )
-            
-            # Upload the file
-            s3_client.upload_file(local_file, config.S3_BUCKET, s3_key)
-            print(f"✓ Uploaded to s3://{config.S3_BUCKET}/{s3_key}")
-            return True
-            
-        except Exception as e:
-            # If S3 is not configured or fails, continue without error
-            print(f"S3 upload skipped: {e}")
-            print(f"  (File saved locally: {local_file})")
-            return False
+        """Upload file to S3 (compressed, skipped if unchanged)"""
+        return get_shipper().ship(local_file, s3_key)['status'] != 'failed'
     
-    def index_papers(self, df: pd.DataFrame):
-        """Bulk index papers to OpenSearch for better performance"""
+    def ship_artifacts(self, artifacts: List[Tuple[str, str]], frames: List[Tuple[pd.DataFrame, str]] = (),
+                       metadata: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """Upload several (file, key) pairs and (DataFrame, key) pairs as Parquet, concurrently"""
+        return get_shipper().ship_all(artifacts, frames, metadata)
+    
+    def index_papers(self, df: pd.DataFrame, only_changed: bool = None):
+        """Bulk index papers to OpenSearch with the parallel bulk engine
+        
+        In incremental mode, papers whose content digest matches the ledger are skipped.
+        With the local search backend, the batch is appended to the local index instead.
+        """
+        if self.local_index is not None:
+            return self._indexed_locally(self.local_index.add(df))
+        
         if not self.opensearch:
             print("OpenSearch not available")
             return
         
-        from opensearchpy import helpers
+        documents = self._changed_documents(df, only_changed)
+        indexer = BulkIndexer(self.opensearch)
+        # Large one-off loads get bulk-friendly settings unless a bulk_load() is already active
+        tune = not self._bulk_loading and len(df) >= config.BULK_SETTINGS_THRESHOLD
         
-        # Prepare bulk actions
-        actions = []
-        for _, row in df.iterrows():
-            doc = row.to_dict()
-            # Convert lists to proper format
-            if 'authors' in doc and isinstance(doc['authors'], str):
-                doc['authors'] = [doc['authors']]
-            
-            actions.append({
-                "_index": config.OPENSEARCH_INDEX,
-                "_id": doc['arxiv_id'],
-                "_source": doc
-            })
-        
-        # Bulk index
         try:
-            success, failed = helpers.bulk(
-                self.opensearch, 
-                actions,
-                chunk_size=100,  # Process 100 documents at a time
-                request_timeout=30
-            )
-            print(f"Indexed {success}/{len(df)} papers by OpenSearch (bulk mode)")
-            if failed:
-                print(f"Failed to index {len(failed)} papers")
+            with indexer.bulk_settings() if tune else nullcontext():
+                result = indexer.index_documents(documents)
+            return self._indexed(documents, result)
         except Exception as e:
             print(f"Bulk indexing error: {e}")
     
-    def search_papers(self, query: str, size: int = 10) -> List[Dict]:
-        """Search papers in OpenSearch"""
-        if not self.opensearch:
-            return []
+    def delete_papers(self, arxiv_ids: List[str]) -> Optional[Dict]:
+        """Delete papers by id from OpenSearch or the local index and drop them from the ledger"""
+        if self.local_index is not None:
+            return self._removed_locally(arxiv_ids, self.local_index.remove(arxiv_ids))
         
-        search_body = {
-            "query": {
-                "multi_match": {
-                    "query": query,
-                    "fields": ["title", "abstract"]
-                }
-            },
-            "size": size
-        }
+        if not self.opensearch:
+            print("OpenSearch not available")
+            return None
         
         try:
-            response = self.opensearch.search(
-                index=config.OPENSEARCH_INDEX,
-                body=search_body
-            )
-            return [hit["_source"] for hit in response["hits"]["hits"]]
+            result = BulkIndexer(self.opensearch).delete_documents(arxiv_ids)
         except Exception as e:
-            print(f"Search error: {e}")
-            return []
+            print(f"Bulk delete error: {e}")
+            return None
+        return self._deleted_from_opensearch(arxiv_ids, result)
+    
+    @contextmanager
+    def bulk_load(self):
+        """Keep bulk-friendly index settings across several index_papers calls"""
+        if not self.opensearch or self._bulk_loading:
+            yield
+            return
+        
+        self._bulk_loading = True
+        try:
+            with BulkIndexer(self.opensearch).bulk_settings():
+                yield
+        finally:
+            self._bulk_loading = False
+            # Searches during the load saw an unrefreshed index
+            self.query_cache.invalidate()
+    
+    def search_papers(self, query: str, size: int = 10) -> List[Dict]:
+        """Search papers in OpenSearch, or in the local index; results are cached until the next write"""
+        results, missing = self._cached_searches([query], size)
+        
+        if missing and self.local_index is not None:
+            self._cache_search(results, query, size, self.local_index.search(query, size))
+        elif missing and self.opensearch:
+            try:
+                response = self.opensearch.search(index=config.OPENSEARCH_INDEX, body=search_body(query, size))
+            except Exception as e:
+                print(f"Search error: {e}")
+                return []
+            self._cache_search(results, query, size, parse_hits(response))
+        
+        return self._search_results(results, [query])[0]
+    
+    def search_many(self, queries: List[str], size: int = 10) -> List[List[Dict]]:
+        """Search several queries; the ones not in the cache go to OpenSearch in a single _msearch request"""
+        results, missing = self._cached_searches(queries, size)
+        
+        if missing and self.local_index is not None:
+            for query in missing:
+                self._cache_search(results, query, size, self.local_index.search(query, size))
+        elif missing and self.opensearch:
+            try:
+                responses = self.opensearch.msearch(body=msearch_body(missing, size))["responses"]
+            except Exception as e:
+                print(f"Search error: {e}")
+                responses = []
+            self._cache_responses(results, missing, size, responses)
+        
+        return self._search_results(results, queries)
     
     def get_statistics(self) -> Dict:
-        """Get meaningful statistics from OpenSearch"""
+        """Get meaningful statistics from OpenSearch (cached until the next write)"""
+        if self.local_index is not None:
+            return self._local_statistics()
+        
         if not self.opensearch:
             return {}
         
+        cached = self._cached_statistics()
+        if cached is not None:
+            return cached
+        
         try:
-            count = self.opensearch.count(index=config.OPENSEARCH_INDEX)
-            
-            # Get top categories and recent years distribution
-            agg_body = {
-                "size": 0,
-                "aggs": {
-                    "top_categories": {
-                        "terms": {"field": "primary_category", "size": 5}
-                    },
-                    "recent_years": {
-                        "terms": {"field": "year", "size": 5, "order": {"_key": "desc"}}
-                    }
-                }
-            }
-            
-            response = self.opensearch.search(
-                index=config.OPENSEARCH_INDEX,
-                body=agg_body
-            )
-            
-            return {
-                "total_papers": count["count"],
-                "top_categories": response["aggregations"]["top_categories"]["buckets"],
-                "recent_years": response["aggregations"]["recent_years"]["buckets"]
-            }
+            response = self.opensearch.search(index=config.OPENSEARCH_INDEX, body=STATISTICS_BODY)
+            return self._cache_statistics(response)
         except:
-            return {"total_papers": 0}
\ No newline at end of file
+            return {"total_papers": 0}
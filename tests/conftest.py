@@ -0,0 +1,43 @@
+"""
+Shared fixtures: every test runs in its own workspace with a small generated snapshot
+"""
+import os
+
+import pytest
+
+import config
+from benchmarks.common import write_snapshot
+from benchmarks.stub_s3 import StubS3
+from src.dataset_collector import DatasetCollector
+from src.storage import get_s3_client, get_shipper
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Empty data/ tree in a temporary directory; config's data paths are relative, so they land here"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join('data', 'kaggle_arxiv'))
+    return tmp_path
+
+
+@pytest.fixture
+def collector(workspace) -> DatasetCollector:
+    """Collector over a 400-paper generated snapshot"""
+    collector = DatasetCollector()
+    write_snapshot(collector.metadata_file, 400, seed=7)
+    return collector
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Stub S3 behind the process-wide client and shipper"""
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'stub')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'stub')
+    with StubS3() as stub:
+        monkeypatch.setattr(config, 'S3_ENDPOINT_URL', stub.endpoint_url)
+        get_s3_client.cache_clear()
+        get_shipper.cache_clear()
+        yield stub
+        get_shipper().shutdown()
+    get_s3_client.cache_clear()
+    get_shipper.cache_clear()
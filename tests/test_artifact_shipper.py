@@ -0,0 +1,120 @@
+import gzip
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import config
+import main
+from src.artifact_shipper import ArtifactShipper, compress_file, file_sha256
+from src.storage import get_s3_client
+
+
+def shipped_keys(s3):
+    return sorted(key for bucket, key in s3.state.objects if bucket == config.S3_BUCKET)
+
+
+def test_full_runs_of_a_scope_share_keys(collector, s3):
+    main.run_pipeline(category='cs', limit=50, search_backend='local')
+    keys = shipped_keys(s3)
+    assert keys == ['processed/batch/category-cs_limit-50.ndjson.gz', 'raw/batch/category-cs_limit-50.ndjson.gz']
+    first = {key: s3.state.objects[(config.S3_BUCKET, key)]['metadata']['x-amz-meta-batch-id'] for key in keys}
+
+    uploads = s3.state.requests
+    main.run_pipeline(category='cs', limit=50, search_backend='local')
+    # Same papers, same files: only HEADs (not counted by the stub), and the objects keep their first batch id
+    assert shipped_keys(s3) == keys
+    assert s3.state.requests == uploads
+    assert {key: s3.state.objects[(config.S3_BUCKET, key)]['metadata']['x-amz-meta-batch-id'] for key in keys} == first
+
+
+def test_artifact_names():
+    assert main.artifact_name('batch_1', 'batch', 'cs.LG', 2020, 'neural net', 100, False) == 'batch/category-cs.LG_year-2020_keyword-neural_net_limit-100'
+    assert main.artifact_name('batch_1', 'stream', None, None, None, None, False) == 'stream/all'
+    # Incremental and delta runs only ship what changed, one object per run
+    assert main.artifact_name('batch_1', 'batch', 'cs', None, None, 100, True) == 'batch_1'
+    assert main.artifact_name('delta_1', 'delta', 'cs', None, None, None, False) == 'delta_1'
+
+
+@pytest.fixture
+def shipper(s3):
+    shipper = ArtifactShipper(get_s3_client(), part_size_mb=5, max_concurrency=4)
+    yield shipper
+    shipper.shutdown()
+
+
+@pytest.fixture
+def artifact(workspace):
+    path = str(workspace / 'data' / 'processed.ndjson')
+    with open(path, 'w') as f:
+        f.writelines(json.dumps({'id': f"2001.{i:05d}", 'title': f"Paper {i}"}) + '\n' for i in range(2000))
+    return path
+
+
+def stored(s3, key):
+    return s3.state.objects[(config.S3_BUCKET, key)]
+
+
+def test_unchanged_content_is_not_uploaded_again(s3, shipper, artifact):
+    first = shipper.ship(artifact, 'processed/latest.ndjson')
+    assert first['status'] == 'uploaded' and first['key'] == 'processed/latest.ndjson.gz'
+    obj = stored(s3, first['key'])
+    with open(artifact, 'rb') as f:
+        assert gzip.decompress(obj['data']) == f.read()
+    assert obj['metadata']['x-amz-meta-sha256'] == file_sha256(artifact) == first['sha256']
+
+    uploads = s3.state.requests
+    assert shipper.ship(artifact, 'processed/latest.ndjson')['status'] == 'unchanged'
+    assert s3.state.requests == uploads
+
+    with open(artifact, 'a') as f:
+        f.write(json.dumps({'id': '2001.99999', 'title': 'Late addition'}) + '\n')
+    again = shipper.ship(artifact, 'processed/latest.ndjson')
+    assert again['status'] == 'uploaded' and again['sha256'] != first['sha256']
+    assert stored(s3, again['key'])['metadata']['x-amz-meta-sha256'] == again['sha256']
+
+
+def test_gzip_output_is_reproducible(artifact, tmp_path):
+    compress_file(artifact, str(tmp_path / 'a.gz'), 'gzip')
+    os.utime(artifact, (0, 0))
+    compress_file(artifact, str(tmp_path / 'b.gz'), 'gzip')
+    a, b = (tmp_path / 'a.gz').read_bytes(), (tmp_path / 'b.gz').read_bytes()
+    assert a == b
+    # mtime=0 in the header, no file name
+    assert a[4:8] == b'\0\0\0\0' and not a[3] & 0x08
+
+
+def test_multipart_upload_keeps_metadata(s3, workspace):
+    path = str(workspace / 'data' / 'large.parquet')
+    with open(path, 'wb') as f:
+        f.write(os.urandom(12 * 1024 * 1024))
+    shipper = ArtifactShipper(get_s3_client(), part_size_mb=5)
+    try:
+        result = shipper.ship_all([(path, 'processed/large.parquet')], metadata={'batch-id': 'batch_1'})[0]
+    finally:
+        shipper.shutdown()
+    # Already compressed: shipped as is, in parts
+    assert result['key'] == 'processed/large.parquet'
+    obj = stored(s3, result['key'])
+    assert obj['etag'].endswith('-3"')
+    assert obj['metadata'] == {'x-amz-meta-batch-id': 'batch_1', 'x-amz-meta-sha256': result['sha256']}
+
+
+def test_failures_are_reported_not_raised(s3, shipper, artifact, workspace):
+    s3.state.denied.add('processed/denied.ndjson.gz')
+    bad_frame = pd.DataFrame({'mixed': [1, 'two', object()]})
+    results = shipper.ship_all(
+        [(artifact, 'processed/denied.ndjson'), (str(workspace / 'missing.ndjson'), 'raw/missing.ndjson'), (artifact, 'processed/ok.ndjson')],
+        [(bad_frame, 'processed/bad.parquet'), (pd.DataFrame({'id': ['2001.00001']}), 'processed/ok.parquet')]
+    )
+    assert [(result['key'], result['status']) for result in results] == [
+        ('processed/denied.ndjson.gz', 'failed'),
+        ('raw/missing.ndjson', 'failed'),
+        ('processed/ok.ndjson.gz', 'uploaded'),
+        ('processed/bad.parquet', 'failed'),
+        ('processed/ok.parquet', 'uploaded'),
+    ]
+    assert 'AccessDenied' in results[0]['error']
+    assert (config.S3_BUCKET, 'processed/denied.ndjson.gz') not in s3.state.objects
+    assert shipper.ship_frame(bad_frame, 'processed/bad.parquet')['status'] == 'failed'
@@ -0,0 +1,187 @@
+import asyncio
+import json
+
+import pytest
+from opensearchpy import AsyncOpenSearch, OpenSearch
+from opensearchpy.exceptions import TransportError
+from opensearchpy.serializer import JSONSerializer
+
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.bulk_indexer import AsyncBulkIndexer, BulkIndexer
+
+
+def item(action, status, error=None):
+    result = {'status': status}
+    if error:
+        result['error'] = error
+    return {action: result}
+
+
+class FakeClient:
+    """bulk() answers from a queue of per-item statuses (or raises a queued exception), recording each body"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.bodies = []
+        self.transport = type('Transport', (), {'serializer': JSONSerializer()})()
+
+    def bulk(self, body, request_timeout=None):
+        self.bodies.append(body)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        action, statuses = response
+        return {'items': [item(action, status) for status in statuses]}
+
+
+def pending(*ids):
+    return [(doc_id, f"{doc_id}\n".encode()) for doc_id in ids]
+
+
+def test_classify_splits_success_throttled_and_errors():
+    response = {'items': [
+        item('index', 201), item('index', 200), item('index', 429),
+        item('index', 400, {'type': 'mapper_parsing_exception'}), item('index', 404)
+    ]}
+    success, throttled, errors = BulkIndexer._classify(pending('a', 'b', 'c', 'd', 'e'), response)
+
+    assert success == 2
+    assert throttled == pending('c')
+    # A 404 only counts as done for deletes
+    assert errors == [
+        {'_id': 'd', 'status': 400, 'error': {'type': 'mapper_parsing_exception'}},
+        {'_id': 'e', 'status': 404, 'error': None}
+    ]
+
+
+def test_classify_treats_missing_delete_as_success():
+    response = {'items': [item('delete', 200), item('delete', 404), item('delete', 429)]}
+    success, throttled, errors = BulkIndexer._classify(pending('a', 'b', 'c'), response)
+    assert (success, throttled, errors) == (2, pending('c'), [])
+
+
+def test_throttled_items_are_retried_alone():
+    client = FakeClient(('index', [201, 429, 201, 429]), ('index', [201, 201]))
+    indexer = BulkIndexer(client, initial_backoff=0)
+
+    assert indexer._send(pending('a', 'b', 'c', 'd')) == (4, [])
+    assert client.bodies[1] == b'b\nd\n'
+
+
+def test_throttling_gives_up_after_max_retries():
+    client = FakeClient(*[('delete', [404, 429])] + [('delete', [429])] * 2)
+    indexer = BulkIndexer(client, max_retries=2, initial_backoff=0)
+
+    success, errors = indexer._send(pending('a', 'b'))
+    assert success == 1
+    assert errors == [{'_id': 'b', 'status': 429, 'error': 'too many requests'}]
+    assert len(client.bodies) == 3
+
+
+def test_whole_request_429_is_retried_and_other_errors_raise():
+    client = FakeClient(TransportError(429, 'too_many_requests'), ('index', [201]))
+    assert BulkIndexer(client, initial_backoff=0)._send(pending('a')) == (1, [])
+
+    client = FakeClient(TransportError(500, 'internal'))
+    with pytest.raises(TransportError):
+        BulkIndexer(client, initial_backoff=0)._send(pending('a'))
+
+
+def test_delete_documents_counts_unknown_ids_as_deleted():
+    client = FakeClient(('delete', [200, 404, 404]))
+    result = BulkIndexer(client, thread_count=1).delete_documents(['a', 'b', 'c'])
+
+    assert (result['success'], result['failed']) == (3, 0)
+    actions = [json.loads(line) for line in client.bodies[0].decode().splitlines()]
+    assert [action['delete']['_id'] for action in actions] == ['a', 'b', 'c']
+
+
+# The same paths through opensearch-py's real transport, against the stub server
+
+def docs(count, start=0):
+    return [{'arxiv_id': f"2001.{i:05d}", 'title': f"Paper {i}", 'abstract': 'x' * 200} for i in range(start, start + count)]
+
+
+@pytest.fixture
+def stub():
+    with StubOpenSearch() as stub:
+        yield stub
+
+
+def connect(stub):
+    return OpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}])
+
+
+def test_chunks_respect_the_byte_and_doc_caps(stub):
+    indexer = BulkIndexer(connect(stub), index='papers', thread_count=3, max_chunk_bytes=4096, max_chunk_docs=50)
+    result = indexer.index_documents(docs(100))
+
+    assert (result['success'], result['failed']) == (100, 0)
+    assert len(stub.state.get('papers')['docs']) == 100
+    # About 300 bytes per document: 13 fit under the byte cap, well below the doc cap
+    assert max(stub.state.bulk_sizes) <= 4096
+    assert len(stub.state.bulk_sizes) == 8
+
+    stub.state.bulk_sizes.clear()
+    indexer.max_chunk_docs = 10
+    indexer.index_documents(docs(100))
+    assert len(stub.state.bulk_sizes) == 10
+
+
+def test_a_document_over_the_byte_cap_goes_alone(stub):
+    large = dict(docs(1, 7)[0], abstract='y' * 10000)
+    result = BulkIndexer(connect(stub), index='papers', thread_count=1, max_chunk_bytes=4096).index_documents(docs(3) + [large] + docs(3, 3))
+
+    assert result['success'] == 7
+    assert len(stub.state.bulk_sizes) == 3 and stub.state.bulk_sizes[1] > 10000
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_throttled_items_and_requests_are_retried(use_async):
+    with StubOpenSearch(throttle_ratio=0.3) as stub:
+        stub.state.reject_bulk = 2
+        options = dict(index='papers', thread_count=2, max_chunk_docs=20, max_retries=8, initial_backoff=0.001)
+        if use_async:
+            async def run():
+                client = AsyncOpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}])
+                try:
+                    return await AsyncBulkIndexer(client, **options).index_documents(docs(200))
+                finally:
+                    await client.close()
+            result = asyncio.run(run())
+        else:
+            result = BulkIndexer(connect(stub), **options).index_documents(docs(200))
+
+        assert (result['success'], result['failed']) == (200, 0)
+        assert stub.state.reject_bulk == 0 and stub.state.throttled > 2
+        assert sorted(stub.state.get('papers')['docs']) == [doc['arxiv_id'] for doc in docs(200)]
+
+
+def test_partial_failures_are_reported_per_document(stub):
+    client = connect(stub)
+    client.indices.create(index='papers', body={'mappings': {'dynamic': 'strict', 'properties': {
+        'arxiv_id': {'type': 'keyword'}, 'title': {'type': 'text'}, 'abstract': {'type': 'text'}
+    }}})
+    batch = docs(10)
+    batch[3]['venue'] = 'unmapped'
+    batch[7]['venue'] = 'unmapped'
+
+    result = BulkIndexer(client, index='papers', thread_count=1, max_chunk_docs=4, initial_backoff=0).index_documents(batch)
+
+    assert (result['success'], result['failed']) == (8, 2)
+    assert [(error['_id'], error['status'], error['error']['type']) for error in result['errors']] == [
+        ('2001.00003', 400, 'strict_dynamic_mapping_exception'),
+        ('2001.00007', 400, 'strict_dynamic_mapping_exception')
+    ]
+    assert '2001.00003' not in stub.state.get('papers')['docs']
+
+    deleted = BulkIndexer(client, index='papers', thread_count=1).delete_documents(['2001.00000', '2001.00003', 'missing'])
+    assert (deleted['success'], deleted['failed']) == (3, 0)
+    assert len(stub.state.get('papers')['docs']) == 7
+
+
+def test_rejections_beyond_max_retries_raise(stub):
+    stub.state.reject_bulk = 3
+    with pytest.raises(TransportError) as raised:
+        BulkIndexer(connect(stub), index='papers', thread_count=1, max_retries=2, initial_backoff=0).index_documents(docs(5))
+    assert raised.value.status_code == 429
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from benchmarks.common import SnapshotGenerator
+from src import codec
+
+RECORDS = [
+    {'id': '0704.0001', 'title': 'Calculation of prompt diphoton production\n  cross sections', 'doi': None, 'versions': []},
+    {'authors_parsed': [['Schrödinger', 'E.', ''], ['Müller', 'J.', 'ETH Zürich']], 'title': 'Émergence — 量子 “quotes”'},
+    {'escapes': 'tab\there "quoted" back\\slash /slash   \x01', 'empty': '', 'nested': {'a': [1, [2, {'b': None}]]}},
+    {'ints': [0, -1, 2 ** 53, -2 ** 62], 'floats': [0.5, -1.25e-10, 3.0], 'bools': [True, False]},
+    [],
+    'plain string',
+]
+
+
+@pytest.fixture(params=codec.BACKENDS)
+def backend(request):
+    previous = codec.BACKEND
+    if codec.use_backend(request.param) != request.param:
+        codec.use_backend(previous)
+        pytest.skip(f"{request.param} is not installed")
+    yield request.param
+    codec.use_backend(previous)
+
+
+@pytest.mark.parametrize('record', RECORDS)
+def test_round_trip(backend, record):
+    encoded = codec.dumps(record)
+    assert isinstance(encoded, str)
+    assert '\n' not in encoded
+    assert codec.loads(encoded) == record
+    assert codec.loads(encoded.encode('utf-8')) == record
+    # Whatever the backend writes, any other reader (and the stdlib) can read back
+    assert json.loads(encoded) == record
+
+
+def test_snapshot_lines_round_trip(backend):
+    for line in SnapshotGenerator(seed=3).lines(50):
+        paper = json.loads(line)
+        assert codec.loads(line.encode('utf-8')) == paper
+        assert codec.loads(codec.dumps(paper)) == paper
+
+
+@pytest.mark.parametrize('data', [b'{"id": "0704.0001"', b'', b'not json', b'{"a": 1} trailing'])
+def test_bad_input_raises_value_error(backend, data):
+    with pytest.raises(ValueError):
+        codec.loads(data)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        codec._select('yaml')
@@ -0,0 +1,110 @@
+"""
+Serial scan, .idx lookup, parallel scan (with and without the index) and Parquet cache must collect the same papers
+"""
+import json
+
+import pytest
+
+import config
+from benchmarks.common import SnapshotGenerator
+from src.parquet_cache import ParquetCache
+
+ALL = 10 ** 9
+
+
+def tricky_papers():
+    """Keyword phrases split by line breaks, case, the title/abstract join and category lookalikes"""
+    generator = SnapshotGenerator(seed=5)
+    variants = [
+        ('math.PR', 'Deep neural\n  network limits', 'We study them.'),
+        ('math-ph', 'Deep neural\nnetwork limits', 'We study them.'),
+        ('math.OC cs.LG', 'Training a neural', 'network with noise.'),
+        ('cs.LG', 'NEURAL NETWORK Gaussian processes', 'Infinite width.'),
+        ('math.ST', 'Neural\n network regression', 'Double space after the break does not match.'),
+        ('mathematics', 'neural network', 'Not an arXiv category, never matches "math".'),
+        ('stat.ML math.PR', 'Convergence', '  We train a neural\nnetwork and\nprove bounds.\n'),
+    ]
+    papers = []
+    for i, (categories, title, abstract) in enumerate(variants):
+        paper = generator.paper()
+        paper.update(id=f"2001.{90000 + i}", categories=categories, title=title, abstract=abstract)
+        paper['versions'][0]['created'] = 'Thu, 2 Jan 2020 10:00:00 GMT'
+        papers.append(paper)
+    return papers
+
+
+@pytest.fixture
+def snapshot(collector):
+    with open(collector.metadata_file, 'a', encoding='utf-8') as f:
+        f.writelines(json.dumps(paper) + '\n' for paper in tricky_papers())
+    return collector
+
+
+def collect(collector, **kwargs):
+    return list(collector.iter_from_dataset(limit=ALL, **kwargs))
+
+
+@pytest.mark.parametrize('filters', [
+    {'category': 'math', 'keyword': 'neural network'},
+    {'year': 2020, 'keyword': 'Neural Network'},
+    {'category': 'cs', 'year': 2015},
+    {'keyword': 'neural network'},
+    {'category': 'math-ph'},
+], ids=lambda filters: '-'.join(str(value) for value in filters.values()))
+def test_all_paths_collect_the_same_papers(snapshot, filters):
+    serial = collect(snapshot, use_index=False, **filters)
+    assert serial
+
+    assert collect(snapshot, use_index=True, **filters) == serial
+    assert collect(snapshot, use_index=False, workers=2, **filters) == serial
+    assert collect(snapshot, use_index=True, workers=2, **filters) == serial
+    # The cache is partitioned by year, so its order differs from the file's
+    cached = collect(snapshot, use_cache=True, **filters)
+    assert sorted(cached, key=lambda paper: paper.arxiv_id) == sorted(serial, key=lambda paper: paper.arxiv_id)
+
+
+@pytest.mark.parametrize('options', [
+    {'use_index': False}, {'use_index': True}, {'workers': 2, 'use_index': False}, {'workers': 2, 'use_index': True}, {'use_cache': True}
+])
+def test_phrase_across_line_break_and_join(snapshot, options):
+    # Matching runs on the raw text: the title/abstract join is a space, a hard line break is not
+    ids = {paper.arxiv_id for paper in collect(snapshot, category='math', keyword='neural network', **options)}
+    assert ids & {f"2001.{90000 + i}" for i in range(7)} == {'2001.90002'}
+    if options.get('use_cache'):
+        assert ParquetCache(snapshot.metadata_file, config.PARQUET_CACHE_DIR).is_valid()
+
+
+def test_limit_keeps_file_order(snapshot):
+    serial = collect(snapshot, use_index=False, category='cs')
+    assert [paper.arxiv_id for paper in snapshot.iter_from_dataset(category='cs', limit=5)] == [paper.arxiv_id for paper in serial[:5]]
+
+
+
+def test_workers_scan_the_index_lookup(snapshot, monkeypatch):
+    from src.parallel_scan import ParallelScanner, split_offsets
+
+    seen = []
+    iter_collect = ParallelScanner.iter_collect
+    monkeypatch.setattr(ParallelScanner, 'iter_collect', lambda self, *args, offsets=None: seen.append(offsets) or iter_collect(self, *args, offsets=offsets))
+    collect(snapshot, category='cs', workers=2)
+    assert seen == [snapshot.index.lookup(category='cs')]
+
+    offsets = list(range(10))
+    assert split_offsets(offsets, 4) == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert split_offsets(offsets, 20) == [[i] for i in offsets]
+    assert split_offsets([], 4) == []
+
+
+def test_scans_reuse_one_pool(snapshot):
+    from src import parallel_scan
+
+    parallel_scan.shutdown_pool()
+    try:
+        # Stopping at the limit leaves the pool usable for the next scan
+        assert len(list(snapshot.iter_from_dataset(category='cs', limit=3, workers=2))) == 3
+        pool = parallel_scan._pools[2]
+        assert collect(snapshot, category='cs', workers=2) == collect(snapshot, category='cs')
+        assert snapshot.get_dataset_stats(workers=2)
+        assert parallel_scan._pools == {2: pool}
+    finally:
+        parallel_scan.shutdown_pool()
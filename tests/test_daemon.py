@@ -0,0 +1,65 @@
+import inspect
+import json
+
+import pytest
+
+import config
+import main
+from src.daemon import Job, load_jobs
+
+
+@pytest.mark.parametrize('mode', ['batch', 'stream', 'delta'])
+def test_every_job_setting_reaches_the_pipeline(mode):
+    job = Job(mode=mode, category='cs', compression='gzip', use_index=False, use_cache=True, batch_size=250)
+    kwargs = job.pipeline_kwargs()
+    assert kwargs['compression'] == 'gzip'
+    # Every keyword must exist on the pipeline the daemon calls
+    assert set(kwargs) | {'clients'} <= set(inspect.signature(main.PIPELINES[mode]).parameters)
+    if mode != 'delta':
+        assert kwargs['use_index'] is False and kwargs['use_cache'] is True
+    assert kwargs.get('batch_size') == (250 if mode == 'stream' else None)
+
+
+def test_defaults_match_the_command_line():
+    kwargs = Job(mode='stream').pipeline_kwargs()
+    assert kwargs['compression'] == config.INTERMEDIATE_COMPRESSION
+    assert kwargs['use_index'] is True and kwargs['use_cache'] is False
+    assert kwargs['batch_size'] == config.STREAM_BATCH_SIZE
+
+
+def test_load_jobs(tmp_path):
+    path = tmp_path / 'jobs.json'
+    path.write_text(json.dumps([
+        {'name': 'cs_stream', 'mode': 'stream', 'category': 'cs', 'compression': 'zstd', 'batch_size': 100, 'every_minutes': 5},
+        {'mode': 'batch', 'keyword': 'transformer', 'use_cache': True, 'use_index': False, 'at': '03:00'}
+    ]))
+    stream, batch = load_jobs(str(path))
+    assert (stream.name, stream.compression, stream.batch_size) == ('cs_stream', 'zstd', 100)
+    assert (batch.name, batch.use_cache, batch.use_index) == ('batch_transformer', True, False)
+
+    path.write_text(json.dumps([{'mode': 'batch', 'compress': 'gzip'}]))
+    with pytest.raises(ValueError, match='Unknown job settings: compress'):
+        load_jobs(str(path))
+    path.write_text(json.dumps([{'mode': 'batch', 'compression': 'lz4'}]))
+    with pytest.raises(ValueError, match='Unknown compression'):
+        load_jobs(str(path))
+
+
+def test_command_line_job(monkeypatch, tmp_path):
+    captured = {}
+
+    class RecordingDaemon:
+        def __init__(self, jobs, pipelines):
+            captured['jobs'] = jobs
+
+        def run(self):
+            pass
+
+    monkeypatch.setattr(main, 'Daemon', RecordingDaemon)
+    monkeypatch.setattr('sys.argv', [
+        'main.py', '--daemon', '--stream', '--jobs', str(tmp_path / 'none.json'),
+        '--compress', 'gzip', '--no-index', '--parquet-cache', '--batch-size', '42'
+    ])
+    main.main()
+    job, = captured['jobs']
+    assert (job.compression, job.use_index, job.use_cache, job.batch_size) == ('gzip', False, True, 42)
@@ -0,0 +1,77 @@
+import json
+
+from src.dataset_index import DatasetIndex
+from src.dataset_stats import StatsCache
+
+
+def serial_scan(path):
+    """(offset, year, categories) of every decodable line, read the slow way"""
+    rows = []
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                paper = json.loads(line)
+            except ValueError:
+                paper = None
+            if paper is not None:
+                rows.append((offset, DatasetIndex._first_version_year(paper), paper.get('categories', '')))
+            offset += len(line)
+    return rows
+
+
+def append_lines(path, *lines):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.writelines(line + '\n' for line in lines)
+
+
+def test_offsets_years_and_categories_match_serial_scan(collector):
+    # A truncated line is skipped and a paper without versions gets year 0
+    append_lines(
+        collector.metadata_file,
+        '{"id": "broken", "categories": "cs.LG"',
+        json.dumps({'id': '9901.00001', 'categories': 'hep-th', 'versions': [], 'update_date': '1999-01-01'})
+    )
+    index = DatasetIndex(collector.metadata_file)
+    index.ensure()
+
+    expected = serial_scan(collector.metadata_file)
+    assert list(zip(index.offsets, index.years, index.categories)) == expected
+    assert expected[-1][1] == 0
+
+    with open(collector.metadata_file, 'rb') as f:
+        assert [json.loads(line)['id'] for line in index.iter_lines(f, index.offsets)][-1] == '9901.00001'
+
+
+def test_lookup_matches_serial_filter(collector):
+    index = DatasetIndex(collector.metadata_file)
+    rows = serial_scan(collector.metadata_file)
+    expected = [
+        offset for offset, year, cats in rows
+        if any(cat == 'cs' or cat.startswith('cs.') for cat in cats.split()) and (not year or year == 2020)
+    ]
+    assert index.lookup('cs', 2020) == expected
+    assert index.lookup() == [offset for offset, _, _ in rows]
+
+
+def test_stats_match_serial_scan(collector):
+    DatasetIndex(collector.metadata_file).build()
+    from_index = DatasetIndex(collector.metadata_file).stats()
+    scanned = collector._count_stats()
+
+    assert from_index.to_dict() == scanned.to_dict()
+    assert from_index.total == 400
+    # build() fills the stats cache in the same pass
+    assert StatsCache(collector.metadata_file).load().to_dict() == scanned.to_dict()
+
+
+def test_stale_index_is_rebuilt(collector):
+    index = DatasetIndex(collector.metadata_file)
+    index.ensure()
+    append_lines(collector.metadata_file, json.dumps({'id': '2401.00001', 'categories': 'math.PR', 'versions': []}))
+    assert not index.is_valid()
+
+    index = DatasetIndex(collector.metadata_file)
+    index.ensure()
+    assert len(index.offsets) == 401
+    assert index.fingerprints().column('arxiv_id').to_pylist()[-1] == '2401.00001'
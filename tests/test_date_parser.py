@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import pandas as pd
+import pytest
+
+from src.date_parser import parse_date, parse_date_series, parse_dates
+
+RFC2822 = [
+    'Mon, 2 Apr 2007 19:18:42 GMT',
+    'Tue, 31 Dec 1991 23:59:59 GMT',
+    'Sat, 29 Feb 2020 00:00:00 GMT',
+    'Fri, 01 Jan 2021 08:05:09 GMT',
+    'Mon,  2 Apr 2007 19:18:42 GMT',
+    'Mon, 2 apr 2007 19:18:42 GMT',
+    'Mon, 2 Apr 2007 19:18:42 +0100',
+    'Mon, 2 Apr 2007 19:18:42 -0530',
+    'Mon, 2 Apr 2007 19:18:42 UT',
+    'Mon, 2 Apr 2007 19:18 GMT',
+    '2 Apr 2007 19:18:42 GMT',
+]
+ISO = ['2008-11-13', '2008-11-13T10:20:30', '2008-11-13T10:20:30Z', '2008-11-13T10:20:30+02:00', '2008-11-13 10:20:30', '2020']
+INVALID = ['Mon, 30 Feb 2007 19:18:42 GMT', 'Mon, 2 Foo 2007 19:18:42 GMT', 'Mon, 2 Apr 2007 25:18:42 GMT',
+           'yesterday', '2008-13-01', '13/11/2008', 'Mon,', ' ', '-']
+
+
+def as_utc(value: datetime) -> datetime:
+    """Naive UTC, which is what parse_date returns"""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+@pytest.mark.parametrize('value', RFC2822)
+def test_rfc2822_matches_email_utils(value):
+    assert parse_date(value) == as_utc(parsedate_to_datetime(value))
+
+
+@pytest.mark.parametrize('value', ISO)
+def test_iso_matches_pandas(value):
+    expected = pd.Timestamp(value)
+    expected = expected.tz_convert('UTC').tz_localize(None) if expected.tzinfo else expected
+    assert parse_date(value) == expected.to_pydatetime()
+
+
+@pytest.mark.parametrize('value', INVALID + [None, ''])
+def test_unrecognised_values_are_none(value):
+    assert parse_date(value) is None
+
+
+def test_results_are_naive_and_memoized():
+    parse_date.cache_clear()
+    values = RFC2822 + ISO
+    assert all(parse_date(value).tzinfo is None for value in values)
+    assert parse_dates(values * 3) == parse_dates(values) * 3
+    assert parse_date.cache_info().hits >= len(values) * 3
+
+
+@pytest.mark.parametrize('values', [RFC2822 + ISO + INVALID, ISO + RFC2822 + INVALID, INVALID + [None] + RFC2822])
+def test_series_matches_scalar_parser(values):
+    series = pd.Series(values + [None], dtype=object)
+    parsed = parse_date_series(series)
+
+    expected = pd.Series(pd.array(parse_dates(series.tolist()), dtype='datetime64[ns]'))
+    pd.testing.assert_series_equal(parsed, expected)
+
+
+def test_series_of_nothing():
+    parsed = parse_date_series(pd.Series([None, None], dtype=object))
+    assert parsed.dtype == 'datetime64[ns]' and parsed.isna().all()
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from opensearchpy import AsyncOpenSearch, OpenSearch
+
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.bulk_indexer import BulkIndexer
+from src.index_profiles import CURRENT_VERSION, IndexProfiles, ensure_index_async, index_body, index_name
+
+ALIAS = 'papers'
+OLD = index_name(1, ALIAS)
+NEW = index_name(CURRENT_VERSION, ALIAS)
+
+
+class HookedClient(OpenSearch):
+    """Runs `hooks[n]` right after the n-th _reindex call returns, as a concurrent writer would"""
+
+    def __init__(self, port, hooks):
+        super().__init__(hosts=[{'host': '127.0.0.1', 'port': port}])
+        self.hooks = hooks
+        self.reindex_calls = 0
+
+    def reindex(self, *args, **kwargs):
+        result = super().reindex(*args, **kwargs)
+        self.reindex_calls += 1
+        if self.reindex_calls in self.hooks:
+            self.hooks[self.reindex_calls]()
+        return result
+
+
+def paper(arxiv_id, title):
+    return {'arxiv_id': arxiv_id, 'title': title}
+
+
+@pytest.fixture
+def stub():
+    with StubOpenSearch() as stub:
+        yield stub
+
+
+def load_old_profile(stub, name=OLD, alias=ALIAS):
+    client = OpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}])
+    client.indices.create(index=name, body=index_body(1, alias if name != alias else None))
+    result = BulkIndexer(client, index=alias).index_documents(paper(f"p{i}", f"title {i}") for i in range(20))
+    assert result['success'] == 20
+    return client
+
+
+def test_updates_during_the_copy_are_not_lost(stub):
+    load_old_profile(stub)
+    rejected = {}
+
+    def write_during_copy():
+        indexer = BulkIndexer(client, index=ALIAS)
+        indexer.index_documents([paper('p3', 'updated title'), paper('p99', 'new paper')])
+
+    def write_during_catch_up():
+        rejected.update(BulkIndexer(client, index=ALIAS, max_retries=0).index_documents([paper('p4', 'too late')]))
+
+    client = HookedClient(stub.port, {1: write_during_copy, 2: write_during_catch_up})
+    result = IndexProfiles(client, ALIAS).reindex()
+
+    assert (result['source'], result['target'], result['failures']) == (OLD, NEW, [])
+    assert stub.state.resolve(ALIAS) == NEW
+    assert stub.state.get(OLD) is None
+    docs = stub.state.get(ALIAS)['docs']
+    assert len(docs) == 21
+    assert docs['p3']['title'] == 'updated title'
+    assert docs['p99']['title'] == 'new paper'
+    # The old index is read-only during the final pass: the late write fails loudly instead of vanishing
+    assert docs['p4']['title'] == 'title 4'
+    assert rejected['failed'] == 1 and rejected['errors'][0]['status'] == 403
+
+    # Writes go to the new index again afterwards
+    assert BulkIndexer(client, index=ALIAS).index_documents([paper('p4', 'retried')])['success'] == 1
+    assert stub.state.get(ALIAS)['docs']['p4']['title'] == 'retried'
+
+
+def test_kept_old_index_is_writable_again(stub):
+    client = load_old_profile(stub)
+    IndexProfiles(client, ALIAS).reindex(delete_old=False)
+
+    assert stub.state.resolve(ALIAS) == NEW
+    assert BulkIndexer(client, index=OLD).index_documents([paper('p1', 'still writable')])['success'] == 1
+
+
+def test_pre_profile_index_named_like_the_alias(stub):
+    load_old_profile(stub, name=ALIAS)
+
+    def write_during_copy():
+        BulkIndexer(client, index=ALIAS).index_documents([paper('p5', 'updated title')])
+
+    client = HookedClient(stub.port, {1: write_during_copy})
+    IndexProfiles(client, ALIAS).reindex()
+
+    assert stub.state.resolve(ALIAS) == NEW
+    assert stub.state.get(ALIAS)['docs']['p5']['title'] == 'updated title'
+    assert len(stub.state.get(ALIAS)['docs']) == 20
+
+
+def test_ensure_sync_and_async_agree(stub, capsys):
+    async def ensure_async():
+        client = AsyncOpenSearch(hosts=[{'host': '127.0.0.1', 'port': stub.port}])
+        try:
+            return await ensure_index_async(client, ALIAS)
+        finally:
+            await client.close()
+
+    client = load_old_profile(stub)
+    capsys.readouterr()
+    assert IndexProfiles(client, ALIAS).ensure() is False
+    warning = capsys.readouterr().out
+    assert f"uses profile v1 (current v{CURRENT_VERSION})" in warning
+    assert asyncio.run(ensure_async()) is False
+    assert capsys.readouterr().out == warning
+
+    client.indices.delete(index=OLD)
+    assert asyncio.run(ensure_async()) is True
+    assert stub.state.resolve(ALIAS) == NEW
+    assert IndexProfiles(client, ALIAS).current() == (NEW, CURRENT_VERSION)
+    assert asyncio.run(ensure_async()) is False
+    assert capsys.readouterr().out == f"Created index: {NEW} (alias {ALIAS})\n"
@@ -0,0 +1,127 @@
+import math
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from src.local_search import B, K1, LocalSearchIndex, tokenize
+
+CORPUS = [
+    ('2001.00001', 'Graph networks', 'Graph methods for learning on graph data.'),
+    ('2001.00002', 'Quantum graph states', 'Short.'),
+    ('2001.00003', 'Learning theory', 'A long abstract about learning, with many more words than the others have here.'),
+    ('2001.00004', 'Unrelated', 'Nothing relevant at all.'),
+    ('2001.00005', 'Deep learning', 'Learning representations of graph structured inputs.'),
+    ('2001.00006', 'Spectral methods', 'Eigenvalues of the graph Laplacian.'),
+]
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['arxiv_id', 'title', 'abstract']).assign(primary_category='cs.LG', year=2020)
+
+
+def bm25(rows, query):
+    """Okapi BM25 written out term by term, title counted twice, as the index scores it"""
+    docs = {arxiv_id: Counter(tokenize(f"{title} {title} {abstract}")) for arxiv_id, title, abstract in rows}
+    avg_length = sum(sum(counts.values()) for counts in docs.values()) / len(docs)
+    scores = {}
+    for arxiv_id, counts in docs.items():
+        length = sum(counts.values())
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(1 for other in docs.values() if term in other)
+            if not counts[term]:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            tf = counts[term]
+            score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+        if score:
+            scores[arxiv_id] = score
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def ids(results):
+    return [doc['arxiv_id'] for doc in results]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LocalSearchIndex(str(tmp_path / 'local_search'), max_segments=100)
+
+
+@pytest.mark.parametrize('query', ['graph learning', 'graph', 'learning theory', 'laplacian quantum'])
+def test_ranking_matches_bm25(index, query):
+    index.add(frame(CORPUS))
+    expected = bm25(CORPUS, query)
+    assert expected
+    assert ids(index.search(query, size=10)) == expected
+    assert ids(index.search(query, size=2)) == expected[:2]
+
+
+def test_scores_do_not_depend_on_segmentation(index):
+    for i in range(0, len(CORPUS), 2):
+        index.add(frame(CORPUS[i:i + 2]))
+    assert len(index.segments) == 3
+    assert ids(index.search('graph learning')) == bm25(CORPUS, 'graph learning')
+
+
+def test_a_small_case_by_hand(index):
+    index.add(frame([('a', 'cat', ''), ('b', 'dog', ''), ('c', 'cat', 'cat dog')]))
+    # Title counted twice: a = cat x2 (length 2), c = cat x3 + dog (length 4); average length 8/3
+    # BM25 = idf * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / avg)): a = 4.4 / 2.975 idf, c = 6.6 / 4.65 idf
+    assert 4.4 / 2.975 > 6.6 / 4.65
+    assert ids(index.search('cat')) == ['a', 'c']
+    assert ids(index.search('dog')) == ['b', 'c']
+
+
+def test_removed_and_replaced_papers_are_never_returned(index):
+    index.add(frame(CORPUS))
+    assert index.remove(['2001.00001', '2001.00005', 'missing']) == 2
+    remaining = [row for row in CORPUS if row[0] not in ('2001.00001', '2001.00005')]
+    assert ids(index.search('graph learning')) == bm25(remaining, 'graph learning')
+    assert index.count() == len(CORPUS) - 2
+
+    # A re-indexed paper only matches its new text
+    index.add(frame([('2001.00002', 'Quantum states', 'Short.')]))
+    assert '2001.00002' not in ids(index.search('graph'))
+    assert ids(index.search('quantum')) == ['2001.00002']
+    assert index.search('quantum')[0]['title'] == 'Quantum states'
+    assert index.count() == len(CORPUS) - 2
+
+
+def test_merge_keeps_results(index):
+    for row in CORPUS:
+        index.add(frame([row]))
+    index.remove(['2001.00003'])
+    index.add(frame([('2001.00006', 'Spectral graph methods', 'Eigenvalues of the graph Laplacian.')]))
+    queries = ['graph learning', 'graph', 'learning theory', 'spectral', 'nothing']
+    before = {query: index.search(query) for query in queries}
+
+    index.merge()
+    assert len(index.segments) == 1 and len(index.segments[0]) == index.count() == len(CORPUS) - 1
+    assert {query: index.search(query) for query in queries} == before
+
+
+def test_reopening_from_disk(index):
+    index.add(frame(CORPUS[:3]))
+    index.add(frame(CORPUS[3:]))
+    index.remove(['2001.00002'])
+    expected = {query: index.search(query) for query in ('graph learning', 'quantum', 'relevant')}
+
+    reopened = LocalSearchIndex(index.path)
+    assert reopened.segment_names == index.segment_names and reopened.count() == len(CORPUS) - 1
+    assert {query: reopened.search(query) for query in expected} == expected
+    assert reopened.search('quantum') == []
+
+    reopened.merge()
+    again = LocalSearchIndex(index.path)
+    assert len(again.segments) == 1
+    assert {query: again.search(query) for query in expected} == expected
+
+
+def test_automatic_merge_past_max_segments(tmp_path):
+    index = LocalSearchIndex(str(tmp_path / 'local_search'), max_segments=3)
+    for row in CORPUS:
+        index.add(frame([row]))
+    assert len(index.segments) <= 3
+    assert ids(index.search('graph learning')) == bm25(CORPUS, 'graph learning')
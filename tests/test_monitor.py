@@ -0,0 +1,138 @@
+"""
+PipelineMonitor stage accounting and the Prometheus / OpenMetrics text export
+"""
+import re
+import time
+
+import pytest
+
+import config
+from src.monitor import PipelineMonitor
+
+METRIC_NAME = re.compile(r'[a-zA-Z_:][a-zA-Z0-9_:]*')
+SAMPLE = re.compile(r'(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?P<labels>\{[a-zA-Z_][a-zA-Z0-9_]*="[^"\\\n]*"\})? (?P<value>\S+)')
+
+
+def parse(text: str, fmt: str) -> dict:
+    """Families by declared name ({type, help, samples}), checking the exposition rules on the way"""
+    assert text.endswith('\n')
+    lines = text[:-1].split('\n')
+    if fmt == 'openmetrics':
+        assert lines.pop() == '# EOF'
+    assert '# EOF' not in lines
+
+    families, current = {}, None
+    for line in lines:
+        if line.startswith('# HELP '):
+            name, help_text = line[len('# HELP '):].split(' ', 1)
+            assert METRIC_NAME.fullmatch(name) and name not in families
+            current = families[name] = {'help': help_text, 'type': None, 'samples': {}}
+        elif line.startswith('# TYPE '):
+            name, kind = line[len('# TYPE '):].split(' ')
+            # TYPE follows its own HELP and comes before the samples
+            assert current is families[name] and current['type'] is None and not current['samples']
+            current['type'] = kind
+        else:
+            sample = SAMPLE.fullmatch(line)
+            assert sample, line
+            declared = [name for name in families if families[name] is current][0]
+            expected = declared + '_total' if fmt == 'openmetrics' and current['type'] == 'counter' else declared
+            assert sample['name'] == expected
+            current['samples'][sample['labels'] or ''] = float(sample['value'])
+    return families
+
+
+@pytest.fixture
+def monitor(workspace, monkeypatch):
+    monkeypatch.setattr(config, 'METRICS_EXPORT_FILE', None)
+    return PipelineMonitor()
+
+
+def run(monitor, papers=120):
+    session = monitor.start_monitoring('batch_1', {'category': 'cs'})
+    with monitor.stage('collect') as stage:
+        time.sleep(0.01)
+        stage['items'] = papers
+    for _ in range(3):
+        with monitor.stage('process', items=papers // 3):
+            with monitor.stage('quality', items=1):
+                pass
+    return monitor.end_monitoring(session, papers)
+
+
+def test_stage_accounting(monitor):
+    session = run(monitor)
+    stages = {stage['name']: stage for stage in session['stages']}
+    assert list(stages) == ['collect', 'quality', 'process']
+
+    assert stages['collect']['calls'] == 1 and stages['collect']['items'] == 120
+    assert stages['collect']['wall_seconds'] >= 0.01
+    # Re-entered stages add up, one record per name
+    assert stages['process']['calls'] == 3 and stages['process']['items'] == 120
+    assert stages['quality']['calls'] == 3 and stages['quality']['items'] == 3
+    # A nested stage's time is part of its parent's
+    assert stages['quality']['wall_seconds'] <= stages['process']['wall_seconds']
+    for stage in stages.values():
+        assert stage['items_per_sec'] == pytest.approx(stage['items'] / stage['wall_seconds'])
+        assert stage['peak_rss_mb'] > 0
+    assert stages['process']['peak_rss_mb'] >= stages['quality']['peak_rss_mb']
+
+    # The next run starts with no stages
+    monitor.start_monitoring('batch_2')
+    assert monitor.stages == {}
+
+
+def test_timed_counts_the_result(monitor):
+    monitor.start_monitoring('batch_1')
+    collect = monitor.timed('collect', count=len)(lambda n: list(range(n)))
+    assert collect(5) == [0, 1, 2, 3, 4]
+    collect(7)
+    assert monitor.stages['collect']['calls'] == 2 and monitor.stages['collect']['items'] == 12
+
+    with pytest.raises(ZeroDivisionError):
+        with monitor.stage('failing', items=4):
+            1 / 0
+    # A failing stage is still recorded
+    assert monitor.stages['failing']['calls'] == 1 and monitor.stages['failing']['items'] == 4
+
+
+@pytest.mark.parametrize('fmt', ['prometheus', 'openmetrics'])
+def test_export_format(monitor, fmt):
+    monitor.history.min_runs = 1
+    run(monitor, papers=120)
+    run(monitor, papers=60)
+    families = parse(monitor.format_metrics(fmt), fmt)
+
+    runs = 'arxiv_pipeline_runs' if fmt == 'openmetrics' else 'arxiv_pipeline_runs_total'
+    papers = 'arxiv_pipeline_papers' if fmt == 'openmetrics' else 'arxiv_pipeline_papers_total'
+    assert families[runs] == {'help': 'Pipeline runs recorded', 'type': 'counter', 'samples': {'': 2.0}}
+    assert families[papers]['samples'] == {'': 180.0}
+    assert families['arxiv_pipeline_last_run_papers']['samples'] == {'': 60.0}
+    assert families['arxiv_pipeline_last_run_seconds']['type'] == 'gauge'
+
+    # Only the last run's stages, one sample per stage
+    stages = monitor.metrics['last_run']['stages']
+    items = families['arxiv_pipeline_stage_items']['samples']
+    assert items == {'{stage="collect"}': 60.0, '{stage="quality"}': 3.0, '{stage="process"}': 60.0}
+    for field in ('wall_seconds', 'cpu_seconds', 'items_per_sec', 'bytes_read', 'bytes_written', 'peak_rss_mb'):
+        samples = families[f'arxiv_pipeline_stage_{field}']['samples']
+        assert samples == {f'{{stage="{stage["name"]}"}}': pytest.approx(stage[field], abs=1e-6) for stage in stages}
+
+    # The second run is compared against the first
+    assert families['arxiv_pipeline_baseline_throughput']['samples'].keys() == {'{quantile="0.5"}', '{quantile="0.95"}'}
+
+
+def test_export_before_any_run(monitor):
+    families = parse(monitor.format_metrics('openmetrics'), 'openmetrics')
+    assert set(families) == {'arxiv_pipeline_runs', 'arxiv_pipeline_papers'}
+    with pytest.raises(ValueError):
+        monitor.format_metrics('json')
+
+
+def test_end_monitoring_exports(monitor, monkeypatch, workspace):
+    path = workspace / 'data' / 'arxiv.prom'
+    monkeypatch.setattr(config, 'METRICS_EXPORT_FILE', str(path))
+    monkeypatch.setattr(config, 'METRICS_EXPORT_FORMAT', 'openmetrics')
+    run(monitor)
+    assert path.read_text() == monitor.format_metrics('openmetrics')
+    assert not (workspace / 'data' / 'arxiv.prom.tmp').exists()
@@ -0,0 +1,79 @@
+"""
+PaperFilter.prefilter may only reject lines that matches() rejects too
+"""
+import itertools
+import json
+
+import pytest
+
+from benchmarks.common import SnapshotGenerator
+from src.paper_filter import FOLDING_CHARS, PaperFilter, category_matches
+
+TEXTS = [
+    ('Neural network limits', 'We study them.'),
+    ('Schrödinger bridges', 'Naïve Bayes and the Schrödinger equation.'),
+    ('KELVIN-scale K-means', 'Kelvin sign and İstanbul, dotted capital I.'),
+    ('C++ and "quoted" terms', 'A back\\slash, a url/path and a tab\there.'),
+    ('Neural\nnetwork', 'Line break inside the phrase.'),
+    ('Deep neural', 'network across the title/abstract join.'),
+    ('ISTANBUL', 'All caps, plain ASCII.'),
+    ('QZ\u0130 models', 'Dotted capital I lowercases to i plus a combining dot.'),
+]
+KEYWORDS = [
+    'neural network', 'schrödinger', 'naïve bayes', 'kelvin-scale', 'k-means', 'istanbul', 'i̇stanbul',
+    'qzi', 'c++', '"quoted"', 'back\\slash', 'url/path', 'tab\there', 'network across', 'dotted capital',
+]
+
+
+def papers():
+    generator = SnapshotGenerator(seed=11)
+    for i, ((title, abstract), versions) in enumerate(itertools.product(TEXTS, [
+        [{'version': 'v1', 'created': 'Thu, 2 Jan 2020 10:00:00 GMT'}],
+        [{'version': 'v1', 'created': 'Mon, 5 Mar 2018 10:00:00 GMT'}, {'version': 'v2', 'created': 'Tue, 1 Jan 2020 10:00:00 GMT'}],
+        [{'version': 'v1'}],
+        [],
+    ])):
+        paper = generator.paper()
+        paper.update(id=f"2001.{i:05d}", title=title, abstract=abstract, versions=versions,
+                     categories=['cs.LG math.ST', 'math-ph', 'physics.comp-ph cs'][i % 3])
+        yield paper
+
+
+FILTERS = [
+    PaperFilter(category=category, year=year, keyword=keyword)
+    for category, year, keyword in itertools.product([None, 'cs', 'math', 'cs.LG'], [None, 2020, 2018], [None] + KEYWORDS)
+]
+
+
+@pytest.mark.parametrize('ensure_ascii', [True, False], ids=['escaped', 'utf8'])
+def test_prefilter_never_rejects_a_match(ensure_ascii):
+    matched = 0
+    for paper in papers():
+        line = json.dumps(paper, ensure_ascii=ensure_ascii).encode('utf-8')
+        for paper_filter in FILTERS:
+            if paper_filter.matches(paper):
+                matched += 1
+                assert paper_filter.prefilter(line), (paper['title'], paper['versions'], vars(paper_filter))
+    assert matched > 100
+
+
+def test_prefilter_still_rejects():
+    lines = [json.dumps(paper).encode('utf-8') for paper in papers()]
+    rejected = lambda **filters: sum(not PaperFilter(**filters).prefilter(line) for line in lines)
+    assert rejected(keyword='deep neural') > len(lines) // 2
+    # Lines holding a Kelvin sign or dotted capital I are kept only for keywords with a k or an i
+    folding = [line for line in lines if any(char in line for char in FOLDING_CHARS)]
+    assert folding
+    assert not any(PaperFilter(keyword='deep neural').prefilter(line) for line in folding)
+    assert all(PaperFilter(keyword='deep kernel').prefilter(line) for line in folding)
+    assert rejected(category='cs') > 0
+    # Versions without "created" can match any year, so only lines with a date are rejected
+    assert 0 < rejected(year=2019) <= sum(b'"created"' in line for line in lines)
+
+
+def test_category_matching_is_exact():
+    assert category_matches('cs', 'math.ST cs.LG')
+    assert category_matches('cs.LG', 'cs.LG')
+    assert not category_matches('cs', 'physics.comp-ph')
+    assert not category_matches('math', 'math-ph')
+    assert not category_matches('cs.L', 'cs.LG')
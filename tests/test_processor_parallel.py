@@ -0,0 +1,77 @@
+import json
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from benchmarks.common import make_papers
+from src import parallel_scan
+from src.keywords import KeywordExtractor
+from src.ndjson_io import iter_records, write_records
+from src.processor import DataProcessor
+from src.parallel_scan import shutdown_pool
+from src.processor_parallel import DataProcessor as ParallelDataProcessor, count_lines
+
+
+@pytest.fixture
+def raw_file(workspace):
+    path = str(workspace / 'data' / 'raw.ndjson')
+    write_records(path, make_papers(120))
+    yield path
+    shutdown_pool()
+
+
+def parallel_processor(cutover):
+    processor = ParallelDataProcessor(workers=2)
+    processor.tuning['min_parallel_papers'] = cutover
+    return processor
+
+
+def assert_same_frame(actual, expected):
+    pd.testing.assert_frame_equal(actual.drop(columns='days_since_published'), expected.drop(columns='days_since_published'))
+
+
+def test_process_file_stays_serial_below_cutover(raw_file):
+    shutdown_pool()
+    df = parallel_processor(cutover=1000).process_file(raw_file)
+
+    assert not parallel_scan._pools
+    assert_same_frame(df, DataProcessor().process_batch(iter_records(raw_file)))
+
+
+def test_process_file_above_cutover_matches_standard(raw_file):
+    assert count_lines(raw_file) == 120
+    processor = parallel_processor(cutover=100)
+    df = processor.process_file(raw_file)
+
+    assert processor.workers in parallel_scan._pools
+    assert_same_frame(df, DataProcessor().process_batch(iter_records(raw_file)))
+    assert_same_frame(processor.process_batch(list(iter_records(raw_file))), df)
+
+
+def test_tfidf_statistics_from_workers_are_merged(raw_file):
+    df_file = 'data/keyword_df.json'
+    with open(df_file, 'w') as f:
+        json.dump({'documents': 10, 'doc_freq': {'graph': 3, 'quantum': 7}}, f)
+    processor = parallel_processor(cutover=0)
+    processor.keywords = KeywordExtractor('tfidf', df_file)
+    papers = list(iter_records(raw_file))
+
+    for batch in range(2):
+        # Every paper of a batch is scored against the statistics as the batch started
+        expected = KeywordExtractor('tfidf', df_file, frozen=True)
+        expected.merge(processor.keywords.documents - expected.documents, processor.keywords.doc_freq - expected.doc_freq)
+        keywords = [expected.extract(paper['title'], paper['abstract']) for paper in papers]
+
+        df = processor.process_file(raw_file)
+        assert df['keywords'].tolist() == keywords
+
+    observed = Counter()
+    for paper in papers:
+        observed.update(KeywordExtractor()._counts(paper['title'], paper['abstract']).keys())
+    assert processor.keywords.documents == 10 + 2 * len(papers)
+    assert processor.keywords.doc_freq == Counter({'graph': 3, 'quantum': 7}) + observed + observed
+
+    processor.keywords.save()
+    stored = KeywordExtractor('tfidf', df_file)
+    assert (stored.documents, stored.doc_freq) == (processor.keywords.documents, processor.keywords.doc_freq)
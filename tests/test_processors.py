@@ -0,0 +1,71 @@
+import json
+
+import pandas as pd
+import pytest
+
+from benchmarks.common import SnapshotGenerator
+from src.processor import DataProcessor
+from src.processor_vectorized import DataProcessor as VectorizedDataProcessor
+from src.schema import Paper
+
+
+def odd_papers():
+    """Records the column-wise date parsing cannot take in one go"""
+    base = {'title': 'Graph neural networks', 'abstract': 'We study message passing on graphs.', 'authors': 'A. One and B. Two'}
+    return [
+        # An ISO date among RFC-2822 ones misses the column format and goes through parse_date
+        dict(base, id='odd/0000001', categories='cs.LG stat.ML math.OC', update_date='2020-01-03',
+             versions=[{'version': 'v1', 'created': '2020-01-02T10:00:00'}]),
+        # Unparseable and missing dates end up NaT in both
+        dict(base, id='odd/0000002', categories='hep-th hep-ph', update_date='not a date',
+             versions=[{'version': 'v1', 'created': 'Someday, 2 Foo 2020 10:00:00 GMT'}]),
+        dict(base, id='odd/0000003', categories='cs.CV', update_date=None, versions=[]),
+        dict(base, id='odd/0000004', categories='math.PR', versions=[{'version': 'v1'}],
+             title='Équations aux dérivées partielles', authors_parsed=[['Müller', 'J.', 'ETH Zurich'], ['Li', 'W.', 'ETH Zurich']]),
+        # One archive only, a last version without a date, blank/padded/repeated affiliations;
+        # non-ASCII text past the title/abstract limits is cut by characters
+        dict(base, id='odd/0000005', categories='math.PR math.ST math', **{'journal-ref': ''},
+             title='Über ' * 120, abstract='Équation ' * 250,
+             versions=[{'version': 'v1', 'created': 'Mon, 2 Jan 2017 10:00:00 GMT'}, {'version': 'v2'}],
+             authors_parsed=[['A', 'B', ' MIT '], ['C', 'D'], ['E', 'F', 'MIT'], ['G', 'H', ''], ['I', 'J', '  '], ['K', 'L', 'Caltech']]),
+    ]
+
+
+def make_batch(count):
+    generator = SnapshotGenerator(seed=11)
+    papers = [Paper.from_raw(json.loads(line)) for line in generator.lines(count)]
+    return papers[:count // 2] + [Paper.from_raw(raw) for raw in odd_papers()] + papers[count // 2:]
+
+
+def assert_same_frame(actual, expected):
+    # days_since_published uses now(), which may tick over a day boundary between the two runs
+    pd.testing.assert_frame_equal(actual.drop(columns='days_since_published'), expected.drop(columns='days_since_published'))
+    assert (actual['days_since_published'] - expected['days_since_published']).abs().max() <= 1
+
+
+@pytest.mark.parametrize('count', [200, 1])
+def test_vectorized_matches_standard(workspace, count):
+    papers = make_batch(count)
+    expected = DataProcessor().process_batch(papers)
+    actual = VectorizedDataProcessor().process_batch(papers)
+
+    assert_same_frame(actual, expected)
+    assert len(actual) == count + len(odd_papers())
+    assert actual['is_interdisciplinary'].any() and not actual['is_interdisciplinary'].all()
+    odd = actual.set_index('arxiv_id').loc[['odd/0000001', 'odd/0000002', 'odd/0000003']]
+    last = actual.set_index('arxiv_id').loc['odd/0000005']
+    assert last['institutions'] == ['MIT', 'Caltech'] and not last['is_interdisciplinary']
+    assert last['last_version_date'] is pd.NA and last['journal_ref'] is pd.NA
+    assert (last['title_length'], last['abstract_length']) == (500, 2000)
+    assert odd['published_date'].iloc[0] == pd.Timestamp('2020-01-02 10:00:00')
+    assert odd['published_date'].iloc[1:].isna().all()
+
+
+def test_vectorized_matches_standard_on_dicts(workspace):
+    # Records read back from the raw NDJSON file come in as dicts
+    papers = [paper.to_dict() for paper in make_batch(50)]
+    assert_same_frame(VectorizedDataProcessor().process_batch(papers), DataProcessor().process_batch(papers))
+
+
+def test_empty_batch(workspace):
+    assert VectorizedDataProcessor().process_batch([]).empty
@@ -0,0 +1,76 @@
+import pytest
+
+from src import query_cache
+from src.query_cache import QueryCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(query_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = QueryCache(max_entries=10, ttl=30)
+    cache.put(('search', 'graph', 10), ['a'])
+
+    clock.now += 29.9
+    assert cache.get(('search', 'graph', 10)) == ['a']
+    clock.now += 0.1
+    assert cache.get(('search', 'graph', 10)) is None
+    assert cache.stats()['entries'] == 0
+
+    # Storing again starts a new TTL
+    cache.put(('search', 'graph', 10), ['b'])
+    clock.now += 10
+    assert cache.get(('search', 'graph', 10)) == ['b']
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = QueryCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b', 'gone') == 'gone'
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+    # Overwriting refreshes recency instead of adding an entry
+    cache.put('a', 10)
+    cache.put('d', 4)
+    assert (cache.get('a'), cache.get('c')) == (10, None)
+
+
+def test_invalidate_drops_everything(clock):
+    cache = QueryCache(max_entries=10, ttl=60)
+    cache.put(('search', 'graph', 10), ['a'])
+    cache.put(('statistics',), {'total': 1})
+    cache.invalidate()
+
+    assert cache.get(('search', 'graph', 10)) is None
+    assert cache.get(('statistics',)) is None
+    assert cache.stats() == {'entries': 0, 'hits': 0, 'misses': 2, 'hit_rate': 0.0, 'evictions': 0, 'invalidations': 1}
+
+
+def test_falsy_values_are_cached(clock):
+    cache = QueryCache(max_entries=10, ttl=60)
+    cache.put(('search', 'nothing', 10), [])
+    assert cache.get(('search', 'nothing', 10), 'miss') == []
+    assert cache.stats()['hits'] == 1
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = QueryCache(max_entries=0, ttl=60)
+    cache.put('a', 1)
+    assert cache.get('a') is None
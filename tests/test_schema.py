@@ -0,0 +1,76 @@
+"""
+compact_frame keeps every value of a processed frame, and the compact dtypes survive Parquet
+"""
+import json
+
+import pandas as pd
+import pytest
+
+import src.processor
+from benchmarks.common import SnapshotGenerator
+from src.processor import DataProcessor
+from src.schema import PROCESSED_DTYPES, Paper, compact_frame, read_processed_parquet
+
+
+def cell(value):
+    """NaN, NaT, NA and None all read as missing"""
+    return None if pd.api.types.is_scalar(value) and pd.isna(value) else value
+
+
+def make_batch(count):
+    papers = [Paper.from_raw(json.loads(line)) for line in SnapshotGenerator(seed=11).lines(count)]
+    # No dates at all, and a version without one
+    for paper, versions in zip(papers, [[], [{'version': 'v1'}]]):
+        paper.versions, paper.published, paper.updated = versions, None, None
+    return papers
+
+
+@pytest.fixture
+def frames(workspace, monkeypatch):
+    """The processor's frame before and after compact_frame"""
+    monkeypatch.setattr(src.processor, 'compact_frame', lambda df: df)
+    loose = DataProcessor().process_batch(make_batch(60))
+    return loose, compact_frame(loose)
+
+
+def test_dtypes(frames):
+    loose, compact = frames
+    assert list(compact.columns) == list(loose.columns)
+    for column in compact.columns:
+        expected = PROCESSED_DTYPES.get(column, loose[column].dtype)
+        assert compact[column].dtype == expected, column
+    # The odd papers have no dates: missing numbers stay missing instead of becoming NaN floats
+    assert compact['year'].isna().sum() == loose['year'].isna().sum() > 0
+    assert compact.equals(compact_frame(compact))
+
+
+def test_values(frames):
+    loose, compact = frames
+    for column in compact.columns:
+        if column == 'versions':
+            continue
+        assert list(map(cell, compact[column].tolist())) == list(map(cell, loose[column].tolist())), column
+    # Versions are structs with both fields, so a version without a date gets created=None
+    expected = [[dict({'created': None}, **version) for version in versions] for versions in loose['versions']]
+    assert compact['versions'].tolist() == expected
+
+
+def test_ndjson_output(frames):
+    loose, compact = frames
+    lines = lambda df: [json.loads(line) for line in df.to_json(orient='records', lines=True, date_format='iso').splitlines()]
+    for before, after in zip(lines(loose), lines(compact)):
+        assert before.pop('versions') == [{key: value for key, value in version.items() if value is not None}
+                                          for version in after.pop('versions')]
+        assert before == after
+
+
+def test_parquet_round_trip(frames, workspace):
+    _, compact = frames
+    path = workspace / 'processed.parquet'
+    compact.to_parquet(path, compression='zstd', index=False)
+    pd.testing.assert_frame_equal(read_processed_parquet(str(path)), compact)
+
+
+def test_empty_frame():
+    empty = pd.DataFrame()
+    assert compact_frame(empty) is empty
@@ -0,0 +1,164 @@
+import json
+
+import pytest
+
+from src.dataset_index import DatasetIndex
+from src.paper_filter import category_matches
+
+
+def read_snapshot(collector):
+    with open(collector.metadata_file, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def write_snapshot(collector, papers):
+    with open(collector.metadata_file, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(paper) + '\n' for paper in papers)
+
+
+def year_of(paper):
+    return DatasetIndex._first_version_year(paper)
+
+
+def in_scope(paper, category=None, year=None):
+    return ((not category or category_matches(category, paper['categories']))
+            and (not year or year_of(paper) in (year, 0)))
+
+
+def first_where(papers, predicate, exclude=()):
+    return next(paper for paper in papers if predicate(paper) and paper['id'] not in exclude)
+
+
+def ids_at(collector, offsets):
+    with open(collector.metadata_file, 'rb') as f:
+        return {json.loads(line)['id'] for line in collector.index.iter_lines(f, list(offsets))}
+
+
+def next_release(collector, category):
+    """Update, remove and add one paper inside and one outside `category`, and move one out of it"""
+    papers = read_snapshot(collector)
+    inside = lambda paper: category_matches(category, paper['categories'])
+    outside = lambda paper: not inside(paper)
+    updated_in = first_where(papers, inside)
+    updated_out = first_where(papers, outside)
+    removed_in = first_where(papers, inside, {updated_in['id']})
+    removed_out = first_where(papers, outside, {updated_out['id']})
+    moved = first_where(papers, inside, {updated_in['id'], removed_in['id']})
+
+    for paper in (updated_in, updated_out):
+        paper.update(update_date='2026-10-01', title='Revised: ' + paper['title'])
+    moved.update(update_date='2026-10-01', categories='q-bio.NC')
+    papers = [paper for paper in papers if paper['id'] not in (removed_in['id'], removed_out['id'])]
+    papers.append(dict(updated_in, id='2610.00001', update_date='2026-10-02'))
+    papers.append(dict(updated_out, id='2610.00002', update_date='2026-10-02'))
+    write_snapshot(collector, papers)
+    return {
+        'updated': updated_in['id'], 'removed': {removed_in['id'], moved['id']}, 'added': '2610.00001',
+        'outside': {updated_out['id'], removed_out['id'], '2610.00002'}
+    }
+
+
+def test_first_run_counts_only_papers_in_scope(collector):
+    papers = read_snapshot(collector)
+    for scope in ({}, {'category': 'cs'}, {'year': 2020}, {'category': 'math', 'year': 2015}):
+        changes = collector.snapshot_delta(**scope).changes()
+        expected = {paper['id'] for paper in papers if in_scope(paper, **scope)}
+        assert changes.first_run
+        assert ids_at(collector, changes.added) == expected
+        assert f"all {len(expected):,} papers in scope" in changes.summary()
+
+
+@pytest.mark.parametrize('category', ['cs', 'math'])
+def test_scoped_delta_sees_only_its_own_changes(collector, category):
+    delta = collector.snapshot_delta(category=category)
+    first = delta.changes()
+    delta.commit()
+    expected = next_release(collector, category)
+
+    changes = delta.changes()
+    assert ids_at(collector, changes.added) == {expected['added']}
+    assert ids_at(collector, changes.updated) == {expected['updated']}
+    # A paper whose categories moved out of scope is removed like a deleted one
+    assert set(changes.removed) == expected['removed']
+    assert not (ids_at(collector, changes.offsets) | set(changes.removed)) & expected['outside']
+    assert changes.unchanged == len(first.added) - 3
+
+    delta.commit()
+    with open(delta.manifest_file) as f:
+        manifest = [line.split('\t')[0] for line in f][1:]
+    papers = read_snapshot(collector)
+    assert sorted(manifest) == sorted(paper['id'] for paper in papers if in_scope(paper, category))
+    assert delta.changes().summary() == f"0 added, 0 updated, 0 removed, {len(manifest):,} unchanged"
+
+
+def test_unscoped_delta_sees_everything(collector):
+    delta = collector.snapshot_delta()
+    delta.changes()
+    delta.commit()
+    expected = next_release(collector, 'cs')
+
+    changes = delta.changes()
+    assert ids_at(collector, changes.added) == {'2610.00001', '2610.00002'}
+    # The moved paper is still in the snapshot, only updated
+    assert len(changes.updated) == 3
+    assert len(changes.removed) == 2 and set(changes.removed) < expected['removed'] | expected['outside']
+
+
+def test_empty_scope(collector):
+    delta = collector.snapshot_delta(category='zz-none')
+    for _ in range(3):
+        changes = delta.changes()
+        delta.commit()
+        assert (len(changes.added), len(changes.updated), changes.removed) == (0, 0, [])
+        assert changes.offsets == []
+    assert changes.summary() == "0 added, 0 updated, 0 removed, 0 unchanged"
+
+    # A scope that empties out removes every paper it held
+    delta = collector.snapshot_delta(category='cs')
+    kept = len(delta.changes().added)
+    delta.commit()
+    write_snapshot(collector, [paper for paper in read_snapshot(collector) if not in_scope(paper, 'cs')])
+    changes = delta.changes()
+    assert (len(changes.removed), changes.unchanged) == (kept, 0)
+
+
+def test_year_scope(collector):
+    papers = read_snapshot(collector)
+    year = year_of(papers[0])
+    delta = collector.snapshot_delta(year=year)
+    delta.changes()
+    delta.commit()
+
+    # Moving the first version to another year takes the paper out of scope
+    papers[0]['versions'][0]['created'] = papers[0]['versions'][0]['created'].replace(str(year), str(year - 1))
+    papers[0]['update_date'] = '2026-10-01'
+    write_snapshot(collector, papers + [dict(papers[1], id='2610.00003', versions=[])])
+
+    changes = delta.changes()
+    assert changes.removed == [papers[0]['id']]
+    # No versions, no year: kept by the year filter like everywhere else
+    assert ids_at(collector, changes.added) == {'2610.00003'}
+
+
+def test_updated_paper_losing_the_keyword_is_removed(collector):
+    papers = read_snapshot(collector)
+    for i, paper in enumerate(papers[:3]):
+        paper['abstract'] = f"A sparse graph method {i}."
+    write_snapshot(collector, papers)
+    delta = collector.snapshot_delta(keyword='sparse graph')
+    changes = delta.changes()
+    matched = collector.collect_changes(changes, keyword='sparse graph')
+    delta.commit()
+    assert {paper.arxiv_id for paper in matched} >= {paper['id'] for paper in papers[:3]}
+    assert changes.removed == []
+
+    papers[0].update(abstract='Nothing to see.', update_date='2026-10-01')
+    papers[1].update(abstract='A sparse graph method, revised.', update_date='2026-10-01')
+    papers[3].update(abstract='Unrelated and updated.', update_date='2026-10-01')
+    write_snapshot(collector, papers)
+
+    changes = delta.changes()
+    matched = collector.collect_changes(changes, keyword='sparse graph')
+    assert [paper.arxiv_id for paper in matched] == [papers[1]['id']]
+    # papers[3] never matched; deleting it is a harmless no-op, like any id the index lacks
+    assert sorted(changes.removed) == sorted([papers[0]['id'], papers[3]['id']])
@@ -0,0 +1,183 @@
+"""
+StorageManager and AsyncStorageManager share everything but the awaits, so the same calls must give the same results
+"""
+import asyncio
+import time
+
+import pytest
+
+import config
+from benchmarks.common import make_papers
+from benchmarks.stub_opensearch import StubOpenSearch
+from src.async_storage import AsyncStorageManager
+from src.ndjson_io import write_records
+from src.processor import DataProcessor
+from src.storage import StorageManager, get_shipper
+
+
+@pytest.fixture(scope='module')
+def df():
+    return DataProcessor().process_batch(make_papers(60))
+
+
+def comparable(result):
+    # Timings differ from run to run
+    return {key: value for key, value in result.items() if key not in ('seconds', 'docs_per_sec')} if result else result
+
+
+def sync_session(df, **kwargs):
+    storage = StorageManager(**kwargs)
+    removed = list(df['arxiv_id'][:5])
+    return [
+        comparable(storage.index_papers(df)),
+        comparable(storage.index_papers(df)),
+        storage.search_many(['neural', 'graph', 'neural'], size=5),
+        storage.search_papers('quantum', size=3),
+        storage.get_statistics(),
+        comparable(storage.delete_papers(removed)),
+        storage.search_many(['neural'], size=5),
+        storage.get_statistics(),
+        storage.cache_stats()
+    ]
+
+
+async def async_session(df, **kwargs):
+    removed = list(df['arxiv_id'][:5])
+    async with AsyncStorageManager(**kwargs) as storage:
+        return [
+            comparable(await storage.index_papers(df)),
+            comparable(await storage.index_papers(df)),
+            await storage.search_many(['neural', 'graph', 'neural'], size=5),
+            await storage.search_papers('quantum', size=3),
+            await storage.get_statistics(),
+            comparable(await storage.delete_papers(removed)),
+            await storage.search_many(['neural'], size=5),
+            await storage.get_statistics(),
+            storage.cache_stats()
+        ]
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_local_backend_sync_and_async_agree(workspace, df, incremental):
+    expected = sync_session(df, incremental=incremental, search_backend='local')
+    StorageManager(search_backend='local').local_index.remove(list(df['arxiv_id']))
+    actual = asyncio.run(async_session(df, incremental=incremental, search_backend='local'))
+
+    assert actual == expected
+    assert expected[2][0] and expected[2][0] == expected[2][2]
+    assert expected[7] == {'total_papers': len(df) - 5}
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_opensearch_sync_and_async_agree(workspace, df, monkeypatch, incremental):
+    sessions = []
+    for session in (lambda: sync_session(df, incremental=incremental, search_backend='opensearch'),
+                    lambda: asyncio.run(async_session(df, incremental=incremental, search_backend='opensearch'))):
+        with StubOpenSearch() as stub:
+            monkeypatch.setattr(config, 'OPENSEARCH_PORT', stub.port)
+            sessions.append(session())
+            assert len(stub.state.get(config.OPENSEARCH_INDEX)['docs']) == len(df) - 5
+            # One _msearch per batch of uncached queries plus the statistics, each twice around the writes
+            assert stub.state.search_requests == 5
+    expected, actual = sessions
+
+    assert actual == expected
+    first, second = expected[0], expected[1]
+    assert first['success'] == len(df)
+    # The ledger only skips unchanged papers in incremental mode
+    assert second['skipped'] == (len(df) if incremental else 0)
+    assert expected[5]['success'] == 5
+    assert expected[7]['total_papers'] == len(df) - 5
+
+
+@pytest.fixture
+def artifacts(workspace, df):
+    raw_file = str(workspace / 'data' / 'raw.ndjson')
+    write_records(raw_file, make_papers(2000))
+    return [(raw_file, 'raw/test.ndjson')]
+
+
+def s3_objects(s3):
+    return {key: (obj['data'], obj['metadata']) for (bucket, key), obj in s3.state.objects.items()}
+
+
+def test_s3_sync_and_async_agree(workspace, df, s3, artifacts, monkeypatch):
+    metadata = {'batch-id': 'batch_1'}
+    stores = []
+    for store in (
+        lambda storage: (storage.ship_artifacts(artifacts, [(df, 'processed/test.parquet')], metadata),
+                         storage.index_papers(df), storage.get_statistics()),
+        lambda storage: asyncio.run(async_store(df, artifacts, 'processed/test.parquet', metadata))
+    ):
+        s3.state.objects.clear()
+        with StubOpenSearch() as stub:
+            monkeypatch.setattr(config, 'OPENSEARCH_PORT', stub.port)
+            shipped, indexed, statistics = store(StorageManager(search_backend='opensearch'))
+            stores.append((s3_objects(s3), [result['status'] for result in shipped], comparable(indexed), statistics))
+    expected, actual = stores
+
+    assert actual == expected
+    objects, statuses, indexed, statistics = expected
+    assert sorted(objects) == ['processed/test.parquet', 'raw/test.ndjson.gz']
+    assert all(obj_metadata['x-amz-meta-batch-id'] == 'batch_1' for _, obj_metadata in objects.values())
+    assert statuses == ['uploaded', 'uploaded']
+    assert indexed['success'] == len(df) and statistics['total_papers'] == len(df)
+
+
+async def async_store(df, artifacts, frame_key, metadata):
+    async with AsyncStorageManager(search_backend='opensearch') as storage:
+        result = await storage.store(df, artifacts, frame_key, metadata=metadata)
+    return result['artifacts'], result['index'], result['statistics']
+
+
+def test_async_store_overlaps_upload_with_indexing(workspace, df, s3, artifacts, monkeypatch):
+    # About a second per upload, far longer than indexing 60 papers
+    s3.state.bandwidth = 200 * 1024
+    spans = {}
+
+    def timed(name, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            spans[name] = (start, time.perf_counter())
+            return result
+        return wrapper
+
+    def timed_async(name, function):
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = await function(*args, **kwargs)
+            spans[name] = (start, time.perf_counter())
+            return result
+        return wrapper
+
+    shipper = get_shipper()
+    monkeypatch.setattr(shipper, 'ship_all', timed('ship', shipper.ship_all))
+    monkeypatch.setattr(AsyncStorageManager, 'index_papers', timed_async('index', AsyncStorageManager.index_papers))
+    monkeypatch.setattr(AsyncStorageManager, 'get_statistics', timed_async('statistics', AsyncStorageManager.get_statistics))
+
+    with StubOpenSearch() as stub:
+        monkeypatch.setattr(config, 'OPENSEARCH_PORT', stub.port)
+        shipped, indexed, statistics = asyncio.run(async_store(df, artifacts, None, None))
+
+    assert shipped[0]['status'] == 'uploaded' and indexed['success'] == len(df)
+    ship_start, ship_end = spans['ship']
+    # Indexing and the statistics refresh both finish while the upload is still running
+    assert spans['index'][0] < ship_end and spans['statistics'][1] < ship_end
+    assert spans['index'][1] <= spans['statistics'][0]
+    assert ship_start < spans['index'][1]
+
+
+def test_search_results_are_copies(workspace, df):
+    storage = StorageManager(search_backend='local')
+    storage.index_papers(df)
+    storage.search_papers('neural').clear()
+    assert storage.search_papers('neural')
+    assert storage.cache_stats()['hits'] == 1
+
+
+def test_unknown_backend(workspace):
+    with pytest.raises(ValueError):
+        StorageManager(search_backend='elastic')
+    with pytest.raises(ValueError):
+        AsyncStorageManager(search_backend='elastic')